@@ -1,440 +1,3330 @@
+import os
+import io
+import re
+import functools
+import gzip
+import html
+import base64
+import hashlib
 import json
+import uuid
 import boto3
+import random
+import threading
+import time
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, fields, is_dataclass
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Callable, Iterable, Iterator, List, Optional, TextIO, Union, get_args, get_origin, get_type_hints
+from urllib.parse import quote, unquote, urlparse
 
-def get_infrastructure_details(app_id):
-    """Fetch detailed infrastructure information and return in YAML format"""
-    try:
-        # Initialize AWS clients
-        ec2 = boto3.client('ec2')
-        dynamodb = boto3.client('dynamodb')
-        s3 = boto3.client('s3')
-        elbv2 = boto3.client('elbv2')
-        iam = boto3.client('iam')
-        lambda_client = boto3.client('lambda')
-        apigw = boto3.client('apigateway')
-
-        # Start YAML structure
-        response_text = f"""# Infrastructure Documentation
-metadata:
-  app_id: {app_id}
-  timestamp: {datetime.now().isoformat()}
-  region: {boto3.session.Session().region_name}
-
-resources:"""
-
-        # Get Lambda functions
+# Service collectors run side by side; per-resource detail calls fan out inside each collector
+COLLECTOR_WORKERS = int(os.environ.get('COLLECTOR_WORKERS', '6'))
+DETAIL_CONCURRENCY = int(os.environ.get('DETAIL_CONCURRENCY', '8'))
+
+# Maximum filter values / GroupIds per batched EC2 describe call
+EC2_BATCH_SIZE = 200
+
+# Apps documented side by side in batch mode; each runs its own collector pool
+BATCH_WORKERS = int(os.environ.get('BATCH_WORKERS', '4'))
+
+# Regions and cross-account roles to inventory. The Lambda's own account is always included,
+# role ARNs add accounts reached through sts:AssumeRole.
+INVENTORY_REGIONS = [region.strip() for region in os.environ.get('INVENTORY_REGIONS', '').split(',') if region.strip()]
+INVENTORY_ROLE_ARNS = [arn.strip() for arn in os.environ.get('INVENTORY_ROLE_ARNS', '').split(',') if arn.strip()]
+TARGET_WORKERS = int(os.environ.get('TARGET_WORKERS', '8'))
+TARGET_TIMEOUT_SECONDS = float(os.environ.get('TARGET_TIMEOUT_SECONDS', '60'))
+
+# Asynchronous documentation jobs: job records live in JOB_STORE_BACKEND (same spec as the
+# inventory cache backend, in-process when unset). Jobs are queued on DOCUMENTATION_QUEUE_URL
+# and picked up by this function's SQS trigger. A queue needs a shared job store, since the
+# consumer runs in a different container. Without a queue, jobs run inline in the request:
+# Lambda freezes background threads once the handler returns.
+JOB_STORE_BACKEND = os.environ.get('JOB_STORE_BACKEND', '')
+DOCUMENTATION_QUEUE_URL = os.environ.get('DOCUMENTATION_QUEUE_URL', '')
+
+DOCUMENTATION_BUCKET = 'adc-knowledge-base-bucket'  # Replace with your bucket name
+# The knowledge base ingests documentation/; bookkeeping objects live under this prefix instead
+DOCUMENTATION_METADATA_PREFIX = 'documentation-metadata'
+
+# Agent responses larger than this many characters are paged, starting with a summary page
+PAGE_MAX_CHARS = int(os.environ.get('PAGE_MAX_CHARS', '20000'))
+
+# Per-app section snapshots for incremental documentation, as 'file:///path' or 's3://bucket/prefix'
+INVENTORY_SNAPSHOT_STORE = os.environ.get(
+    'INVENTORY_SNAPSHOT_STORE', f"s3://{DOCUMENTATION_BUCKET}/{DOCUMENTATION_METADATA_PREFIX}/snapshots"
+)
+
+# Terraform code or state for the offline inventory source: a local path or 's3://bucket/prefix'
+# holding .tf / .tfstate files (e.g. the infrastructure_code/ tree), indexed by app_id tag
+INFRASTRUCTURE_CODE_SOURCE = os.environ.get('INFRASTRUCTURE_CODE_SOURCE', '')
+
+# Optional init-phase warm-up, so the first request doesn't pay for it: comma-separated services
+# whose clients to build ('all' for every collector service) and/or 'infrastructure_code' to parse
+# INFRASTRUCTURE_CODE_SOURCE. Pays off most with provisioned concurrency or SnapStart.
+PREWARM = [item.strip() for item in os.environ.get('PREWARM', '').split(',') if item.strip()]
+
+# Documentation pages stream to S3 gzip-compressed in parts of this size (S3 minimum is 5 MiB)
+DOCUMENTATION_PART_SIZE = max(5 * 1024 * 1024, int(os.environ.get('DOCUMENTATION_PART_SIZE', str(8 * 1024 * 1024))))
+
+# Guards counters that detail calls update from worker threads
+STATS_LOCK = threading.Lock()
+
+# Per-invocation telemetry is printed as one CloudWatch Embedded Metric Format line in this namespace
+METRICS_NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'InfrastructureDocumentation')
+# Also return it in the response's debug field (or per request with debug=true)
+INSTRUMENTATION_DEBUG = os.environ.get('INSTRUMENTATION_DEBUG', 'false').lower() == 'true'
+# EMF accepts at most 100 values per metric, so call latencies are reservoir-sampled
+LATENCY_SAMPLE_SIZE = 100
+
+# Error codes services return when a request was throttled
+THROTTLE_ERROR_CODES = {
+    'Throttling', 'ThrottlingException', 'ThrottledException', 'RequestThrottledException',
+    'TooManyRequestsException', 'ProvisionedThroughputExceededException', 'RequestLimitExceeded',
+    'RequestThrottled', 'SlowDown', 'EC2ThrottledException', 'BandwidthLimitExceeded',
+    'PriorRequestNotComplete', 'LimitExceededException',
+}
+
+# Clients are shared by every detail worker, so the connection pool matches the fan-out
+CLIENT_MAX_ATTEMPTS = int(os.environ.get('CLIENT_MAX_ATTEMPTS', '5'))
+CLIENT_CONFIG = Config(
+    max_pool_connections=max(COLLECTOR_WORKERS, DETAIL_CONCURRENCY),
+    retries={'mode': 'adaptive', 'max_attempts': CLIENT_MAX_ATTEMPTS}
+)
+
+# Request rates (calls per second) the scheduler starts from, per service or per 'service.Operation',
+# kept under the documented control-plane limits. Override with e.g. API_RATE_LIMITS='ec2=20,s3.GetBucketTagging=10'.
+DEFAULT_RATE_LIMITS = {
+    'apigateway': 10,
+    'ec2': 40,
+    'ec2.DescribeSecurityGroups': 20,
+    'elbv2': 10,
+    'lambda': 15,
+    'dynamodb': 10,
+    's3': 50,
+    's3.GetBucketTagging': 25,
+    'resourcegroupstaggingapi': 5,
+    'sts': 10,
+}
+# Buckets hold this many seconds of tokens, like the service-side burst allowances
+RATE_LIMIT_BURST_SECONDS = 4
+# Rates never drop below this after throttling
+MIN_RATE_LIMIT = 0.5
+# Throttled calls keep retrying with full-jitter backoff this many attempts past the botocore retries
+THROTTLE_RETRY_ATTEMPTS = int(os.environ.get('THROTTLE_RETRY_ATTEMPTS', '5'))
+THROTTLE_BACKOFF_BASE = 0.25
+THROTTLE_BACKOFF_CAP = 20.0
+
+# Module-level state survives across warm invocations of the same container
+DEFAULT_SESSION = None
+CLIENT_REGISTRY: Dict[tuple, Any] = {}
+ACCOUNT_IDS: Dict[str, str] = {}
+ASSUMED_SESSIONS: Dict[str, tuple] = {}
+CLIENT_LOCK = threading.Lock()
+
+# Inventory cache: per-service TTLs in seconds, overridable with INVENTORY_CACHE_TTLS="ec2=30,s3=900".
+# EC2 state and DynamoDB item counts drift faster than bucket or API settings.
+DEFAULT_CACHE_TTL = 300
+DEFAULT_CACHE_TTLS = {
+    'discovery': 300,
+    'lambda': 300,
+    'apigateway': 300,
+    'ec2': 60,
+    'dynamodb': 120,
+    's3': 600,
+    'elasticloadbalancing': 300,
+}
+CACHE_MAX_ENTRIES = int(os.environ.get('INVENTORY_CACHE_MAX_ENTRIES', '256'))
+
+# Per-invocation counters, reset by lambda_handler and logged with the response
+METRICS = {
+    'clients_created': 0,
+    'clients_reused': 0,
+    'client_init_ms': 0.0,
+    'cache_hits': 0,
+    'shared_cache_hits': 0,
+    'cache_misses': 0,
+    'api_calls': 0,
+    'documentation_uploads_skipped': 0,
+    'api_method_cache_hits': 0,
+    'scheduler_wait_ms': 0.0,
+}
+
+# Per-invocation call stats keyed by (service, operation), collector stats keyed by service,
+# and a sample of call latencies; reset with METRICS
+CALL_STATS: Dict[tuple, Dict[str, float]] = {}
+SECTION_STATS: Dict[str, Dict[str, float]] = {}
+LATENCY_SAMPLE: Dict[str, Any] = {'seen': 0, 'values': []}
+# Resources a collector skipped after an error, returned with the debug payload
+RESOURCE_ERRORS: List[Dict[str, str]] = []
+
+# Resource types resolved by the tag discovery stage, one per inventory section
+DISCOVERY_RESOURCE_TYPES = [
+    'lambda:function',
+    'apigateway:restapis',
+    'ec2:instance',
+    'dynamodb:table',
+    's3:bucket',
+    'elasticloadbalancing:loadbalancer',
+]
+
+def reset_metrics():
+    """Reset the per-invocation counters"""
+    with STATS_LOCK:
+        for name in METRICS:
+            METRICS[name] = 0.0 if isinstance(METRICS[name], float) else 0
+        CALL_STATS.clear()
+        SECTION_STATS.clear()
+        LATENCY_SAMPLE['seen'] = 0
+        LATENCY_SAMPLE['values'] = []
+        RESOURCE_ERRORS.clear()
+
+def record_metric(name: str, value=1):
+    """Add to a per-invocation counter from any worker thread"""
+    with STATS_LOCK:
+        METRICS[name] += value
+
+def get_session() -> boto3.session.Session:
+    """Return the module-level boto3 session, creating it on first use"""
+    global DEFAULT_SESSION
+    with CLIENT_LOCK:
+        if DEFAULT_SESSION is None:
+            DEFAULT_SESSION = boto3.session.Session()
+        return DEFAULT_SESSION
+
+def credentials_key(session: boto3.session.Session) -> str:
+    """Identify the credentials a session signs with, without exposing the secret"""
+    credentials = session.get_credentials()
+    return credentials.access_key if credentials else 'anonymous'
+
+def call_stats(service: str, operation: str) -> Dict[str, float]:
+    """Stats entry for one operation; callers hold STATS_LOCK"""
+    stats = CALL_STATS.get((service, operation))
+    if stats is None:
+        stats = CALL_STATS[(service, operation)] = {'calls': 0, 'errors': 0, 'throttles': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+    return stats
+
+def start_api_call(model=None, context=None, **kwargs):
+    """botocore before-call hook: count the request and note when it started"""
+    record_metric('api_calls')
+    if context is not None and model is not None:
+        context['instrumentation'] = (model.service_model.service_name, model.name, time.perf_counter())
+
+def finish_api_call(context=None, http_response=None, parsed=None, exception=None, **kwargs):
+    """
+    botocore after-call / after-call-error hook: record latency (including retries)
+    and whether the call ended in an error, tagged with service and operation
+    """
+    call = (context or {}).get('instrumentation')
+    if call is None:
+        return
+    service, operation, started = call
+    latency_ms = (time.perf_counter() - started) * 1000
+    failed = exception is not None or bool(parsed and 'Error' in parsed) or (
+        http_response is not None and http_response.status_code >= 400)
+
+    with STATS_LOCK:
+        stats = call_stats(service, operation)
+        stats['calls'] += 1
+        stats['errors'] += int(failed)
+        stats['total_ms'] += latency_ms
+        stats['max_ms'] = max(stats['max_ms'], latency_ms)
+        LATENCY_SAMPLE['seen'] += 1
+        if len(LATENCY_SAMPLE['values']) < LATENCY_SAMPLE_SIZE:
+            LATENCY_SAMPLE['values'].append(round(latency_ms, 2))
+        else:
+            slot = random.randrange(LATENCY_SAMPLE['seen'])
+            if slot < LATENCY_SAMPLE_SIZE:
+                LATENCY_SAMPLE['values'][slot] = round(latency_ms, 2)
+
+def count_throttle(response=None, operation=None, **kwargs):
+    """botocore needs-retry hook: count every throttled attempt, retried or not"""
+    if response is None or operation is None:
+        return None
+    if response[1].get('Error', {}).get('Code') in THROTTLE_ERROR_CODES:
+        with STATS_LOCK:
+            call_stats(operation.service_model.service_name, operation.name)['throttles'] += 1
+    return None
+
+def parse_rate_limits(spec: str) -> Dict[str, float]:
+    """Parse rate overrides such as 'ec2=20,apigateway.GetMethod=4' on top of the defaults"""
+    limits = dict(DEFAULT_RATE_LIMITS)
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        key, rate = item.split('=', 1)
+        limits[key.strip()] = float(rate)
+    return limits
+
+class TokenBucket:
+    """
+    Rate limiter that hands out one token per call. The rate halves on throttling
+    and climbs back towards the configured rate as calls succeed (AIMD).
+    """
+
+    def __init__(self, rate: float):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = max(1.0, rate * RATE_LIMIT_BURST_SECONDS)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take a token, sleeping until one is available; returns the seconds waited"""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def throttled(self):
+        with self.lock:
+            self.rate = max(MIN_RATE_LIMIT, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+
+    def succeeded(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+class AdaptiveLimit:
+    """
+    Cap on in-flight calls to one service. Halves when a call is throttled and
+    grows by one per limit's worth of successful calls, up to the detail fan-out.
+    """
+
+    def __init__(self, limit: int):
+        self.max_limit = limit
+        self.limit = float(limit)
+        self.in_flight = 0
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        with self.condition:
+            while self.in_flight >= int(self.limit):
+                self.condition.wait()
+            self.in_flight += 1
+
+    def release(self, throttled: bool):
+        with self.condition:
+            self.in_flight -= 1
+            if throttled:
+                self.limit = max(1.0, self.limit / 2)
+            else:
+                self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+            self.condition.notify_all()
+
+class RequestScheduler:
+    """
+    Paces every call made through the client registry. Calls wait for a token from
+    their service bucket and, when configured, their operation bucket, and for a slot
+    under the service's adaptive concurrency limit. Throttling slows both down and is
+    retried with jittered backoff once botocore's own retries are spent.
+    Buckets and limits are kept per scope (credentials and region), since service quotas
+    apply per account and region, so one throttled target never slows down another.
+    They live for the container, so warm invocations start from what was learned.
+    """
+
+    def __init__(self, rate_limits: Dict[str, float], max_concurrency: int):
+        self.rate_limits = rate_limits
+        self.max_concurrency = max_concurrency
+        self.buckets: Dict[tuple, Optional[TokenBucket]] = {}
+        self.limits: Dict[tuple, AdaptiveLimit] = {}
+        self.lock = threading.Lock()
+
+    def _bucket(self, scope: tuple, key: str) -> Optional[TokenBucket]:
+        with self.lock:
+            if (scope, key) not in self.buckets:
+                rate = self.rate_limits.get(key)
+                self.buckets[(scope, key)] = TokenBucket(rate) if rate else None
+            return self.buckets[(scope, key)]
+
+    def _limit(self, scope: tuple, service: str) -> AdaptiveLimit:
+        with self.lock:
+            if (scope, service) not in self.limits:
+                self.limits[(scope, service)] = AdaptiveLimit(self.max_concurrency)
+            return self.limits[(scope, service)]
+
+    def before_call(self, model=None, context=None, scope: tuple = (), **kwargs):
+        """
+        botocore before-call hook: wait for a concurrency slot and rate tokens.
+        get_client binds scope to the client's credentials and region.
+        """
+        if model is None or context is None:
+            return
+        service = model.service_model.service_name
+        started = time.perf_counter()
+        self._limit(scope, service).acquire()
+        for key in (service, f"{service}.{model.name}"):
+            bucket = self._bucket(scope, key)
+            if bucket is not None:
+                bucket.acquire()
+        context['scheduler'] = {'scope': scope, 'service': service, 'operation': model.name, 'throttled': False}
+        record_metric('scheduler_wait_ms', (time.perf_counter() - started) * 1000)
+
+    def after_call(self, context=None, **kwargs):
+        """botocore after-call / after-call-error hook: free the slot and speed back up on success"""
+        call = (context or {}).pop('scheduler', None)
+        if call is None:
+            return
+        self._limit(call['scope'], call['service']).release(call['throttled'])
+        if not call['throttled']:
+            for key in (call['service'], f"{call['service']}.{call['operation']}"):
+                bucket = self._bucket(call['scope'], key)
+                if bucket is not None:
+                    bucket.succeeded()
+
+    def needs_retry(self, response=None, operation=None, attempts=None, request_dict=None, **kwargs):
+        """
+        botocore needs-retry hook. Throttling slows the service down; once botocore's retry
+        handler (which runs first) stops retrying, throttled calls get extra attempts with
+        full-jitter backoff instead of failing and dropping their section.
+        """
+        if response is None or operation is None:
+            return None
+        if response[1].get('Error', {}).get('Code') not in THROTTLE_ERROR_CODES:
+            return None
+        service = operation.service_model.service_name
+        call = ((request_dict or {}).get('context') or {}).get('scheduler')
+        if call is not None:
+            call['throttled'] = True
+            for key in (service, f"{service}.{operation.name}"):
+                bucket = self._bucket(call['scope'], key)
+                if bucket is not None:
+                    bucket.throttled()
+        if attempts is None or attempts >= CLIENT_MAX_ATTEMPTS + THROTTLE_RETRY_ATTEMPTS:
+            return None
+        return random.uniform(0, min(THROTTLE_BACKOFF_CAP, THROTTLE_BACKOFF_BASE * 2 ** attempts))
+
+SCHEDULER = RequestScheduler(
+    parse_rate_limits(os.environ.get('API_RATE_LIMITS', '')),
+    DETAIL_CONCURRENCY
+)
+
+def section_stats(service: str) -> Dict[str, float]:
+    """Stats entry for one section; callers hold STATS_LOCK"""
+    stats = SECTION_STATS.get(service)
+    if stats is None:
+        stats = SECTION_STATS[service] = {'runs': 0, 'cached': 0, 'errors': 0, 'records': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+    return stats
+
+def record_resource_error(service: str, resource: str, error: Exception):
+    """
+    Count a resource a collector had to skip as a section error, so a partially
+    failed section shows up in SectionErrors like a failed collector run
+    """
+    with STATS_LOCK:
+        section_stats(service)['errors'] += 1
+        if len(RESOURCE_ERRORS) < LATENCY_SAMPLE_SIZE:
+            RESOURCE_ERRORS.append({'section': service, 'resource': resource, 'error': str(error)})
+
+def record_section(service: str, elapsed_ms: float, records: int = 0, error: bool = False, cached: bool = False):
+    """Accumulate a collector run for a section (summed over targets and apps)"""
+    with STATS_LOCK:
+        stats = section_stats(service)
+        stats['runs'] += 1
+        stats['cached'] += int(cached)
+        stats['errors'] += int(error)
+        stats['records'] += records
+        stats['total_ms'] += elapsed_ms
+        stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+
+def telemetry_snapshot() -> Dict[str, Any]:
+    """Per-invocation counters, per-operation call stats and per-section timings"""
+    with STATS_LOCK:
+        return {
+            'metrics': dict(METRICS),
+            'api_calls': {
+                f"{service}.{operation}": {key: round(value, 2) for key, value in stats.items()}
+                for (service, operation), stats in sorted(CALL_STATS.items())
+            },
+            'sections': {
+                service: {key: round(value, 2) for key, value in stats.items()}
+                for service, stats in SECTION_STATS.items()
+            },
+            'latency_sample_ms': list(LATENCY_SAMPLE['values']),
+            'resource_errors': list(RESOURCE_ERRORS),
+        }
+
+def emit_metrics(function_name: str) -> Dict[str, Any]:
+    """
+    Print the invocation's telemetry as one CloudWatch Embedded Metric Format line and return it.
+    Totals and per-section times are metrics; per-operation stats ride along as properties.
+    """
+    telemetry = telemetry_snapshot()
+    calls = telemetry['api_calls'].values()
+    document = {
+        'FunctionName': function_name or 'unknown',
+        'ApiCalls': sum(stats['calls'] for stats in calls),
+        'ApiErrors': sum(stats['errors'] for stats in calls),
+        'ApiThrottles': sum(stats['throttles'] for stats in calls),
+        'ApiLatency': telemetry['latency_sample_ms'],
+        'CacheHits': telemetry['metrics']['cache_hits'],
+        'CacheMisses': telemetry['metrics']['cache_misses'],
+        'SectionErrors': sum(stats['errors'] for stats in telemetry['sections'].values()),
+    }
+    metric_definitions = [
+        {'Name': 'ApiCalls', 'Unit': 'Count'},
+        {'Name': 'ApiErrors', 'Unit': 'Count'},
+        {'Name': 'ApiThrottles', 'Unit': 'Count'},
+        {'Name': 'ApiLatency', 'Unit': 'Milliseconds'},
+        {'Name': 'CacheHits', 'Unit': 'Count'},
+        {'Name': 'CacheMisses', 'Unit': 'Count'},
+        {'Name': 'SectionErrors', 'Unit': 'Count'},
+    ]
+    for service, stats in telemetry['sections'].items():
+        document[f"{service}SectionTime"] = stats['total_ms']
+        metric_definitions.append({'Name': f"{service}SectionTime", 'Unit': 'Milliseconds'})
+
+    document['_aws'] = {
+        'Timestamp': int(time.time() * 1000),
+        'CloudWatchMetrics': [{
+            'Namespace': METRICS_NAMESPACE,
+            'Dimensions': [['FunctionName']],
+            'Metrics': metric_definitions,
+        }]
+    }
+    document['counters'] = telemetry['metrics']
+    document['api_calls_by_operation'] = telemetry['api_calls']
+    document['sections'] = telemetry['sections']
+    document['resource_errors'] = telemetry['resource_errors']
+    print(json.dumps(document))
+    return telemetry
+
+def get_client(service: str, region: Optional[str] = None, session: Optional[boto3.session.Session] = None):
+    """
+    Return a client from the registry keyed by service, region and credentials.
+    Clients are created once per container and reused across warm invocations.
+    """
+    session = session or get_session()
+    region = region or session.region_name
+    key = (service, region, credentials_key(session))
+
+    client = CLIENT_REGISTRY.get(key)
+    if client is None:
+        # Session.client is not thread-safe, so creation is serialized
+        with CLIENT_LOCK:
+            client = CLIENT_REGISTRY.get(key)
+            if client is None:
+                started = time.perf_counter()
+                client = session.client(service, region_name=region, config=CLIENT_CONFIG)
+                scope = (credentials_key(session), client.meta.region_name)
+                client.meta.events.register('before-call', functools.partial(SCHEDULER.before_call, scope=scope))
+                client.meta.events.register('after-call', SCHEDULER.after_call)
+                client.meta.events.register('after-call-error', SCHEDULER.after_call)
+                client.meta.events.register('needs-retry', SCHEDULER.needs_retry)
+                client.meta.events.register('before-call', start_api_call)
+                client.meta.events.register('after-call', finish_api_call)
+                client.meta.events.register('after-call-error', finish_api_call)
+                client.meta.events.register('needs-retry', count_throttle)
+                CLIENT_REGISTRY[key] = client
+                record_metric('clients_created')
+                record_metric('client_init_ms', (time.perf_counter() - started) * 1000)
+                return client
+
+    record_metric('clients_reused')
+    return client
+
+class LazyClients(dict):
+    """
+    Per-service clients for one target, built through the registry on first lookup,
+    so cached or unrequested sections never pay for client construction
+    """
+
+    def __init__(self, region: Optional[str] = None, session: Optional[boto3.session.Session] = None):
+        super().__init__()
+        self.region = region
+        self.session = session
+
+    def __missing__(self, service: str):
+        client = self[service] = get_client(service, self.region, self.session)
+        return client
+
+def get_account_id(session: Optional[boto3.session.Session] = None) -> str:
+    """Resolve the account ID for the session's credentials once and memoize it"""
+    session = session or get_session()
+    key = credentials_key(session)
+    if key not in ACCOUNT_IDS:
+        ACCOUNT_IDS[key] = get_client('sts', session=session).get_caller_identity()['Account']
+    return ACCOUNT_IDS[key]
+
+def get_target_session(role_arn: Optional[str] = None) -> boto3.session.Session:
+    """
+    Return the session for an inventory target account.
+    Assumed-role sessions are reused until their credentials are close to expiry.
+    """
+    if not role_arn:
+        return get_session()
+
+    cached = ASSUMED_SESSIONS.get(role_arn)
+    if cached is not None and cached[1] - time.time() > 300:
+        return cached[0]
+
+    credentials = get_client('sts').assume_role(
+        RoleArn=role_arn,
+        RoleSessionName='infrastructure-documentation'
+    )['Credentials']
+    session = boto3.session.Session(
+        aws_access_key_id=credentials['AccessKeyId'],
+        aws_secret_access_key=credentials['SecretAccessKey'],
+        aws_session_token=credentials['SessionToken'],
+        region_name=get_session().region_name
+    )
+    ASSUMED_SESSIONS[role_arn] = (session, credentials['Expiration'].timestamp())
+    return session
+
+def inventory_targets(regions: Optional[List[str]] = None,
+                      role_arns: Optional[List[str]] = None) -> List[Dict[str, Optional[str]]]:
+    """List the (role, region) pairs to inventory; role None is the Lambda's own account"""
+    regions = regions or INVENTORY_REGIONS or [get_session().region_name]
+    role_arns = INVENTORY_ROLE_ARNS if role_arns is None else role_arns
+    return [
+        {'role_arn': role_arn, 'region': region}
+        for role_arn in [None] + list(role_arns)
+        for region in regions
+    ]
+
+def parse_cache_ttls(spec: str) -> Dict[str, int]:
+    """Parse per-service TTL overrides such as 'ec2=30,s3=900' on top of the defaults"""
+    ttls = dict(DEFAULT_CACHE_TTLS)
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        service, ttl = item.split('=', 1)
+        ttls[service.strip()] = int(ttl)
+    return ttls
+
+class FileCacheBackend:
+    """Shared cache tier stored as one JSON file per key, e.g. on a mounted EFS path"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, quote(key, safe='') + '.json')
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
         try:
-            functions = lambda_client.list_functions()['Functions']
-            has_lambda = False
-            lambda_text = """
-  serverless:
-    lambda_functions:"""
-            
-            for function in functions:
-                tags = lambda_client.list_tags(Resource=function['FunctionArn'])['Tags']
-                if tags.get('app_id') == app_id:
-                    has_lambda = True
-                    config = lambda_client.get_function_configuration(
-                        FunctionName=function['FunctionName']
-                    )
-                    
-                    lambda_text += f"""
-      - function_name: {function['FunctionName']}
-        runtime: {config['Runtime']}
-        handler: {config['Handler']}
-        memory: {config['MemorySize']} MB
-        timeout: {config['Timeout']} seconds
-        last_modified: {config['LastModified']}
-        code_size: {config['CodeSize']} bytes
+            with open(self._path(key)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def set(self, key: str, entry: Dict[str, Any]):
+        # Write then rename so concurrent readers never see a partial file
+        tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, self._path(key))
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def keys(self, prefix: str) -> List[str]:
+        names = [unquote(name[:-len('.json')]) for name in os.listdir(self.directory) if name.endswith('.json')]
+        return [key for key in names if key.startswith(prefix)]
+
+class S3CacheBackend:
+    """Shared cache tier stored as one JSON object per key under an S3 prefix"""
+
+    def __init__(self, bucket: str, prefix: str = ''):
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}.json" if self.prefix else f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        s3 = get_client('s3')
+        try:
+            response = s3.get_object(Bucket=self.bucket, Key=self._key(key))
+        except s3.exceptions.NoSuchKey:
+            return None
+        return json.loads(response['Body'].read())
+
+    def set(self, key: str, entry: Dict[str, Any]):
+        get_client('s3').put_object(
+            Bucket=self.bucket,
+            Key=self._key(key),
+            Body=json.dumps(entry).encode('utf-8'),
+            ContentType='application/json'
+        )
+
+    def delete(self, key: str):
+        get_client('s3').delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def keys(self, prefix: str) -> List[str]:
+        root = f"{self.prefix}/" if self.prefix else ''
+        return [
+            item['Key'][len(root):-len('.json')]
+            for item in paginate(get_client('s3'), 'list_objects_v2', 'Contents',
+                                 Bucket=self.bucket, Prefix=root + prefix)
+            if item['Key'].endswith('.json')
+        ]
+
+class MemoryCacheBackend:
+    """Process-local stand-in for a shared backend"""
+
+    def __init__(self):
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            entry = self.entries.get(key)
+            return json.loads(json.dumps(entry)) if entry is not None else None
+
+    def set(self, key: str, entry: Dict[str, Any]):
+        with self.lock:
+            self.entries[key] = json.loads(json.dumps(entry))
+
+    def delete(self, key: str):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def keys(self, prefix: str) -> List[str]:
+        with self.lock:
+            return [key for key in self.entries if key.startswith(prefix)]
+
+def create_cache_backend(spec: str):
+    """
+    Build the shared cache tier from a spec such as 'file:///mnt/cache' or 's3://bucket/prefix'.
+    An empty spec disables the shared tier.
+    """
+    if not spec:
+        return None
+    parsed = urlparse(spec)
+    if parsed.scheme == 'file':
+        return FileCacheBackend(parsed.path)
+    if parsed.scheme == 's3':
+        return S3CacheBackend(parsed.netloc, parsed.path)
+    raise ValueError(f"Unsupported inventory cache backend: {spec}")
+
+class InventoryCache:
+    """
+    Two-tier TTL cache for inventory sections keyed by app_id and service.
+    The in-process LRU tier serves warm containers; the optional shared backend
+    lets other containers reuse a recent sweep.
+    """
+
+    def __init__(self, max_entries: int, ttls: Dict[str, int], shared=None):
+        self.max_entries = max_entries
+        self.ttls = ttls
+        self.shared = shared
+        self.entries: OrderedDict = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _store_local(self, key: str, entry: Dict[str, Any]):
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def _lookup(self, key: str, now: float) -> Optional[Dict[str, Any]]:
+        """Live entry for key from either tier, without counting the lookup"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry['expires_at'] <= now:
+                del self.entries[key]
+                entry = None
+            if entry is not None:
+                self.entries.move_to_end(key)
+        if entry is not None:
+            return entry
+
+        if self.shared is not None:
+            try:
+                entry = self.shared.get(key)
+            except Exception as e:
+                print(f"Error reading shared inventory cache {key}: {str(e)}")
+                entry = None
+            if entry is not None and entry['expires_at'] > now:
+                self._store_local(key, entry)
+                record_metric('shared_cache_hits')
+                return entry
+        return None
+
+    def get(self, app_id: str, *services: str) -> Optional[Any]:
+        """
+        Value of the first of services cached for app_id. Alternatives such as a full
+        section and its summary count as one lookup: one hit or one miss.
         """
+        now = time.time()
+        for service in services:
+            entry = self._lookup(f"{app_id}/{service}", now)
+            if entry is not None:
+                record_metric('cache_hits')
+                return entry['value']
+        record_metric('cache_misses')
+        return None
+
+    def set(self, app_id: str, service: str, value: Any):
+        key = f"{app_id}/{service}"
+        entry = {
+            'value': value,
+            'expires_at': time.time() + self.ttls.get(service.split(':')[0], DEFAULT_CACHE_TTL)
+        }
+        self._store_local(key, entry)
+        if self.shared is not None:
+            try:
+                self.shared.set(key, entry)
+            except Exception as e:
+                print(f"Error writing shared inventory cache {key}: {str(e)}")
+
+    def invalidate(self, app_id: str, services: Optional[Iterable[str]] = None) -> int:
+        """
+        Drop an app's cached entries from both tiers and return how many were dropped.
+        Covers every scope of the app (multi-target '@account/region' scopes and
+        region-filtered '#buckets=' ones) and summary entries next to full sections.
+        services limits it to those sections, plus the discovery sweep that feeds them.
+        """
+        services = set(services) | {'discovery'} if services is not None else None
+
+        def matches(key):
+            scope, _, service = key.rpartition('/')
+            if scope != app_id and not scope.startswith((f"{app_id}@", f"{app_id}#")):
+                return False
+            return services is None or service.split(':')[0] in services
+
+        with self.lock:
+            keys = {key for key in self.entries if matches(key)}
+            for key in keys:
+                del self.entries[key]
+        if self.shared is not None:
+            try:
+                shared_keys = [key for key in self.shared.keys(app_id) if matches(key)]
+                for key in shared_keys:
+                    self.shared.delete(key)
+                keys.update(shared_keys)
+            except Exception as e:
+                print(f"Error invalidating shared inventory cache for app {app_id}: {str(e)}")
+        return len(keys)
+
+INVENTORY_CACHE = InventoryCache(
+    CACHE_MAX_ENTRIES,
+    parse_cache_ttls(os.environ.get('INVENTORY_CACHE_TTLS', '')),
+    create_cache_backend(os.environ.get('INVENTORY_CACHE_BACKEND', ''))
+)
+
+# Resources and methods of REST APIs keyed by app_id, region, API ID and the deployments of its
+# stages. Routes only go live with a deployment, so an API is walked again once a new one appears.
+API_METHOD_CACHE: OrderedDict = OrderedDict()
+API_METHOD_CACHE_LOCK = threading.Lock()
+
+def invalidate_inventory_cache(app_id: str, services: Optional[Iterable[str]] = None) -> int:
+    """
+    Explicitly invalidate cached inventory for an app, e.g. after a deployment.
+    Returns the number of inventory cache entries dropped.
+    """
+    services = list(services) if services is not None else None
+    dropped = INVENTORY_CACHE.invalidate(app_id, services)
+    if services is None or 'apigateway' in services:
+        with API_METHOD_CACHE_LOCK:
+            for key in [key for key in API_METHOD_CACHE if key[0] == app_id]:
+                del API_METHOD_CACHE[key]
+    return dropped
+
+def cached_api_resources(key: tuple, loader: Callable[[], list], refresh: bool = False) -> list:
+    """
+    Return the cached resources of an API deployment, walking the API with loader on a miss.
+    refresh walks the API regardless and replaces the cached entry.
+    """
+    resources = None
+    if not refresh:
+        with API_METHOD_CACHE_LOCK:
+            resources = API_METHOD_CACHE.get(key)
+            if resources is not None:
+                API_METHOD_CACHE.move_to_end(key)
+    if resources is not None:
+        record_metric('api_method_cache_hits')
+        return resources
+
+    resources = loader()
+    with API_METHOD_CACHE_LOCK:
+        API_METHOD_CACHE[key] = resources
+        while len(API_METHOD_CACHE) > CACHE_MAX_ENTRIES:
+            API_METHOD_CACHE.popitem(last=False)
+    return resources
+
+def arn_resource(arn: str) -> str:
+    """Return the resource part of an ARN, e.g. 'table/orders' or a bucket name"""
+    return arn.split(':', 5)[5]
+
+def discover_resources_by_app(tagging_client, app_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Sweep tag:GetResources once and partition the tagged ARNs into a hash index
+    of app_id -> service -> resource part of the ARN (e.g. 'table/orders') -> full ARN.
+    Without app_ids every app_id value in the account is indexed.
+    """
+    apps: Dict[str, Dict[str, Dict[str, str]]] = {}
+    api_calls = 0
+
+    # TagFilters accept at most 20 values; larger sets are filtered client-side
+    tag_filter = {'Key': 'app_id'}
+    if app_ids and len(app_ids) <= 20:
+        tag_filter['Values'] = list(app_ids)
+    wanted = set(app_ids) if app_ids else None
+
+    paginator = tagging_client.get_paginator('get_resources')
+    for page in paginator.paginate(
+        TagFilters=[tag_filter],
+        ResourceTypeFilters=DISCOVERY_RESOURCE_TYPES
+    ):
+        api_calls += 1
+        for mapping in page.get('ResourceTagMappingList', []):
+            tags = {tag['Key']: tag['Value'] for tag in mapping.get('Tags', [])}
+            app_id = tags.get('app_id')
+            if app_id is None or (wanted is not None and app_id not in wanted):
+                continue
+            arn = mapping['ResourceARN']
+            service = arn.split(':')[2]
+            apps.setdefault(app_id, {}).setdefault(service, {})[arn_resource(arn)] = arn
+
+    return {
+        'apps': apps,
+        'api_calls': api_calls
+    }
+
+def discover_app_resources(tagging_client, app_id: str) -> Dict[str, Any]:
+    """
+    Resolve app_id to resource ARNs grouped by service with paginated tag:GetResources calls
+    """
+    sweep = discover_resources_by_app(tagging_client, [app_id])
+    return {
+        'resources': sweep['apps'].get(app_id, {}),
+        'api_calls': sweep['api_calls']
+    }
+
+def is_app_resource(discovered: Optional[Dict[str, Dict[str, str]]], service: str, key: str,
+                    tag_lookup, stats: Dict[str, int]) -> bool:
+    """
+    Check app membership against the discovery index.
+    Falls back to a per-resource tag lookup when discovery is unavailable.
+    Every collector's tag lookup is a single call, so each index hit avoids one.
+    """
+    if discovered is None:
+        return tag_lookup()
+    with STATS_LOCK:
+        stats['tag_lookups_avoided'] += 1
+    return key in discovered.get(service, {})
+
+def paginate(client, operation: str, result_key: str, **kwargs) -> Iterator[Any]:
+    """
+    Yield resources one at a time across every page of a botocore paginator.
+    Operations without a paginator are called once.
+    """
+    if not client.can_paginate(operation):
+        yield from getattr(client, operation)(**kwargs).get(result_key, [])
+        return
+    for page in client.get_paginator(operation).paginate(**kwargs):
+        yield from page.get(result_key, [])
+
+def chunked(items: list, size: int) -> Iterator[list]:
+    """Split a list into consecutive chunks of at most size items"""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def run_concurrently(func, items: Iterable, max_workers: int) -> Iterator[Any]:
+    """
+    Apply func to items as they arrive with at most max_workers calls in flight.
+    Results are yielded in input order so the generated output stays deterministic,
+    and items are pulled from the iterable only as slots free up.
+    """
+    if max_workers <= 1:
+        for item in items:
+            yield func(item)
+        return
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = deque()
+        for item in items:
+            in_flight.append(executor.submit(func, item))
+            if len(in_flight) >= max_workers:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+def new_shared_describes() -> Dict[str, Any]:
+    """Create the batch-scoped store for listings and describe results shared across apps"""
+    return {'lock': threading.Lock(), 'values': {}}
+
+def shared_value(shared: Dict[str, Any], key: Any, loader):
+    """
+    Return the shared value for key, loading it exactly once even when
+    several apps ask for it concurrently.
+    """
+    with shared['lock']:
+        future = shared['values'].get(key)
+        is_loader = future is None
+        if is_loader:
+            future = Future()
+            shared['values'][key] = future
+    if is_loader:
+        try:
+            future.set_result(loader())
+        except Exception as e:
+            future.set_exception(e)
+    return future.result()
+
+def account_listing(ctx: Dict[str, Any], client, operation: str, result_key: str) -> Iterable:
+    """
+    Enumerate an account-wide listing. In batch mode the listing is fetched once and
+    shared by every app; otherwise it streams straight from the paginator.
+    """
+    shared = ctx.get('shared')
+    if shared is None:
+        return paginate(client, operation, result_key)
+    key = ('listing', client.meta.service_model.service_name, operation)
+    return shared_value(shared, key, lambda: list(paginate(client, operation, result_key)))
+
+# Inventory model: one compact record type per resource kind.
+# Dates are kept as ISO strings so records round-trip through the JSON cache tier unchanged.
+
+@dataclass
+class LambdaFunction:
+    __slots__ = ('function_name', 'runtime', 'handler', 'memory_mb', 'timeout_seconds',
+                 'last_modified', 'code_size_bytes', 'function_url')
+    function_name: str
+    runtime: Optional[str]
+    handler: Optional[str]
+    memory_mb: int
+    timeout_seconds: int
+    last_modified: str
+    code_size_bytes: int
+    function_url: Optional[str]
+
+@dataclass
+class ApiMethod:
+    __slots__ = ('http_method', 'authorization', 'api_key_required')
+    http_method: str
+    authorization: str
+    api_key_required: bool
+
+@dataclass
+class ApiResource:
+    __slots__ = ('path', 'resource_id', 'methods')
+    path: str
+    resource_id: str
+    methods: Optional[List[ApiMethod]]
+
+@dataclass
+class ApiStage:
+    __slots__ = ('stage_name', 'deployment_id', 'created_date')
+    stage_name: str
+    deployment_id: Optional[str]
+    created_date: Optional[str]
+
+@dataclass
+class RestApi:
+    __slots__ = ('api_name', 'api_id', 'created_date', 'endpoint_configuration', 'resources', 'stages')
+    api_name: str
+    api_id: str
+    created_date: str
+    endpoint_configuration: List[str]
+    resources: List[ApiResource]
+    stages: List[ApiStage]
+
+@dataclass
+class Volume:
+    __slots__ = ('volume_id', 'size_gib', 'volume_type', 'iops', 'encrypted')
+    volume_id: str
+    size_gib: int
+    volume_type: str
+    iops: Optional[int]
+    encrypted: bool
+
+@dataclass
+class InboundRule:
+    __slots__ = ('protocol', 'from_port', 'to_port', 'sources')
+    protocol: Optional[str]
+    from_port: Optional[int]
+    to_port: Optional[int]
+    sources: List[str]
+
+@dataclass
+class SecurityGroup:
+    __slots__ = ('group_id', 'group_name', 'inbound_rules')
+    group_id: str
+    group_name: str
+    inbound_rules: List[InboundRule]
+
+@dataclass
+class Ec2Instance:
+    __slots__ = ('instance_id', 'instance_type', 'state', 'launch_time', 'availability_zone', 'vpc_id',
+                 'subnet_id', 'private_ip', 'public_ip', 'platform', 'architecture', 'root_device_type',
+                 'volumes', 'security_groups')
+    instance_id: str
+    instance_type: str
+    state: str
+    launch_time: Optional[str]
+    availability_zone: Optional[str]
+    vpc_id: Optional[str]
+    subnet_id: Optional[str]
+    private_ip: Optional[str]
+    public_ip: Optional[str]
+    platform: Optional[str]
+    architecture: Optional[str]
+    root_device_type: Optional[str]
+    volumes: List[Volume]
+    security_groups: List[SecurityGroup]
+
+@dataclass
+class ProvisionedThroughput:
+    __slots__ = ('read_capacity_units', 'write_capacity_units')
+    read_capacity_units: int
+    write_capacity_units: int
+
+@dataclass
+class PrimaryKey:
+    __slots__ = ('hash_key', 'hash_key_type')
+    hash_key: str
+    hash_key_type: str
+
+@dataclass
+class DynamoDbTable:
+    __slots__ = ('table_name', 'status', 'creation_date', 'size_bytes', 'item_count', 'billing_mode',
+                 'provisioned_throughput', 'primary_key')
+    table_name: str
+    status: str
+    creation_date: str
+    size_bytes: int
+    item_count: int
+    billing_mode: str
+    provisioned_throughput: Optional[ProvisionedThroughput]
+    primary_key: PrimaryKey
+
+@dataclass
+class S3Bucket:
+    __slots__ = ('bucket_name', 'creation_date', 'region', 'versioning', 'encryption')
+    bucket_name: str
+    creation_date: str
+    region: Optional[str]
+    versioning: str
+    encryption: Optional[str]
+
+@dataclass
+class HealthCheck:
+    __slots__ = ('protocol', 'port', 'path', 'interval', 'timeout')
+    protocol: Optional[str]
+    port: Optional[str]
+    path: Optional[str]
+    interval: Optional[int]
+    timeout: Optional[int]
+
+@dataclass
+class TargetGroup:
+    __slots__ = ('name', 'protocol', 'port', 'target_type', 'health_check')
+    name: str
+    protocol: Optional[str]
+    port: Optional[int]
+    target_type: str
+    health_check: HealthCheck
+
+@dataclass
+class Listener:
+    __slots__ = ('protocol', 'port', 'default_action')
+    protocol: Optional[str]
+    port: Optional[int]
+    default_action: Optional[str]
+
+@dataclass
+class LoadBalancer:
+    __slots__ = ('name', 'dns_name', 'scheme', 'vpc_id', 'type', 'state', 'target_groups', 'listeners')
+    name: str
+    dns_name: str
+    scheme: Optional[str]
+    vpc_id: Optional[str]
+    type: str
+    state: Optional[str]
+    target_groups: List[TargetGroup]
+    listeners: List[Listener]
+
+@dataclass
+class Inventory:
+    __slots__ = ('app_id', 'timestamp', 'region', 'sections', 'discovery')
+    app_id: str
+    timestamp: str
+    region: Optional[str]
+    sections: Dict[str, list]
+    discovery: Dict[str, Any]
+
+@dataclass
+class TargetInventory:
+    __slots__ = ('account_id', 'region', 'status', 'error', 'resources', 'discovery')
+    account_id: Optional[str]
+    region: str
+    status: str
+    error: Optional[str]
+    resources: Dict[str, Any]
+    discovery: Dict[str, Any]
+
+@dataclass
+class MultiTargetInventory:
+    __slots__ = ('app_id', 'timestamp', 'targets')
+    app_id: str
+    timestamp: str
+    targets: List[TargetInventory]
+
+def model_to_dict(value: Any) -> Any:
+    """Convert model records (and lists/dicts of them) to plain JSON-compatible values"""
+    if is_dataclass(value):
+        return {f.name: model_to_dict(getattr(value, f.name)) for f in fields(value)}
+    if isinstance(value, list):
+        return [model_to_dict(item) for item in value]
+    if isinstance(value, dict):
+        return {key: model_to_dict(item) for key, item in value.items()}
+    return value
+
+def model_from_dict(model_type: Any, data: Any) -> Any:
+    """Rebuild model records from model_to_dict output using the field annotations"""
+    if data is None:
+        return None
+    if get_origin(model_type) is Union:
+        model_type = next(arg for arg in get_args(model_type) if arg is not type(None))
+    if get_origin(model_type) is list:
+        return [model_from_dict(get_args(model_type)[0], item) for item in data]
+    if is_dataclass(model_type):
+        hints = get_type_hints(model_type)
+        return model_type(**{f.name: model_from_dict(hints[f.name], data.get(f.name)) for f in fields(model_type)})
+    return data
+
+def iso_or_none(value) -> Optional[str]:
+    """Format an optional datetime from a botocore response"""
+    return value.isoformat() if value is not None else None
+
+def collect_lambda_functions(ctx: Dict[str, Any]) -> List[LambdaFunction]:
+    """
+    Collect the Lambda functions section.
+    The list_functions page already carries the configuration, so the only
+    per-function call left is the URL config lookup of app functions. A failed
+    lookup leaves function_url null instead of dropping the function.
+    """
+    lambda_client = ctx['clients']['lambda']
+    app_id = ctx['app_id']
+
+    def describe_function(function):
+        if not is_app_resource(
+            ctx['discovered'], 'lambda', arn_resource(function['FunctionArn']),
+            lambda: lambda_client.list_tags(Resource=function['FunctionArn'])['Tags'].get('app_id') == app_id,
+            ctx['stats']
+        ):
+            return None
+
+        function_url = None
+        if not ctx['summary']:
+            try:
+                url_config = lambda_client.get_function_url_config(
+                    FunctionName=function['FunctionName']
+                )
+                function_url = url_config['FunctionUrl']
+            except lambda_client.exceptions.ResourceNotFoundException:
+                pass
+            except ClientError as e:
+                # The function is still documented from its listing, without the URL
+                print(f"Error reading function URL of {function['FunctionName']}: {str(e)}")
+                record_resource_error('lambda', function['FunctionName'], e)
+
+        return LambdaFunction(
+            function_name=function['FunctionName'],
+            runtime=function.get('Runtime'),
+            handler=function.get('Handler'),
+            memory_mb=function['MemorySize'],
+            timeout_seconds=function['Timeout'],
+            last_modified=function['LastModified'],
+            code_size_bytes=function['CodeSize'],
+            function_url=function_url
+        )
+
+    functions = account_listing(ctx, lambda_client, 'list_functions', 'Functions')
+    return [record for record in run_concurrently(describe_function, functions, ctx['detail_concurrency']) if record is not None]
+
+def collect_api_gateway(ctx: Dict[str, Any]) -> List[RestApi]:
+    """Collect the API Gateway REST APIs section"""
+    apigw = ctx['clients']['apigateway']
+    app_id = ctx['app_id']
+
+    def walk_resources(api_id):
+        # embed=methods returns every method with its resource, so there is no get_method per route
+        resources = []
+        for resource in paginate(apigw, 'get_resources', 'items', restApiId=api_id, embed=['methods']):
+            methods = None
+            if 'resourceMethods' in resource:
+                methods = [
+                    ApiMethod(
+                        http_method=method,
+                        authorization=method_detail.get('authorizationType'),
+                        api_key_required=method_detail.get('apiKeyRequired', False)
+                    )
+                    for method, method_detail in resource['resourceMethods'].items()
+                ]
+            resources.append(ApiResource(path=resource['path'], resource_id=resource['id'], methods=methods))
+        return resources
+
+    def describe_api(api):
+        if ctx['summary']:
+            return RestApi(
+                api_name=api['name'],
+                api_id=api['id'],
+                created_date=api['createdDate'].isoformat(),
+                endpoint_configuration=api['endpointConfiguration']['types'],
+                resources=None,
+                stages=None
+            )
+
+        stages = [
+            ApiStage(
+                stage_name=stage['stageName'],
+                deployment_id=stage.get('deploymentId'),
+                created_date=iso_or_none(stage.get('createdDate'))
+            )
+            for stage in apigw.get_stages(restApiId=api['id'])['item']
+        ]
+
+        # An API without deployments has nothing to key on and is walked every time
+        deployments = tuple(sorted({stage.deployment_id for stage in stages if stage.deployment_id}))
+        if deployments:
+            resources = cached_api_resources(
+                (app_id, apigw.meta.region_name, api['id'], deployments), lambda: walk_resources(api['id']),
+                refresh=ctx['force_refresh']
+            )
+        else:
+            resources = walk_resources(api['id'])
+
+        return RestApi(
+            api_name=api['name'],
+            api_id=api['id'],
+            created_date=api['createdDate'].isoformat(),
+            endpoint_configuration=api['endpointConfiguration']['types'],
+            resources=resources,
+            stages=stages
+        )
+
+    apis = (api for api in account_listing(ctx, apigw, 'get_rest_apis', 'items') if api.get('tags', {}).get('app_id') == app_id)
+    return list(run_concurrently(describe_api, apis, ctx['detail_concurrency']))
+
+def build_ec2_index(ec2, instances: list, max_workers: int,
+                    shared: Optional[Dict[str, Any]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Fetch the volumes and security groups of all instances in bulk.
+    Volumes come from multi-value attachment.instance-id filters and each unique
+    security group is described once, so the call count scales with unique objects.
+    In batch mode the account's security groups are described once for all apps.
+    """
+    instance_ids = [instance['InstanceId'] for instance in instances]
+    group_ids = sorted({sg['GroupId'] for instance in instances for sg in instance['SecurityGroups']})
+
+    def fetch_volumes(chunk):
+        volumes = paginate(
+            ec2, 'describe_volumes', 'Volumes',
+            Filters=[{'Name': 'attachment.instance-id', 'Values': chunk}]
+        )
+        return chunk, list(volumes)
+
+    def fetch_security_groups(chunk):
+        return list(paginate(ec2, 'describe_security_groups', 'SecurityGroups', GroupIds=chunk))
+
+    volumes_by_instance = {instance_id: [] for instance_id in instance_ids}
+    for chunk, volumes in run_concurrently(fetch_volumes, chunked(instance_ids, EC2_BATCH_SIZE), max_workers):
+        chunk_ids = set(chunk)
+        for volume in volumes:
+            for attachment in volume.get('Attachments', []):
+                if attachment['InstanceId'] in chunk_ids:
+                    volumes_by_instance[attachment['InstanceId']].append(Volume(
+                        volume_id=volume['VolumeId'],
+                        size_gib=volume['Size'],
+                        volume_type=volume['VolumeType'],
+                        iops=volume.get('Iops'),
+                        encrypted=volume['Encrypted']
+                    ))
+
+    if shared is not None:
+        group_batches = [shared_value(
+            shared, ('listing', 'ec2', 'describe_security_groups'),
+            lambda: list(paginate(ec2, 'describe_security_groups', 'SecurityGroups'))
+        )]
+    else:
+        group_batches = run_concurrently(fetch_security_groups, chunked(group_ids, EC2_BATCH_SIZE), max_workers)
+
+    security_groups = {}
+    for groups in group_batches:
+        for group in groups:
+            security_groups[group['GroupId']] = SecurityGroup(
+                group_id=group['GroupId'],
+                group_name=group['GroupName'],
+                inbound_rules=[
+                    InboundRule(
+                        protocol=rule.get('IpProtocol'),
+                        from_port=rule.get('FromPort'),
+                        to_port=rule.get('ToPort'),
+                        sources=[ip['CidrIp'] for ip in rule.get('IpRanges', [])]
+                    )
+                    for rule in group['IpPermissions']
+                ]
+            )
+
+    return {
+        'volumes': volumes_by_instance,
+        'security_groups': security_groups
+    }
+
+def collect_ec2_instances(ctx: Dict[str, Any]) -> List[Ec2Instance]:
+    """Collect the EC2 instances section"""
+    ec2 = ctx['clients']['ec2']
+    discovered = ctx['discovered']
+
+    def iter_instances():
+        if discovered is None:
+            reservations = paginate(
+                ec2, 'describe_instances', 'Reservations',
+                Filters=[{'Name': 'tag:app_id', 'Values': [ctx['app_id']]}]
+            )
+        else:
+            instance_ids = [resource.split('/', 1)[1] for resource in sorted(discovered.get('ec2', {}))]
+            # The discovery index can name instances that are gone; unlike InstanceIds,
+            # an instance-id filter skips unknown IDs instead of failing the whole call
+            reservations = (
+                reservation
+                for chunk in chunked(instance_ids, EC2_BATCH_SIZE)
+                for reservation in paginate(ec2, 'describe_instances', 'Reservations',
+                                            Filters=[{'Name': 'instance-id', 'Values': chunk}])
+            )
+        for reservation in reservations:
+            yield from reservation['Instances']
+
+    # Collect every instance first so volumes and security groups can be fetched in bulk
+    instances = list(iter_instances())
+    if not instances:
+        return []
+    ec2_index = None
+    if not ctx['summary']:
+        ec2_index = build_ec2_index(ec2, instances, ctx['detail_concurrency'], ctx.get('shared'))
+
+    return [
+        Ec2Instance(
+            instance_id=instance['InstanceId'],
+            instance_type=instance['InstanceType'],
+            state=instance['State']['Name'],
+            launch_time=iso_or_none(instance.get('LaunchTime')),
+            availability_zone=instance.get('Placement', {}).get('AvailabilityZone'),
+            vpc_id=instance.get('VpcId'),
+            subnet_id=instance.get('SubnetId'),
+            private_ip=instance.get('PrivateIpAddress'),
+            public_ip=instance.get('PublicIpAddress'),
+            platform=instance.get('Platform'),
+            architecture=instance.get('Architecture'),
+            root_device_type=instance.get('RootDeviceType'),
+            volumes=ec2_index['volumes'][instance['InstanceId']] if ec2_index else None,
+            security_groups=[
+                ec2_index['security_groups'][sg['GroupId']] for sg in instance['SecurityGroups']
+            ] if ec2_index else None
+        )
+        for instance in instances
+    ]
+
+def collect_dynamodb_tables(ctx: Dict[str, Any]) -> List[DynamoDbTable]:
+    """Collect the DynamoDB tables section"""
+    dynamodb = ctx['clients']['dynamodb']
+    app_id = ctx['app_id']
+
+    def describe_table(table_name):
+        try:
+            def table_has_app_tag():
+                table_arn = f"arn:aws:dynamodb:{dynamodb.meta.region_name}:{get_account_id(ctx.get('session'))}:table/{table_name}"
+                tags = dynamodb.list_tags_of_resource(ResourceArn=table_arn)['Tags']
+                return any(tag['Key'] == 'app_id' and tag['Value'] == app_id for tag in tags)
+
+            if not is_app_resource(ctx['discovered'], 'dynamodb', f"table/{table_name}", table_has_app_tag, ctx['stats']):
+                return None
+
+            table_info = dynamodb.describe_table(TableName=table_name)['Table']
+            throughput = table_info.get('ProvisionedThroughput')
+            return DynamoDbTable(
+                table_name=table_name,
+                status=table_info['TableStatus'],
+                creation_date=table_info['CreationDateTime'].isoformat(),
+                size_bytes=table_info.get('TableSizeBytes', 0),
+                item_count=table_info.get('ItemCount', 0),
+                billing_mode=table_info.get('BillingModeSummary', {}).get('BillingMode', 'PROVISIONED'),
+                provisioned_throughput=ProvisionedThroughput(
+                    read_capacity_units=throughput['ReadCapacityUnits'],
+                    write_capacity_units=throughput['WriteCapacityUnits']
+                ) if throughput else None,
+                primary_key=PrimaryKey(
+                    hash_key=table_info['KeySchema'][0]['AttributeName'],
+                    hash_key_type=table_info['AttributeDefinitions'][0]['AttributeType']
+                )
+            )
+        except Exception as e:
+            print(f"Error processing DynamoDB table {table_name}: {str(e)}")
+            record_resource_error('dynamodb', table_name, e)
+            return None
+
+    tables = account_listing(ctx, dynamodb, 'list_tables', 'TableNames')
+    return [record for record in run_concurrently(describe_table, tables, ctx['detail_concurrency']) if record is not None]
+
+def collect_s3_buckets(ctx: Dict[str, Any]) -> List[S3Bucket]:
+    """Collect the S3 buckets section"""
+    s3 = ctx['clients']['s3']
+    app_id = ctx['app_id']
+
+    def describe_bucket(bucket):
+        try:
+            def bucket_has_app_tag():
+                tags = s3.get_bucket_tagging(Bucket=bucket['Name'])['TagSet']
+                return any(tag['Key'] == 'app_id' and tag['Value'] == app_id for tag in tags)
+
+            if not is_app_resource(ctx['discovered'], 's3', bucket['Name'], bucket_has_app_tag, ctx['stats']):
+                return None
+
+            bucket_location = s3.get_bucket_location(Bucket=bucket['Name'])
+            region = bucket_location.get('LocationConstraint') or 'us-east-1'
+            # Buckets are listed globally; in multi-region runs each region keeps only its own
+            if ctx.get('bucket_region') and region != ctx['bucket_region']:
+                return None
+
+            versioning = encryption = None
+            if not ctx['summary']:
+                versioning = s3.get_bucket_versioning(Bucket=bucket['Name']).get('Status', 'Disabled')
+                try:
+                    bucket_encryption = s3.get_bucket_encryption(Bucket=bucket['Name'])
+                    encryption = bucket_encryption['ServerSideEncryptionConfiguration']['Rules'][0]['ApplyServerSideEncryptionByDefault']['SSEAlgorithm']
+                except ClientError as e:
+                    if e.response.get('Error', {}).get('Code') != 'ServerSideEncryptionConfigurationNotFoundError':
+                        # The bucket is still documented, with its encryption unknown
+                        print(f"Error reading encryption of S3 bucket {bucket['Name']}: {str(e)}")
+                        record_resource_error('s3', bucket['Name'], e)
+
+            return S3Bucket(
+                bucket_name=bucket['Name'],
+                creation_date=bucket['CreationDate'].isoformat(),
+                region=region,
+                versioning=versioning,
+                encryption=encryption
+            )
+        except Exception as e:
+            print(f"Error processing S3 bucket {bucket['Name']}: {str(e)}")
+            record_resource_error('s3', bucket['Name'], e)
+            return None
+
+    buckets = account_listing(ctx, s3, 'list_buckets', 'Buckets')
+    return [record for record in run_concurrently(describe_bucket, buckets, ctx['detail_concurrency']) if record is not None]
+
+def shared_target_groups(ctx: Dict[str, Any], elbv2) -> Dict[str, list]:
+    """Describe every target group once per batch and index them by load balancer ARN"""
+    def load():
+        by_load_balancer: Dict[str, list] = {}
+        for tg in paginate(elbv2, 'describe_target_groups', 'TargetGroups'):
+            for lb_arn in tg.get('LoadBalancerArns', []):
+                by_load_balancer.setdefault(lb_arn, []).append(tg)
+        return by_load_balancer
+    return shared_value(ctx['shared'], ('index', 'elbv2', 'target_groups'), load)
+
+def collect_load_balancers(ctx: Dict[str, Any]) -> List[LoadBalancer]:
+    """Collect the load balancers section"""
+    elbv2 = ctx['clients']['elbv2']
+    app_id = ctx['app_id']
+
+    def describe_load_balancer(lb):
+        try:
+            def lb_has_app_tag():
+                tags = elbv2.describe_tags(
+                    ResourceArns=[lb['LoadBalancerArn']]
+                )['TagDescriptions'][0]['Tags']
+                return any(tag['Key'] == 'app_id' and tag['Value'] == app_id for tag in tags)
+
+            if not is_app_resource(ctx['discovered'], 'elasticloadbalancing', arn_resource(lb['LoadBalancerArn']), lb_has_app_tag, ctx['stats']):
+                return None
+
+            target_groups = listeners = None
+            if not ctx['summary']:
+                if ctx.get('shared') is not None:
+                    target_groups = shared_target_groups(ctx, elbv2).get(lb['LoadBalancerArn'], [])
+                else:
+                    target_groups = elbv2.describe_target_groups(
+                        LoadBalancerArn=lb['LoadBalancerArn']
+                    )['TargetGroups']
+
+                listeners = elbv2.describe_listeners(
+                    LoadBalancerArn=lb['LoadBalancerArn']
+                )['Listeners']
+
+            return LoadBalancer(
+                name=lb['LoadBalancerName'],
+                dns_name=lb['DNSName'],
+                scheme=lb.get('Scheme'),
+                vpc_id=lb.get('VpcId'),
+                type=lb['Type'],
+                state=lb.get('State', {}).get('Code'),
+                target_groups=[
+                    TargetGroup(
+                        name=tg['TargetGroupName'],
+                        protocol=tg.get('Protocol'),
+                        port=tg.get('Port'),
+                        target_type=tg['TargetType'],
+                        health_check=HealthCheck(
+                            protocol=tg.get('HealthCheckProtocol'),
+                            port=tg.get('HealthCheckPort'),
+                            path=tg.get('HealthCheckPath'),
+                            interval=tg.get('HealthCheckIntervalSeconds'),
+                            timeout=tg.get('HealthCheckTimeoutSeconds')
+                        )
+                    )
+                    for tg in target_groups
+                ] if target_groups is not None else None,
+                listeners=[
+                    Listener(
+                        protocol=listener.get('Protocol'),
+                        port=listener.get('Port'),
+                        default_action=listener['DefaultActions'][0]['Type'] if listener.get('DefaultActions') else None
+                    )
+                    for listener in listeners
+                ] if listeners is not None else None
+            )
+        except Exception as e:
+            print(f"Error processing Load Balancer {lb['LoadBalancerArn']}: {str(e)}")
+            record_resource_error('elasticloadbalancing', lb['LoadBalancerArn'], e)
+            return None
+
+    load_balancers = account_listing(ctx, elbv2, 'describe_load_balancers', 'LoadBalancers')
+    return [record for record in run_concurrently(describe_load_balancer, load_balancers, ctx['detail_concurrency']) if record is not None]
+
+# Inventory sections in output order:
+# (service, label used in error messages, collector, record type, path in the resources tree)
+SECTION_COLLECTORS = [
+    ('lambda', 'Lambda functions', collect_lambda_functions, LambdaFunction, ('serverless', 'lambda_functions')),
+    ('apigateway', 'API Gateway', collect_api_gateway, RestApi, ('serverless', 'api_gateway', 'rest_apis')),
+    ('ec2', 'EC2 instances', collect_ec2_instances, Ec2Instance, ('compute', 'ec2_instances')),
+    ('dynamodb', 'DynamoDB tables', collect_dynamodb_tables, DynamoDbTable, ('database', 'dynamodb_tables')),
+    ('s3', 'S3 buckets', collect_s3_buckets, S3Bucket, ('storage', 's3_buckets')),
+    ('elasticloadbalancing', 'Load Balancers', collect_load_balancers, LoadBalancer, ('networking', 'load_balancers')),
+]
+
+# Field that identifies a resource within its section, used to diff snapshots
+RESOURCE_ID_FIELDS = {
+    'lambda': 'function_name',
+    'apigateway': 'api_id',
+    'ec2': 'instance_id',
+    'dynamodb': 'table_name',
+    's3': 'bucket_name',
+    'elasticloadbalancing': 'name',
+}
+
+# Fields filled by per-resource detail calls, left null by fields=summary collection:
+# Lambda URL configs, API Gateway get_resources/get_method/get_stages, EC2 volume and
+# security group describes, S3 versioning/encryption, ELB target groups and listeners
+SUMMARY_DETAIL_FIELDS = {
+    'lambda': ['function_url'],
+    'apigateway': ['resources', 'stages'],
+    'ec2': ['volumes', 'security_groups'],
+    'dynamodb': [],
+    's3': ['versioning', 'encryption'],
+    'elasticloadbalancing': ['target_groups', 'listeners'],
+}
+
+INVENTORY_FIELDS = ('full', 'summary')
+
+def parse_services(spec: Optional[str]) -> Optional[List[str]]:
+    """
+    Map a services parameter such as 'lambda,s3' to section services; None means every section.
+    Section names from the document (e.g. 'load_balancers') and 'elbv2' are accepted too.
+    """
+    if not spec or spec.strip() == 'all':
+        return None
+    names = {'elbv2': 'elasticloadbalancing', 'api_gateway': 'apigateway'}
+    for service, _, _, _, path in SECTION_COLLECTORS:
+        names[service] = names[path[-1]] = service
+    services = []
+    for name in (item.strip().lower() for item in spec.split(',')):
+        if name and name not in names:
+            raise ValueError(f"Unknown service {name}; expected one of {', '.join(service for service, *_ in SECTION_COLLECTORS)}")
+        if name and names[name] not in services:
+            services.append(names[name])
+    return services or None
+
+def summarize_records(service: str, records: list) -> list:
+    """Null the detail fields of records, as fields=summary collection leaves them"""
+    for record in records:
+        for name in SUMMARY_DETAIL_FIELDS[service]:
+            setattr(record, name, None)
+    return records
+
+def collect_inventory(app_id: str, max_workers: Optional[int] = None,
+                      detail_concurrency: Optional[int] = None,
+                      force_refresh: bool = False,
+                      discovery: Optional[Dict[str, Any]] = None,
+                      shared: Optional[Dict[str, Any]] = None,
+                      region: Optional[str] = None,
+                      session: Optional[boto3.session.Session] = None,
+                      bucket_region: Optional[str] = None,
+                      progress: Optional[Callable[[str, str], None]] = None,
+                      services: Optional[List[str]] = None,
+                      fields: str = 'full') -> Inventory:
+    """
+    Run the discovery stage and the service collectors, returning the typed inventory.
+    Each service section runs as its own collector in a bounded thread pool.
+    services limits the run to those sections; the other collectors never run.
+    fields='summary' skips the per-resource detail calls behind SUMMARY_DETAIL_FIELDS.
+    Sections are served from the inventory cache unless force_refresh is set.
+    Batch callers pass the app's slice of a shared discovery sweep and the shared describes;
+    multi-target callers pass the region and session of the account to inventory.
+    progress, when given, is called with (service, state) as each section starts and finishes.
+    """
+    progress = progress or (lambda service, state: None)
+    max_workers = max_workers or COLLECTOR_WORKERS
+    detail_concurrency = detail_concurrency or DETAIL_CONCURRENCY
+    timestamp = datetime.now().isoformat()
+    region = region or (session or get_session()).region_name
+
+    # Non-default targets get their own cache entries
+    cache_scope = app_id
+    if session is not None or region != get_session().region_name:
+        cache_scope = f"{app_id}@{get_account_id(session)}/{region}"
+    # Multi-region runs keep only the region's own buckets, so their S3 sections never share a key with unfiltered ones
+    if bucket_region:
+        cache_scope = f"{cache_scope}#buckets={bucket_region}"
+
+    summary = fields == 'summary'
+    collectors = [section for section in SECTION_COLLECTORS if services is None or section[0] in services]
+
+    # A summary is served from a cached full section too
+    cached_sections = {}
+    if not force_refresh:
+        for service, _, _, _, _ in collectors:
+            cached = INVENTORY_CACHE.get(cache_scope, service, *([f"{service}:summary"] if summary else []))
+            if cached is not None:
+                cached_sections[service] = cached
+
+    # Resolve app_id to ARNs up front instead of one tag call per resource. Discovery decides
+    # section membership, so any section that has to be collected gets a fresh sweep; the
+    # cached one is only reused when every section is served from the cache.
+    if discovery is None and not force_refresh and len(cached_sections) == len(collectors):
+        discovery = INVENTORY_CACHE.get(cache_scope, 'discovery')
+    if discovery is None:
+        try:
+            discovery = discover_app_resources(get_client('resourcegroupstaggingapi', region, session), app_id)
+            INVENTORY_CACHE.set(cache_scope, 'discovery', discovery)
+        except Exception as e:
+            print(f"Tag discovery unavailable, falling back to per-resource tag lookups: {str(e)}")
+    discovered = discovery['resources'] if discovery is not None else None
+
+    # AWS clients are built when a collector first uses them
+    clients = LazyClients(region, session)
+
+    def run_collector(section):
+        service, label, collector, record_type, _ = section
+        if service in cached_sections:
+            cached = cached_sections[service]
+            progress(service, 'cached')
+            record_section(service, 0.0, len(cached['resources']), cached=True)
+            records = [model_from_dict(record_type, record) for record in cached['resources']]
+            return summarize_records(service, records) if summary else records, cached['stats']
+
+        ctx = {
+            'app_id': app_id,
+            'clients': clients,
+            'discovered': discovered,
+            'detail_concurrency': detail_concurrency,
+            'shared': shared,
+            'session': session,
+            'bucket_region': bucket_region,
+            'summary': summary,
+            'force_refresh': force_refresh,
+            'stats': {'tag_lookups_avoided': 0},
+        }
+        progress(service, 'running')
+        started = time.perf_counter()
+        try:
+            records = collector(ctx)
+        except Exception as e:
+            print(f"Error processing {label}: {str(e)}")
+            record_section(service, (time.perf_counter() - started) * 1000, error=True)
+            progress(service, 'error')
+            return [], ctx['stats']
+        record_section(service, (time.perf_counter() - started) * 1000, len(records))
+        INVENTORY_CACHE.set(cache_scope, f"{service}:summary" if summary else service,
+                            {'resources': model_to_dict(records), 'stats': ctx['stats']})
+        progress(service, 'done')
+        return records, ctx['stats']
+
+    # Sections merge back in SECTION_COLLECTORS order regardless of completion order
+    sections = {}
+    stats = {'tag_lookups_avoided': 0}
+    for (service, _, _, _, _), (records, section_stats) in zip(
+        collectors, run_concurrently(run_collector, collectors, max_workers)
+    ):
+        sections[service] = records
+        stats['tag_lookups_avoided'] += section_stats['tag_lookups_avoided']
+
+    report = discovery_report(discovery, stats)
+    if services is not None or summary:
+        report['projection'] = {'services': services or 'all', 'fields': fields}
+    return Inventory(
+        app_id=app_id,
+        timestamp=timestamp,
+        region=region,
+        sections=sections,
+        discovery=report
+    )
+
+def run_targets(func, targets: list, timeout: float, max_workers: int) -> List[Dict[str, Any]]:
+    """
+    Run func for every target concurrently. Each target gets timeout seconds from the
+    moment it starts; failures and timeouts are reported per target instead of raised.
+    """
+    started: Dict[int, float] = {}
+
+    def run(index):
+        started[index] = time.monotonic()
+        return func(targets[index])
+
+    # Timed-out targets keep their worker until botocore gives up, so don't wait for them
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(targets))))
+    futures = {executor.submit(run, index): index for index in range(len(targets))}
+    outcomes: List[Dict[str, Any]] = [{} for _ in targets]
+    pending = set(futures)
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    outcomes[futures[future]] = {'status': 'ok', 'result': future.result()}
+                except Exception as e:
+                    outcomes[futures[future]] = {'status': 'error', 'error': str(e)}
+            now = time.monotonic()
+            for future in list(pending):
+                index = futures[future]
+                if index in started and now - started[index] > timeout:
+                    outcomes[index] = {'status': 'timeout', 'error': f"timed out after {timeout:g}s"}
+                    pending.discard(future)
+    finally:
+        executor.shutdown(wait=False)
+    return outcomes
+
+def target_label(target: Dict[str, Optional[str]]) -> str:
+    """Short account/region label for a target, used to key per-target progress"""
+    account = target['role_arn'].split(':')[4] if target['role_arn'] else 'default'
+    return f"{account}/{target['region']}"
+
+def collect_multi_target_inventory(app_id: str, targets: List[Dict[str, Optional[str]]],
+                                   force_refresh: bool = False,
+                                   progress: Optional[Callable[[str, str], None]] = None,
+                                   services: Optional[List[str]] = None,
+                                   fields: str = 'full') -> MultiTargetInventory:
+    """
+    Collect the app's inventory from every (account, region) target concurrently and
+    merge the results into one document annotated with account and region.
+    Progress is reported per section as '<account>/<region>:<service>'.
+    """
+    timestamp = datetime.now().isoformat()
+    multi_region = len({target['region'] for target in targets}) > 1
+
+    def collect_target(target):
+        session = get_target_session(target['role_arn']) if target['role_arn'] else None
+        label = target_label(target)
+        inventory = collect_inventory(
+            app_id,
+            force_refresh=force_refresh,
+            region=target['region'],
+            session=session,
+            bucket_region=target['region'] if multi_region else None,
+            progress=(lambda service, state: progress(f"{label}:{service}", state)) if progress else None,
+            services=services,
+            fields=fields
+        )
+        return get_account_id(session), inventory
+
+    results = []
+    for target, outcome in zip(targets, run_targets(collect_target, targets, TARGET_TIMEOUT_SECONDS, TARGET_WORKERS)):
+        if outcome['status'] == 'ok':
+            account_id, inventory = outcome['result']
+            results.append(TargetInventory(
+                account_id=account_id,
+                region=target['region'],
+                status='ok',
+                error=None,
+                resources=resources_tree(inventory),
+                discovery=inventory.discovery
+            ))
+        else:
+            print(f"Error collecting {target['role_arn'] or 'current account'} in {target['region']}: {outcome['error']}")
+            results.append(TargetInventory(
+                account_id=target['role_arn'].split(':')[4] if target['role_arn'] else None,
+                region=target['region'],
+                status=outcome['status'],
+                error=outcome['error'],
+                resources={},
+                discovery={}
+            ))
+
+    return MultiTargetInventory(app_id=app_id, timestamp=timestamp, targets=results)
+
+def discovery_report(discovery: Optional[Dict[str, Any]], stats: Dict[str, int]) -> Dict[str, Any]:
+    """
+    Summarize the discovery stage and the per-resource tag calls it saved
+    """
+    if discovery is None:
+        return {'source': 'per-resource tag lookups'}
+
+    return {
+        'source': 'tag:GetResources',
+        'tagging_api_calls': discovery['api_calls'],
+        'matched_resources': sum(len(resources) for resources in discovery['resources'].values()),
+        'matched_by_service': {
+            service: len(discovery['resources'][service]) for service in sorted(discovery['resources'])
+        },
+        'tag_lookups_avoided': stats['tag_lookups_avoided'],
+        'api_calls_saved': stats['tag_lookups_avoided'] - discovery['api_calls'],
+    }
+
+def resources_tree(inventory: Inventory) -> Dict[str, Any]:
+    """Arrange non-empty sections under their group keys, e.g. serverless.lambda_functions"""
+    tree: Dict[str, Any] = {}
+    for service, _, _, _, path in SECTION_COLLECTORS:
+        records = inventory.sections.get(service)
+        if not records:
+            continue
+        node = tree
+        for key in path[:-1]:
+            node = node.setdefault(key, {})
+        node[path[-1]] = records
+    return tree
+
+# Plain YAML scalars: anything else is written double-quoted (JSON string syntax is valid YAML)
+YAML_PLAIN_SCALAR = re.compile(r'^[A-Za-z_/][\w./@+-]*(?: [\w./@+()-]+)*$')
+YAML_RESERVED_WORDS = {'true', 'false', 'yes', 'no', 'on', 'off', 'null', '~', 'y', 'n'}
+
+def yaml_scalar(value: Any) -> str:
+    """Render a scalar so it round-trips through a YAML parser with its type intact"""
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (int, float)):
+        return str(value)
+    text = str(value)
+    if YAML_PLAIN_SCALAR.match(text) and text.lower() not in YAML_RESERVED_WORDS:
+        return text
+    return json.dumps(text)
+
+def write_yaml_value(out: TextIO, key: str, value: Any, indent: int, first_prefix: Optional[str] = None):
+    """Write one 'key: value' entry, recursing into records, mappings and lists"""
+    prefix = first_prefix if first_prefix is not None else ' ' * indent
+    if is_dataclass(value):
+        value = {f.name: getattr(value, f.name) for f in fields(value)}
+    if isinstance(value, dict):
+        if not value:
+            out.write(f"{prefix}{key}: {{}}\n")
+            return
+        out.write(f"{prefix}{key}:\n")
+        for child_key, child in value.items():
+            write_yaml_value(out, child_key, child, indent + 2)
+    elif isinstance(value, list):
+        if not value:
+            out.write(f"{prefix}{key}: []\n")
+        elif not is_dataclass(value[0]):
+            out.write(f"{prefix}{key}: [{', '.join(yaml_scalar(item) for item in value)}]\n")
+        else:
+            out.write(f"{prefix}{key}:\n")
+            for record in value:
+                write_yaml_record(out, record, indent + 2)
+    else:
+        out.write(f"{prefix}{key}: {yaml_scalar(value)}\n")
+
+def write_yaml_record(out: TextIO, record: Any, indent: int):
+    """Write a record as a YAML list item"""
+    for position, f in enumerate(fields(record)):
+        first_prefix = ' ' * indent + '- ' if position == 0 else None
+        write_yaml_value(out, f.name, getattr(record, f.name), indent + 2, first_prefix)
+
+def inventory_document(inventory: Union[Inventory, MultiTargetInventory]) -> List[tuple]:
+    """Top-level (key, value) blocks of the document, in output order"""
+    if isinstance(inventory, MultiTargetInventory):
+        return [
+            ('metadata', {
+                'app_id': inventory.app_id,
+                'timestamp': inventory.timestamp,
+                'targets': len(inventory.targets),
+                'failed_targets': sum(1 for target in inventory.targets if target.status != 'ok'),
+            }),
+            ('targets', inventory.targets),
+        ]
+    return [
+        ('metadata', {
+            'app_id': inventory.app_id,
+            'timestamp': inventory.timestamp,
+            'region': inventory.region,
+        }),
+        ('resources', resources_tree(inventory)),
+        ('discovery', inventory.discovery),
+    ]
+
+def write_yaml(inventory: Union[Inventory, MultiTargetInventory], out: TextIO):
+    """Stream the inventory to out as YAML"""
+    out.write("# Infrastructure Documentation\n")
+    for position, (key, value) in enumerate(inventory_document(inventory)):
+        if position:
+            out.write("\n")
+        write_yaml_value(out, key, value, 0)
+
+def write_json(inventory: Union[Inventory, MultiTargetInventory], out: TextIO):
+    """Stream the inventory to out as JSON"""
+    document = {key: model_to_dict(value) for key, value in inventory_document(inventory)}
+    for chunk in json.JSONEncoder(indent=2).iterencode(document):
+        out.write(chunk)
+
+def write_html_value(out: TextIO, key: str, value: Any):
+    """Write one labelled value, nesting records, mappings and lists as sections"""
+    if is_dataclass(value):
+        value = {f.name: getattr(value, f.name) for f in fields(value)}
+    if isinstance(value, dict):
+        out.write(f'<div class="section"><h4>{html.escape(key)}</h4>\n')
+        for child_key, child in value.items():
+            write_html_value(out, child_key, child)
+        out.write('</div>\n')
+    elif isinstance(value, list) and value and is_dataclass(value[0]):
+        out.write(f'<div class="section"><h4>{html.escape(key)}</h4>\n')
+        for record in value:
+            out.write('<div class="resource">\n')
+            for f in fields(record):
+                write_html_value(out, f.name, getattr(record, f.name))
+            out.write('</div>\n')
+        out.write('</div>\n')
+    else:
+        if isinstance(value, list):
+            text = ', '.join(str(item) for item in value) or 'None'
+        else:
+            text = 'N/A' if value is None else str(value)
+        out.write(f'<div class="item"><span class="label">{html.escape(key)}:</span>'
+                  f'<span class="value">{html.escape(text)}</span></div>\n')
+
+def write_section_html(out: TextIO, path: tuple, records: list):
+    """Write one inventory section, nested under its path below the group heading"""
+    for key in path[1:-1]:
+        out.write(f'<div class="section"><h4>{html.escape(key)}</h4>\n')
+    write_html_value(out, path[-1], records)
+    out.write('</div>\n' * (len(path) - 2))
+
+def write_resources_html(out: TextIO, sections: Dict[str, list], section_html: Optional[Dict[str, str]] = None):
+    """
+    Write the non-empty sections under their group headings (serverless, compute, ...).
+    section_html maps a service to an already rendered fragment to reuse instead of rendering it.
+    """
+    groups: OrderedDict = OrderedDict()
+    for service, _, _, _, path in SECTION_COLLECTORS:
+        if sections.get(service):
+            groups.setdefault(path[0], []).append((service, path))
+    for group, entries in groups.items():
+        out.write(f'<div class="section"><h4>{html.escape(group)}</h4>\n')
+        for service, path in entries:
+            if section_html is not None and service in section_html:
+                out.write(section_html[service])
+            else:
+                write_section_html(out, path, sections[service])
+        out.write('</div>\n')
+
+def write_html(inventory: Union[Inventory, MultiTargetInventory], out: TextIO,
+               section_html: Optional[Dict[str, str]] = None):
+    """Stream the inventory to out as an HTML fragment"""
+    for key, value in inventory_document(inventory):
+        # Resource groups (serverless, compute, ...) are shown as top-level sections
+        if key == 'resources':
+            write_resources_html(out, inventory.sections, section_html)
+        else:
+            write_html_value(out, key, value)
+
+INVENTORY_WRITERS = {
+    'yaml': write_yaml,
+    'json': write_json,
+    'html': write_html,
+}
+
+def render_inventory(inventory: Union[Inventory, MultiTargetInventory], output_format: str = 'yaml') -> str:
+    """Serialize the inventory in one pass through an in-memory writer"""
+    out = io.StringIO()
+    INVENTORY_WRITERS[output_format](inventory, out)
+    return out.getvalue()
+
+# ---------------------------------------------------------------------------
+# Offline inventory from Terraform code or state
+
+class TfExpression(str):
+    """HCL expression text that can't be evaluated offline (references, function calls, templates)"""
+
+class HclParser:
+    """
+    Reads the subset of HCL used by Terraform configurations: blocks, attributes, strings,
+    heredocs, numbers, bools, lists and objects. References, function calls, operators and
+    interpolated strings are kept as TfExpression text for resolve_expression.
+    """
+
+    IDENTIFIER = re.compile(r'[A-Za-z_][\w-]*')
+    NUMBER = re.compile(r'-?\d+(\.\d+)?([eE][+-]?\d+)?')
+    HEREDOC = re.compile(r'<<(-?)([A-Za-z_]\w*)\n')
+
+    def __init__(self, text: str):
+        self.text = text
+        self.pos = 0
+
+    def parse(self) -> Dict[str, Any]:
+        return self.body(nested=False)
+
+    def error(self, message: str):
+        line = self.text.count('\n', 0, self.pos) + 1
+        return ValueError(f"HCL parse error on line {line}: {message}")
+
+    def skip(self, newlines: bool = True):
+        """Skip whitespace and comments, and newlines unless they end the current expression"""
+        while self.pos < len(self.text):
+            char = self.text[self.pos]
+            if char in ' \t\r' or (newlines and char == '\n'):
+                self.pos += 1
+            elif char == '#' or self.text.startswith('//', self.pos):
+                end = self.text.find('\n', self.pos)
+                self.pos = len(self.text) if end == -1 else end
+            elif self.text.startswith('/*', self.pos):
+                end = self.text.find('*/', self.pos)
+                self.pos = len(self.text) if end == -1 else end + 2
+            else:
+                break
+
+    def peek(self) -> str:
+        return self.text[self.pos] if self.pos < len(self.text) else ''
+
+    def identifier(self) -> str:
+        match = self.IDENTIFIER.match(self.text, self.pos)
+        if not match:
+            raise self.error(f"expected an identifier, got {self.peek()!r}")
+        self.pos = match.end()
+        return match.group()
+
+    def body(self, nested: bool = True) -> Dict[str, Any]:
+        """Attributes and (type, labels, body) blocks up to the closing brace or end of file"""
+        body = {'attributes': {}, 'blocks': []}
+        while True:
+            self.skip()
+            if not self.peek():
+                if nested:
+                    raise self.error("unexpected end of file")
+                return body
+            if self.peek() == '}':
+                self.pos += 1
+                return body
+            name = self.identifier()
+            self.skip(newlines=False)
+            if self.peek() in ('=', ':'):
+                self.pos += 1
+                body['attributes'][name] = self.expression()
+                continue
+            labels = []
+            while self.peek() != '{':
+                if self.peek() in ('', '\n'):
+                    raise self.error(f"expected '=' or a block after {name}")
+                labels.append(self.string() if self.peek() == '"' else self.identifier())
+                self.skip(newlines=False)
+            self.pos += 1
+            body['blocks'].append((name, labels, self.body()))
+
+    def expression(self) -> Any:
+        self.skip(newlines=False)
+        start = self.pos
+        value = self.primary()
+        self.skip(newlines=False)
+        if self.peek() not in ('', '\n', ',', '}', ']', ')'):
+            # Operators and conditionals: keep the whole expression as text
+            self.pos = start
+            return TfExpression(self.raw_expression())
+        return value
+
+    def primary(self) -> Any:
+        char = self.peek()
+        if char == '"':
+            return self.string()
+        if self.HEREDOC.match(self.text, self.pos):
+            return self.heredoc()
+        if char == '[':
+            self.pos += 1
+            items = []
+            while True:
+                self.skip()
+                if self.peek() == ']':
+                    self.pos += 1
+                    return items
+                items.append(self.expression())
+                self.skip()
+                if self.peek() == ',':
+                    self.pos += 1
+        if char == '{':
+            self.pos += 1
+            mapping = {}
+            while True:
+                self.skip()
+                if self.peek() == '}':
+                    self.pos += 1
+                    return mapping
+                key = self.string() if self.peek() == '"' else self.identifier()
+                self.skip(newlines=False)
+                if self.peek() not in ('=', ':'):
+                    raise self.error(f"expected '=' after object key {key}")
+                self.pos += 1
+                mapping[str(key)] = self.expression()
+                self.skip()
+                if self.peek() == ',':
+                    self.pos += 1
+        number = self.NUMBER.match(self.text, self.pos)
+        if number:
+            self.pos = number.end()
+            return float(number.group()) if number.group(1) or number.group(2) else int(number.group())
+        match = self.IDENTIFIER.match(self.text, self.pos)
+        if not match:
+            raise self.error(f"unexpected {char!r}")
+        if match.group() in ('true', 'false', 'null') and not self.text[match.end():match.end() + 1] in ('.', '['):
+            self.pos = match.end()
+            return {'true': True, 'false': False, 'null': None}[match.group()]
+        # References and function calls
+        return TfExpression(self.raw_expression())
+
+    def raw_expression(self) -> str:
+        """Consume text up to the end of the expression, balancing brackets and skipping strings"""
+        start = self.pos
+        depth = 0
+        while self.pos < len(self.text):
+            char = self.text[self.pos]
+            if char == '"':
+                self.string()
+                continue
+            if self.HEREDOC.match(self.text, self.pos):
+                self.heredoc()
+                continue
+            if char in '([{':
+                depth += 1
+            elif char in ')]}':
+                if depth == 0:
+                    break
+                depth -= 1
+            elif depth == 0 and (char in '\n,' or char == '#' or self.text.startswith('//', self.pos)):
+                break
+            self.pos += 1
+        return self.text[start:self.pos].strip()
+
+    def string(self) -> str:
+        """A quoted string; one with ${...} interpolation comes back as a TfExpression template"""
+        self.pos += 1
+        parts = []
+        interpolated = False
+        while True:
+            char = self.peek()
+            if not char or char == '\n':
+                raise self.error("unterminated string")
+            if char == '"':
+                self.pos += 1
+                break
+            if char == '\\':
+                escaped = self.text[self.pos + 1]
+                parts.append({'n': '\n', 't': '\t', 'r': '\r'}.get(escaped, escaped))
+                self.pos += 2
+            elif self.text.startswith('${', self.pos):
+                start = self.pos
+                self.pos += 2
+                self.raw_expression()
+                self.pos += 1
+                parts.append(self.text[start:self.pos])
+                interpolated = True
+            else:
+                parts.append(char)
+                self.pos += 1
+        text = ''.join(parts)
+        return TfExpression(f'"{text}"') if interpolated else text
+
+    def heredoc(self) -> str:
+        match = self.HEREDOC.match(self.text, self.pos)
+        marker = re.compile(rf'^[ \t]*{match.group(2)}[ \t]*$', re.MULTILINE)
+        end = marker.search(self.text, match.end())
+        if not end:
+            raise self.error(f"unterminated heredoc {match.group(2)}")
+        lines = self.text[match.end():end.start()].splitlines(keepends=True)
+        self.pos = end.end()
+        if match.group(1):
+            margin = min((len(line) - len(line.lstrip()) for line in lines if line.strip()), default=0)
+            lines = [line[margin:] for line in lines]
+        return ''.join(lines)
+
+def resolve_expression(value: Any, variables: Dict[str, Any]) -> Any:
+    """Substitute var.* and local.* references; anything else stays a TfExpression"""
+    if isinstance(value, list):
+        return [resolve_expression(item, variables) for item in value]
+    if isinstance(value, dict):
+        return {key: resolve_expression(item, variables) for key, item in value.items()}
+    if not isinstance(value, TfExpression):
+        return value
+    if value.startswith('"'):
+        def substitute(match):
+            resolved = resolve_expression(TfExpression(match.group(1).strip()), variables)
+            return match.group(0) if isinstance(resolved, TfExpression) or resolved is None else str(resolved)
+        text = re.sub(r'\$\{([^}]*)\}', substitute, value[1:-1])
+        return TfExpression(f'"{text}"') if '${' in text else text
+    match = re.fullmatch(r'(var|local)\.([\w-]+)', value)
+    if match and match.group(0) in variables:
+        return resolve_expression(variables[match.group(0)], variables)
+    return value
+
+def known(value: Any) -> Any:
+    """A value Terraform only learns at apply time reads as unknown (None)"""
+    return None if isinstance(value, TfExpression) else value
+
+def block_values(body: Dict[str, Any], variables: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten a parsed block into the shape state files use: nested blocks become lists of dicts"""
+    values = {key: resolve_expression(value, variables) for key, value in body['attributes'].items()}
+    for name, _, child in body['blocks']:
+        values.setdefault(name, []).append(block_values(child, variables))
+    return values
+
+# Provider aliases for the resource types the offline builders read
+IAC_TYPE_ALIASES = {
+    'aws_alb': 'aws_lb',
+    'aws_alb_listener': 'aws_lb_listener',
+    'aws_alb_target_group': 'aws_lb_target_group',
+}
+
+def iac_resource(resource_type: str, address: str, values: Dict[str, Any]) -> Dict[str, Any]:
+    resource_type = IAC_TYPE_ALIASES.get(resource_type, resource_type)
+    return {
+        'type': resource_type,
+        'address': address,
+        'values': values,
+        # Concrete identifiers that other resources may hold instead of a reference
+        'keys': {values.get(key) for key in ('id', 'arn', 'bucket', 'function_name')
+                 if isinstance(values.get(key), str) and not isinstance(values.get(key), TfExpression)},
+    }
+
+def parse_terraform_module(path: str, files: Dict[str, str]) -> Dict[str, Any]:
+    """Resources of one Terraform root module, with variable defaults and locals substituted"""
+    bodies = [HclParser(text).parse() for _, text in sorted(files.items())]
+    variables = {}
+    for body in bodies:
+        for block_type, labels, block in body['blocks']:
+            if block_type == 'variable' and 'default' in block['attributes']:
+                variables[f"var.{labels[0]}"] = block['attributes']['default']
+            elif block_type == 'locals':
+                variables.update({f"local.{name}": value for name, value in block['attributes'].items()})
+
+    region = None
+    resources = []
+    for body in bodies:
+        for block_type, labels, block in body['blocks']:
+            if block_type == 'provider' and labels == ['aws'] and region is None:
+                region = known(resolve_expression(block['attributes'].get('region'), variables))
+            elif block_type == 'resource' and len(labels) == 2:
+                resources.append(iac_resource(labels[0], '.'.join(labels), block_values(block, variables)))
+    return {'path': path, 'source': 'terraform', 'region': region, 'resources': resources}
+
+def parse_terraform_state(path: str, text: str) -> Dict[str, Any]:
+    """Managed resources of a terraform.tfstate file (format version 4)"""
+    state = json.loads(text)
+    region = None
+    resources = []
+    for resource in state.get('resources', []):
+        if resource.get('mode') != 'managed':
+            continue
+        for instance in resource.get('instances', []):
+            values = instance.get('attributes', {})
+            address = f"{resource['type']}.{resource['name']}"
+            if 'index_key' in instance:
+                address += f"[{json.dumps(instance['index_key'])}]"
+            resources.append(iac_resource(resource['type'], address, values))
+            arn = values.get('arn')
+            if region is None and isinstance(arn, str) and arn.count(':') >= 5 and arn.split(':')[3]:
+                region = arn.split(':')[3]
+    return {'path': path, 'source': 'terraform state', 'region': region, 'resources': resources}
+
+def read_infrastructure_code(spec: str) -> Dict[str, Dict[str, str]]:
+    """
+    Terraform files under a local path or s3://bucket/prefix, grouped by directory
+    ({directory: {file name: text}}). Only .tf and .tfstate files are read.
+    """
+    parsed = urlparse(spec)
+    directories: Dict[str, Dict[str, str]] = {}
+    if parsed.scheme == 's3':
+        s3 = get_client('s3')
+        for item in paginate(s3, 'list_objects_v2', 'Contents', Bucket=parsed.netloc, Prefix=parsed.path.lstrip('/')):
+            if item['Key'].endswith(('.tf', '.tfstate')):
+                directory, _, name = item['Key'].rpartition('/')
+                body = s3.get_object(Bucket=parsed.netloc, Key=item['Key'])['Body'].read()
+                directories.setdefault(directory, {})[name] = body.decode('utf-8')
+        return directories
 
-                    try:
-                        url_config = lambda_client.get_function_url_config(
-                            FunctionName=function['FunctionName']
-                        )
-                        lambda_text += f"""
-        function_url: {url_config['FunctionUrl']}"""
-                    except:
-                        pass
-            
-            if has_lambda:
-                response_text += lambda_text
+    root = parsed.path if parsed.scheme == 'file' else spec
+    if os.path.isfile(root):
+        with open(root, encoding='utf-8') as f:
+            return {os.path.dirname(root): {os.path.basename(root): f.read()}}
+    for directory, _, names in os.walk(root):
+        for name in names:
+            if name.endswith(('.tf', '.tfstate')):
+                with open(os.path.join(directory, name), encoding='utf-8') as f:
+                    directories.setdefault(directory, {})[name] = f.read()
+    return directories
 
-        except Exception as e:
-            print(f"Error processing Lambda functions: {str(e)}")
+def infrastructure_code_signature(spec: str) -> Any:
+    """Cheap change check for the parsed index: file sizes and mtimes, or S3 ETags"""
+    parsed = urlparse(spec)
+    if parsed.scheme == 's3':
+        return tuple(
+            (item['Key'], item['ETag'])
+            for item in paginate(get_client('s3'), 'list_objects_v2', 'Contents',
+                                 Bucket=parsed.netloc, Prefix=parsed.path.lstrip('/'))
+        )
+    root = parsed.path if parsed.scheme == 'file' else spec
+    paths = [root] if os.path.isfile(root) else [
+        os.path.join(directory, name) for directory, _, names in os.walk(root) for name in names
+        if name.endswith(('.tf', '.tfstate'))
+    ]
+    return tuple(sorted((path, os.stat(path).st_mtime_ns, os.stat(path).st_size) for path in paths))
 
-        # Get API Gateway APIs
-        try:
-            apis = apigw.get_rest_apis()['items']
-            has_api = False
-            api_text = """
-    api_gateway:
-      rest_apis:"""
-            
-            for api in apis:
-                tags = api.get('tags', {})
-                if tags.get('app_id') == app_id:
-                    has_api = True
-                    resources = apigw.get_resources(restApiId=api['id'])['items']
-                    
-                    api_text += f"""
-      - api_name: {api['name']}
-        api_id: {api['id']}
-        created_date: {api['createdDate'].isoformat()}
-        endpoint_configuration: {api['endpointConfiguration']['types']}
-        resources:"""
-                    
-                    for resource in resources:
-                        api_text += f"""
-          - path: {resource['path']}
-            resource_id: {resource['id']}"""
-                        
-                        if 'resourceMethods' in resource:
-                            api_text += """
-            methods:"""
-                            for method in resource['resourceMethods'].keys():
-                                method_detail = apigw.get_method(
-                                    restApiId=api['id'],
-                                    resourceId=resource['id'],
-                                    httpMethod=method
-                                )
-                                api_text += f"""
-              - http_method: {method}
-                authorization: {method_detail['authorizationType']}
-                api_key_required: {method_detail['apiKeyRequired']}"""
-                    
-                    stages = apigw.get_stages(restApiId=api['id'])['item']
-                    api_text += """
-        stages:"""
-                    for stage in stages:
-                        api_text += f"""
-          - stage_name: {stage['stageName']}
-            deployment_id: {stage.get('deploymentId', 'N/A')}
-            created_date: {stage.get('createdDate', 'N/A')}"""
-            
-            if has_api:
-                response_text += api_text
+# Parsed modules indexed by app_id tag, reused while the source files are unchanged
+IAC_INDEX: Dict[str, Any] = {}
+IAC_INDEX_LOCK = threading.Lock()
 
-        except Exception as e:
-            print(f"Error processing API Gateway: {str(e)}")
+def infrastructure_code_index(spec: Optional[str] = None) -> Dict[str, List[tuple]]:
+    """
+    Map app_id tag values to the (module, resource) pairs that carry them. A directory with
+    a .tfstate file is read from its state, which holds real IDs; otherwise from its .tf files.
+    """
+    spec = spec or INFRASTRUCTURE_CODE_SOURCE
+    if not spec:
+        raise ValueError("No Terraform source configured; set INFRASTRUCTURE_CODE_SOURCE")
+    signature = infrastructure_code_signature(spec)
+    with IAC_INDEX_LOCK:
+        if IAC_INDEX.get('spec') == spec and IAC_INDEX.get('signature') == signature:
+            return IAC_INDEX['index']
 
-        # Get EC2 instances
-        try:
-            instances = ec2.describe_instances(
-                Filters=[{'Name': 'tag:app_id', 'Values': [app_id]}]
+    modules = []
+    for directory, files in sorted(read_infrastructure_code(spec).items()):
+        states = {name: text for name, text in files.items() if name.endswith('.tfstate')}
+        if states:
+            modules.extend(parse_terraform_state(os.path.join(directory, name), text) for name, text in sorted(states.items()))
+        else:
+            modules.append(parse_terraform_module(directory, {name: text for name, text in files.items() if name.endswith('.tf')}))
+
+    index: Dict[str, List[tuple]] = {}
+    for module in modules:
+        for resource in module['resources']:
+            tags = resource['values'].get('tags_all') or resource['values'].get('tags') or {}
+            app_id = known(tags.get('app_id')) if isinstance(tags, dict) else None
+            if app_id is not None:
+                index.setdefault(str(app_id), []).append((module, resource))
+
+    with IAC_INDEX_LOCK:
+        IAC_INDEX.update(spec=spec, signature=signature, index=index)
+    return index
+
+def refers_to(value: Any, resource: Dict[str, Any]) -> bool:
+    """True if an attribute value (or any item of a list value) points at resource"""
+    if isinstance(value, list):
+        return any(refers_to(item, resource) for item in value)
+    if isinstance(value, TfExpression):
+        return value.startswith((resource['address'] + '.', resource['address'] + '['))
+    return isinstance(value, str) and value in resource['keys']
+
+def related(module: Dict[str, Any], resource_type: str, attribute: str, target: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Resources of resource_type whose attribute points at target"""
+    return [resource for resource in module['resources']
+            if resource['type'] == resource_type and refers_to(resource['values'].get(attribute), target)]
+
+def referenced(module: Dict[str, Any], resource_type: str, value: Any) -> List[Dict[str, Any]]:
+    """Resources of resource_type that value points at, in the order value lists them"""
+    items = value if isinstance(value, list) else [value]
+    return [resource for item in items for resource in module['resources']
+            if resource['type'] == resource_type and refers_to(item, resource)]
+
+def first_block(values: Dict[str, Any], name: str) -> Dict[str, Any]:
+    blocks = values.get(name)
+    return blocks[0] if isinstance(blocks, list) and blocks and isinstance(blocks[0], dict) else {}
+
+def iac_lambda_function(resource: Dict[str, Any], module: Dict[str, Any]) -> LambdaFunction:
+    values = resource['values']
+    urls = related(module, 'aws_lambda_function_url', 'function_name', resource)
+    return LambdaFunction(
+        function_name=known(values.get('function_name')),
+        runtime=known(values.get('runtime')),
+        handler=known(values.get('handler')),
+        memory_mb=known(values.get('memory_size', 128)),
+        timeout_seconds=known(values.get('timeout', 3)),
+        last_modified=known(values.get('last_modified')),
+        code_size_bytes=known(values.get('source_code_size')),
+        function_url=known(urls[0]['values'].get('function_url')) if urls else None
+    )
+
+def iac_rest_api(resource: Dict[str, Any], module: Dict[str, Any]) -> RestApi:
+    values = resource['values']
+    api_resources = related(module, 'aws_api_gateway_resource', 'rest_api_id', resource)
+    methods = related(module, 'aws_api_gateway_method', 'rest_api_id', resource)
+
+    def path_of(api_resource, depth=0):
+        if known(api_resource['values'].get('path')):
+            return api_resource['values']['path']
+        parents = referenced(module, 'aws_api_gateway_resource', api_resource['values'].get('parent_id'))
+        parent_path = path_of(parents[0], depth + 1) if parents and depth < 32 else '/'
+        return f"{parent_path.rstrip('/')}/{known(api_resource['values'].get('path_part')) or '{unknown}'}"
+
+    def api_resource_record(path, resource_id, resource_methods):
+        return ApiResource(
+            path=path,
+            resource_id=known(resource_id),
+            methods=[
+                ApiMethod(
+                    http_method=known(method['values'].get('http_method')),
+                    authorization=known(method['values'].get('authorization')),
+                    api_key_required=known(method['values'].get('api_key_required', False))
+                )
+                for method in resource_methods
+            ] or None
+        )
+
+    # Methods that don't point at a declared resource sit on the root resource
+    root_methods = [method for method in methods
+                    if not any(refers_to(method['values'].get('resource_id'), api_resource) for api_resource in api_resources)]
+    records = [api_resource_record('/', values.get('root_resource_id'), root_methods)]
+    records += sorted(
+        (api_resource_record(path_of(api_resource), api_resource['values'].get('id'),
+                             [method for method in methods if refers_to(method['values'].get('resource_id'), api_resource)])
+         for api_resource in api_resources),
+        key=lambda record: record.path
+    )
+
+    return RestApi(
+        api_name=known(values.get('name')),
+        api_id=known(values.get('id')),
+        created_date=known(values.get('created_date')),
+        endpoint_configuration=known(first_block(values, 'endpoint_configuration').get('types')) or ['EDGE'],
+        resources=records,
+        stages=[
+            ApiStage(
+                stage_name=known(stage['values'].get('stage_name')),
+                deployment_id=known(stage['values'].get('deployment_id')),
+                created_date=None
             )
-            has_ec2 = False
-            ec2_text = """
-  compute:
-    ec2_instances:"""
-
-            for reservation in instances['Reservations']:
-                for instance in reservation['Instances']:
-                    has_ec2 = True
-                    volumes = ec2.describe_volumes(
-                        Filters=[{'Name': 'attachment.instance-id', 'Values': [instance['InstanceId']]}]
-                    )['Volumes']
-                    
-                    ec2_text += f"""
-      - instance_id: {instance['InstanceId']}
-        instance_type: {instance['InstanceType']}
-        state: {instance['State']['Name']}
-        launch_time: {instance.get('LaunchTime', 'N/A').isoformat()}
-        availability_zone: {instance.get('Placement', {}).get('AvailabilityZone', 'N/A')}
-        vpc_id: {instance.get('VpcId', 'N/A')}
-        subnet_id: {instance.get('SubnetId', 'N/A')}
-        private_ip: {instance.get('PrivateIpAddress', 'N/A')}
-        public_ip: {instance.get('PublicIpAddress', 'N/A')}
-        platform: {instance.get('Platform', 'N/A')}
-        architecture: {instance.get('Architecture', 'N/A')}
-        root_device_type: {instance.get('RootDeviceType', 'N/A')}
-        volumes:"""
-                    
-                    for volume in volumes:
-                        ec2_text += f"""
-          - volume_id: {volume['VolumeId']}
-            size: {volume['Size']} GiB
-            volume_type: {volume['VolumeType']}
-            iops: {volume.get('Iops', 'N/A')} 
-            encrypted: {volume['Encrypted']}"""
-                    
-                    ec2_text += """
-        security_groups:"""
-                    for sg in instance['SecurityGroups']:
-                        sg_details = ec2.describe_security_groups(GroupIds=[sg['GroupId']])['SecurityGroups'][0]
-                        ec2_text += f"""
-          - group_id: {sg['GroupId']}
-            group_name: {sg['GroupName']}
-            inbound_rules:"""
-                        for rule in sg_details['IpPermissions']:
-                            ec2_text += f"""
-              - protocol: {rule.get('IpProtocol', 'N/A')}
-                from_port: {rule.get('FromPort', 'N/A')}
-                to_port: {rule.get('ToPort', 'N/A')}
-                sources: {[ip['CidrIp'] for ip in rule.get('IpRanges', [])]}"""
-            
-            if has_ec2:
-                response_text += ec2_text
+            for stage in related(module, 'aws_api_gateway_stage', 'rest_api_id', resource)
+        ]
+    )
 
-        except Exception as e:
-            print(f"Error processing EC2 instances: {str(e)}")
+def iac_security_group(resource: Dict[str, Any], module: Dict[str, Any]) -> SecurityGroup:
+    values = resource['values']
+    rules = list(values.get('ingress') or [])
+    rules += [rule['values'] for rule in related(module, 'aws_security_group_rule', 'security_group_id', resource)
+              if rule['values'].get('type') == 'ingress']
+    return SecurityGroup(
+        group_id=known(values.get('id')),
+        group_name=known(values.get('name')),
+        inbound_rules=[
+            InboundRule(
+                protocol=known(rule.get('protocol')),
+                from_port=known(rule.get('from_port')),
+                to_port=known(rule.get('to_port')),
+                sources=[source for source in (known(rule.get('cidr_blocks')) or []) if known(source)]
+            )
+            for rule in rules
+        ]
+    )
 
-        # Get DynamoDB tables
-        try:
-            tables = dynamodb.list_tables()['TableNames']
-            has_tables = False
-            dynamo_text = """
-  database:
-    dynamodb_tables:"""
-            
-            for table_name in tables:
-                try:
-                    table_arn = f"arn:aws:dynamodb:{dynamodb.meta.region_name}:{boto3.client('sts').get_caller_identity()['Account']}:table/{table_name}"
-                    tags = dynamodb.list_tags_of_resource(ResourceArn=table_arn)['Tags']
-                    if any(tag['Key'] == 'app_id' and tag['Value'] == app_id for tag in tags):
-                        has_tables = True
-                        table_info = dynamodb.describe_table(TableName=table_name)['Table']
-                        dynamo_text += f"""
-      - table_name: {table_name}
-        status: {table_info['TableStatus']}
-        creation_date: {table_info['CreationDateTime'].isoformat()}
-        size_bytes: {table_info.get('TableSizeBytes', 0)}
-        item_count: {table_info.get('ItemCount', 0)}
-        billing_mode: {table_info.get('BillingModeSummary', {}).get('BillingMode', 'PROVISIONED')}"""
-                        
-                        if 'ProvisionedThroughput' in table_info:
-                            dynamo_text += f"""
-        provisioned_throughput:
-          read_capacity_units: {table_info['ProvisionedThroughput']['ReadCapacityUnits']}
-          write_capacity_units: {table_info['ProvisionedThroughput']['WriteCapacityUnits']}"""
-                        
-                        dynamo_text += f"""
-        primary_key:
-          hash_key: {table_info['KeySchema'][0]['AttributeName']}
-          hash_key_type: {table_info['AttributeDefinitions'][0]['AttributeType']}"""
-                except Exception as e:
-                    print(f"Error processing DynamoDB table {table_name}: {str(e)}")
-            
-            if has_tables:
-                response_text += dynamo_text
+def iac_ec2_instance(resource: Dict[str, Any], module: Dict[str, Any]) -> Ec2Instance:
+    values = resource['values']
+    groups = referenced(module, 'aws_security_group', values.get('vpc_security_group_ids') or values.get('security_groups') or [])
+    devices = list(values.get('root_block_device') or []) + list(values.get('ebs_block_device') or [])
+    return Ec2Instance(
+        instance_id=known(values.get('id')),
+        instance_type=known(values.get('instance_type')),
+        state=known(values.get('instance_state')),
+        launch_time=None,
+        availability_zone=known(values.get('availability_zone')),
+        vpc_id=next((known(group['values'].get('vpc_id')) for group in groups), None),
+        subnet_id=known(values.get('subnet_id')),
+        private_ip=known(values.get('private_ip')),
+        public_ip=known(values.get('public_ip')),
+        platform=None,
+        architecture=None,
+        root_device_type=None,
+        volumes=[
+            Volume(
+                volume_id=known(device.get('volume_id')),
+                size_gib=known(device.get('volume_size')),
+                volume_type=known(device.get('volume_type')),
+                iops=known(device.get('iops')),
+                encrypted=known(device.get('encrypted', False))
+            )
+            for device in devices
+        ],
+        security_groups=[iac_security_group(group, module) for group in groups]
+    )
 
-        except Exception as e:
-            print(f"Error processing DynamoDB tables: {str(e)}")
+def iac_dynamodb_table(resource: Dict[str, Any], module: Dict[str, Any]) -> DynamoDbTable:
+    values = resource['values']
+    billing_mode = known(values.get('billing_mode')) or 'PROVISIONED'
+    attribute_types = {attribute.get('name'): attribute.get('type') for attribute in values.get('attribute') or []}
+    return DynamoDbTable(
+        table_name=known(values.get('name')),
+        status=None,
+        creation_date=None,
+        size_bytes=None,
+        item_count=None,
+        billing_mode=billing_mode,
+        provisioned_throughput=ProvisionedThroughput(
+            read_capacity_units=known(values.get('read_capacity')),
+            write_capacity_units=known(values.get('write_capacity'))
+        ) if billing_mode == 'PROVISIONED' else None,
+        primary_key=PrimaryKey(
+            hash_key=known(values.get('hash_key')),
+            hash_key_type=known(attribute_types.get(values.get('hash_key')))
+        )
+    )
 
-        # Get S3 buckets
-        try:
-            buckets = s3.list_buckets()['Buckets']
-            has_s3 = False
-            s3_text = """
-  storage:
-    s3_buckets:"""
-            
-            for bucket in buckets:
-                try:
-                    tags = s3.get_bucket_tagging(Bucket=bucket['Name'])['TagSet']
-                    if any(tag['Key'] == 'app_id' and tag['Value'] == app_id for tag in tags):
-                        has_s3 = True
-                        bucket_location = s3.get_bucket_location(Bucket=bucket['Name'])
-                        versioning = s3.get_bucket_versioning(Bucket=bucket['Name'])
-                        
-                        s3_text += f"""
-      - bucket_name: {bucket['Name']}
-        creation_date: {bucket['CreationDate'].isoformat()}
-        region: {bucket_location.get('LocationConstraint', 'us-east-1')}
-        versioning: {versioning.get('Status', 'Disabled')}"""
-                        
-                        try:
-                            bucket_encryption = s3.get_bucket_encryption(Bucket=bucket['Name'])
-                            s3_text += f"""
-        encryption:
-          type: {bucket_encryption['ServerSideEncryptionConfiguration']['Rules'][0]['ApplyServerSideEncryptionByDefault']['SSEAlgorithm']}"""
-                        except:
-                            s3_text += """
-        encryption: Not configured"""
-                except Exception as e:
-                    print(f"Error processing S3 bucket {bucket['Name']}: {str(e)}")
-            
-            if has_s3:
-                response_text += s3_text
+def iac_s3_bucket(resource: Dict[str, Any], module: Dict[str, Any]) -> S3Bucket:
+    values = resource['values']
+    versioning = 'Enabled' if first_block(values, 'versioning').get('enabled') is True else None
+    for config in related(module, 'aws_s3_bucket_versioning', 'bucket', resource):
+        versioning = known(first_block(config['values'], 'versioning_configuration').get('status'))
+    rules = first_block(values, 'server_side_encryption_configuration').get('rule') or []
+    for config in related(module, 'aws_s3_bucket_server_side_encryption_configuration', 'bucket', resource):
+        rules = config['values'].get('rule') or []
+    encryption = None
+    if rules:
+        encryption = known(first_block(rules[0], 'apply_server_side_encryption_by_default').get('sse_algorithm'))
+    return S3Bucket(
+        bucket_name=known(values.get('bucket')),
+        creation_date=None,
+        region=known(values.get('region')) or module['region'],
+        versioning=versioning or 'Disabled',
+        encryption=encryption
+    )
 
-        except Exception as e:
-            print(f"Error processing S3 buckets: {str(e)}")
+def iac_load_balancer(resource: Dict[str, Any], module: Dict[str, Any]) -> LoadBalancer:
+    values = resource['values']
+    listeners = related(module, 'aws_lb_listener', 'load_balancer_arn', resource)
+    target_groups = []
+    for listener in listeners:
+        for target_group in referenced(module, 'aws_lb_target_group', first_block(listener['values'], 'default_action').get('target_group_arn')):
+            if target_group not in target_groups:
+                target_groups.append(target_group)
 
-        # Get Load Balancers
-        try:
-            load_balancers = elbv2.describe_load_balancers()['LoadBalancers']
-            has_lb = False
-            lb_text = """
-  networking:
-    load_balancers:"""
-            
-            for lb in load_balancers:
-                try:
-                    tags = elbv2.describe_tags(
-                        ResourceArns=[lb['LoadBalancerArn']]
-                    )['TagDescriptions'][0]['Tags']
-                    
-                    if any(tag['Key'] == 'app_id' and tag['Value'] == app_id for tag in tags):
-                        has_lb = True
-                        target_groups = elbv2.describe_target_groups(
-                            LoadBalancerArn=lb['LoadBalancerArn']
-                        )['TargetGroups']
-                        
-                        listeners = elbv2.describe_listeners(
-                            LoadBalancerArn=lb['LoadBalancerArn']
-                        )['Listeners']
-                        
-                        lb_text += f"""
-      - name: {lb['LoadBalancerName']}
-        dns_name: {lb['DNSName']}
-        scheme: {lb['Scheme']}
-        vpc_id: {lb['VpcId']}
-        type: {lb['Type']}
-        state: {lb['State']['Code']}
-        target_groups:"""
-                        for tg in target_groups:
-                            lb_text += f"""
-          - name: {tg['TargetGroupName']}
-            protocol: {tg['Protocol']}
-            port: {tg['Port']}
-            target_type: {tg['TargetType']}
-            health_check:
-              protocol: {tg['HealthCheckProtocol']}
-              port: {tg['HealthCheckPort']}
-              path: {tg['HealthCheckPath']}
-              interval: {tg['HealthCheckIntervalSeconds']}
-              timeout: {tg['HealthCheckTimeoutSeconds']}"""
-                        
-                        lb_text += """
-        listeners:"""
-                        for listener in listeners:
-                            lb_text += f"""
-          - protocol: {listener['Protocol']}
-            port: {listener['Port']}
-            default_action: {listener['DefaultActions'][0]['Type']}"""
-                except Exception as e:
-                    print(f"Error processing Load Balancer {lb['LoadBalancerArn']}: {str(e)}")
-            
-            if has_lb:
-                response_text += lb_text
+    def target_group_record(target_group):
+        tg_values = target_group['values']
+        health_check = first_block(tg_values, 'health_check')
+        return TargetGroup(
+            name=known(tg_values.get('name')),
+            protocol=known(tg_values.get('protocol')),
+            port=known(tg_values.get('port')),
+            target_type=known(tg_values.get('target_type')) or 'instance',
+            health_check=HealthCheck(
+                protocol=known(health_check.get('protocol')),
+                port=known(health_check.get('port')),
+                path=known(health_check.get('path')),
+                interval=known(health_check.get('interval')),
+                timeout=known(health_check.get('timeout'))
+            )
+        )
 
-        except Exception as e:
-            print(f"Error processing Load Balancers: {str(e)}")
+    return LoadBalancer(
+        name=known(values.get('name')),
+        dns_name=known(values.get('dns_name')),
+        scheme='internal' if values.get('internal') is True else 'internet-facing',
+        vpc_id=known(values.get('vpc_id')),
+        type=known(values.get('load_balancer_type')) or 'application',
+        state=None,
+        target_groups=[target_group_record(target_group) for target_group in target_groups],
+        listeners=[
+            Listener(
+                protocol=known(listener['values'].get('protocol')),
+                port=known(listener['values'].get('port')),
+                default_action=known(first_block(listener['values'], 'default_action').get('type'))
+            )
+            for listener in listeners
+        ]
+    )
+
+# Resource type and record builder behind each SECTION_COLLECTORS service
+IAC_SECTION_BUILDERS = {
+    'lambda': ('aws_lambda_function', iac_lambda_function),
+    'apigateway': ('aws_api_gateway_rest_api', iac_rest_api),
+    'ec2': ('aws_instance', iac_ec2_instance),
+    'dynamodb': ('aws_dynamodb_table', iac_dynamodb_table),
+    's3': ('aws_s3_bucket', iac_s3_bucket),
+    'elasticloadbalancing': ('aws_lb', iac_load_balancer),
+}
+
+def terraform_inventory(app_id: str, spec: Optional[str] = None) -> Inventory:
+    """
+    Build the app's inventory from Terraform code or state without calling AWS.
+    Resources are matched on their app_id tag; values Terraform only knows after
+    apply (IDs, DNS names, dates) are null when read from .tf files.
+    """
+    matches = infrastructure_code_index(spec).get(str(app_id), [])
+    sections = {}
+    for service, _, _, _, _ in SECTION_COLLECTORS:
+        resource_type, builder = IAC_SECTION_BUILDERS[service]
+        sections[service] = [builder(resource, module) for module, resource in matches if resource['type'] == resource_type]
+
+    modules = list({module['path']: module for module, _ in matches}.values())
+    return Inventory(
+        app_id=app_id,
+        timestamp=datetime.now().isoformat(),
+        region=next((module['region'] for module in modules if module['region']), get_session().region_name),
+        sections=sections,
+        discovery={
+            'source': modules[0]['source'] if modules else 'terraform',
+            'modules': [module['path'] for module in modules],
+            'matched_resources': len(matches),
+            'matched_by_service': {service: len(records) for service, records in sections.items() if records},
+        }
+    )
+
+# Field that pairs a declared resource with its live counterpart when reconciling
+RECONCILE_KEYS = {
+    'lambda': 'function_name',
+    'apigateway': 'api_name',
+    'ec2': 'instance_id',
+    'dynamodb': 'table_name',
+    's3': 'bucket_name',
+    'elasticloadbalancing': 'name',
+}
+
+def declared_drift(declared: Any, live: Any, path: str = '') -> List[str]:
+    """
+    Differences between a declared value and the live one. Unknown (null) declared values
+    and empty declared lists are not checked; list items match regardless of order.
+    """
+    if declared is None or declared == []:
+        return []
+    if isinstance(declared, dict):
+        if not isinstance(live, dict):
+            return [f"{path}: declared {json.dumps(declared, default=str)}, live {json.dumps(live, default=str)}"]
+        drift = []
+        for key, value in declared.items():
+            drift.extend(declared_drift(value, live.get(key), f"{path}.{key}" if path else key))
+        return drift
+    if isinstance(declared, list):
+        if not isinstance(live, list):
+            return [f"{path}: declared {len(declared)} items, live {json.dumps(live, default=str)}"]
+        if not any(isinstance(item, (dict, list)) for item in declared):
+            if sorted(map(str, declared)) != sorted(map(str, live)):
+                return [f"{path}: declared {json.dumps(declared, default=str)}, live {json.dumps(live, default=str)}"]
+            return []
+        drift = [f"{path}[{position}]: no live match for {json.dumps(item, default=str)}"
+                 for position, item in enumerate(declared)
+                 if not any(not declared_drift(item, candidate) for candidate in live)]
+        if len(declared) != len(live):
+            drift.append(f"{path}: {len(declared)} declared, {len(live)} live")
+        return drift
+    if str(declared) != str(live):
+        return [f"{path}: declared {declared}, live {live}"]
+    return []
+
+def reconcile_inventory(app_id: str, force_refresh: bool = False, spec: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Compare the app's Terraform definition with what is deployed. The declared inventory is
+    built offline; live details are collected (through the inventory cache) only for this
+    check, in the region the code deploys to. Reports per section the declared resources
+    that are missing, live resources that are not declared, and field-level drift.
+    """
+    declared = terraform_inventory(app_id, spec)
+    live = collect_inventory(app_id, force_refresh=force_refresh, region=declared.region)
+
+    sections = {}
+    for service, _, _, _, _ in SECTION_COLLECTORS:
+        key = RECONCILE_KEYS[service]
+        declared_records = [model_to_dict(record) for record in declared.sections.get(service, [])]
+        unmatched_live = [model_to_dict(record) for record in live.sections.get(service, [])]
+        pairs, missing = [], []
+        # Records with a known key pair by it; the rest (e.g. instances read from .tf) pair in order
+        for record in sorted(declared_records, key=lambda record: record.get(key) is None):
+            candidates = [item for item in unmatched_live if record.get(key) is None or item.get(key) == record.get(key)]
+            if candidates:
+                unmatched_live.remove(candidates[0])
+                pairs.append((record, candidates[0]))
+            else:
+                missing.append(record.get(key) or 'undeployed resource')
+
+        drifted = {}
+        for record, live_record in pairs:
+            drift = declared_drift(record, live_record)
+            if drift:
+                drifted[live_record.get(key)] = drift
+        if declared_records or unmatched_live:
+            sections[service] = {
+                'declared': len(declared_records),
+                'in_sync': len(pairs) - len(drifted),
+                'missing': missing,
+                'unmanaged': [item.get(key) for item in unmatched_live],
+                'drifted': drifted,
+            }
+
+    return {
+        'app_id': app_id,
+        'region': declared.region,
+        'in_sync': all(not (section['missing'] or section['unmanaged'] or section['drifted']) for section in sections.values()),
+        'sections': sections,
+    }
+
+def render_reconcile_report(report: Dict[str, Any]) -> str:
+    out = io.StringIO()
+    out.write("# Drift between the Terraform definition and deployed resources\n")
+    for key in ('app_id', 'region', 'in_sync', 'sections'):
+        write_yaml_value(out, key, report[key], 0)
+    return out.getvalue()
 
-        return response_text
+def collect_app_inventory(app_id: str, max_workers: Optional[int] = None,
+                          detail_concurrency: Optional[int] = None,
+                          force_refresh: bool = False,
+                          regions: Optional[List[str]] = None,
+                          progress: Optional[Callable[[str, str], None]] = None,
+                          source: str = 'aws',
+                          services: Optional[List[str]] = None,
+                          fields: str = 'full') -> Union[Inventory, MultiTargetInventory]:
+    """
+    Collect the app from the configured targets: a plain inventory for a single
+    account and region, a merged multi-target inventory otherwise.
+    source='terraform' reads it offline from INFRASTRUCTURE_CODE_SOURCE instead.
+    services and fields project the inventory as in collect_inventory.
+    """
+    if fields not in INVENTORY_FIELDS:
+        raise ValueError(f"Unsupported fields: {fields}; expected one of {', '.join(INVENTORY_FIELDS)}")
+    if source == 'terraform':
+        inventory = terraform_inventory(app_id)
+        inventory.sections = {
+            service: summarize_records(service, records) if fields == 'summary' else records
+            for service, records in inventory.sections.items() if services is None or service in services
+        }
+        return inventory
+    if source != 'aws':
+        raise ValueError(f"Unsupported inventory source: {source}")
+    targets = inventory_targets(regions)
+    if len(targets) == 1:
+        return collect_inventory(app_id, max_workers, detail_concurrency, force_refresh,
+                                 region=targets[0]['region'], progress=progress, services=services, fields=fields)
+    return collect_multi_target_inventory(app_id, targets, force_refresh, progress=progress,
+                                          services=services, fields=fields)
+
+def get_infrastructure_details(app_id, max_workers: Optional[int] = None,
+                               detail_concurrency: Optional[int] = None,
+                               force_refresh: bool = False,
+                               output_format: str = 'yaml',
+                               regions: Optional[List[str]] = None,
+                               source: str = 'aws',
+                               services: Optional[List[str]] = None,
+                               fields: str = 'full'):
+    """
+    Fetch detailed infrastructure information and return it as YAML (or JSON/HTML)
+    """
+    try:
+        inventory = collect_app_inventory(app_id, max_workers, detail_concurrency, force_refresh, regions,
+                                          source=source, services=services, fields=fields)
+        return render_inventory(inventory, output_format)
 
     except Exception as e:
         return f"Error analyzing infrastructure: {str(e)}"
 
-def format_infrastructure_details(raw_details: str) -> str:
+# Request parameters a page_token carries when they differ from these defaults
+PAGE_REQUEST_DEFAULTS = {'source': 'aws', 'regions': None, 'services': None, 'fields': 'full'}
+
+def encode_page_token(digest: str, section: str, offset: int, projection: Optional[Dict[str, Any]] = None) -> str:
+    """Tokens carry the source, regions and services/fields projection so later pages read the same inventory"""
+    payload = {'d': digest[:12], 's': section, 'o': offset}
+    if projection:
+        payload['p'] = projection
+    encoded = json.dumps(payload, separators=(',', ':'))
+    return base64.urlsafe_b64encode(encoded.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_page_token(token: str) -> Dict[str, Any]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        return {'digest': payload['d'], 'section': payload['s'], 'offset': int(payload['o']),
+                'projection': payload.get('p')}
+    except Exception:
+        raise ValueError(f"Invalid page_token: {token}")
+
+def write_summary_page(inventory: Union[Inventory, MultiTargetInventory], sections: Dict[str, list],
+                       digest: str, out: TextIO, projection: Optional[Dict[str, Any]] = None):
+    """Write the first page: metadata, resource counts per section with a token to page each one"""
+    out.write("# Infrastructure Summary\n")
+    out.write("# The inventory is too large for one response. Pass a section's page_token to read it.\n")
+    for key, value in inventory_document(inventory):
+        if key in ('metadata', 'discovery'):
+            write_yaml_value(out, key, value, 0)
+    if isinstance(inventory, MultiTargetInventory):
+        write_yaml_value(out, 'target_status', {
+            f"{target.account_id or 'default'}/{target.region}": target.error or target.status
+            for target in inventory.targets
+        }, 0)
+    write_yaml_value(out, 'sections', {
+        section: {'resources': len(records), 'page_token': encode_page_token(digest, section, 0, projection)}
+        for section, records in sections.items() if records
+    }, 0)
+
+def write_section_page(sections: Dict[str, list], digest: str, section: str, offset: int,
+                       max_chars: int, out: TextIO, projection: Optional[Dict[str, Any]] = None):
     """
-    Format the raw infrastructure details into readable HTML
+    Write records of a section from offset, stopping at the last whole record that keeps the
+    page within max_chars (a page always holds at least one record), followed by the token for
+    the next page. The headers and the longest possible token are reserved from the budget.
     """
-    # Split the details into sections
-    lines = raw_details.split()
-    formatted_html = ""
-    
-    # Track current section
-    current_section = ""
-    
-    for line in lines:
-        if line.endswith(':'):
-            # New section
-            if current_section:
-                formatted_html += "</div>\n"
-            current_section = line[:-1]
-            formatted_html += f'<div class="section"><h4>{current_section}</h4>\n'
-            continue
-            
-        # Add the line content
-        if ':' in line:
-            key, value = line.split(':', 1)
-            formatted_html += f'<div class="item"><span class="label">{key}:</span><span class="value">{value}</span></div>\n'
-        else:
-            formatted_html += f'<div class="item">{line}</div>\n'
-    
-    if current_section:
-        formatted_html += "</div>\n"
-        
-    return formatted_html
+    names = [name for name, records in sections.items() if records]
+    records = sections[section]
+    later = names[names.index(section) + 1:]
+    count_width = len(str(len(records)))
+    longest_token = max(
+        [len(encode_page_token(digest, section, len(records), projection))]
+        + [len(encode_page_token(digest, name, 0, projection)) for name in later[:1]]
+    )
+    overhead = (len(f"# Infrastructure Details: {section}\n")
+                + len(f"# Resources {'9' * count_width}-{'9' * count_width} of {len(records)}\n")
+                + len(f"{section}:\n")
+                + len(f"\nnext_page_token: {'x' * longest_token}\n"))
+    budget = max_chars - overhead
+
+    out.write(f"# Infrastructure Details: {section}\n")
+    body = io.StringIO()
+    end = offset
+    while end < len(records):
+        record_out = io.StringIO()
+        write_yaml_record(record_out, records[end], 2)
+        if end > offset and body.tell() + len(record_out.getvalue()) > budget:
+            break
+        body.write(record_out.getvalue())
+        end += 1
+    out.write(f"# Resources {offset + 1}-{end} of {len(records)}\n")
+    out.write(f"{section}:\n")
+    out.write(body.getvalue())
 
-def generate_and_publish_documentation(app_id: str) -> Dict[str, Any]:
+    if end < len(records):
+        next_token = encode_page_token(digest, section, end, projection)
+    else:
+        next_token = encode_page_token(digest, later[0], 0, projection) if later else None
+    out.write(f"\nnext_page_token: {next_token or 'null'}\n")
+
+def get_infrastructure_page(app_id, page_token: Optional[str] = None,
+                            force_refresh: bool = False,
+                            regions: Optional[List[str]] = None,
+                            max_chars: int = PAGE_MAX_CHARS,
+                            source: str = 'aws',
+                            services: Optional[List[str]] = None,
+                            fields: str = 'full'):
     """
-    Generate and publish infrastructure documentation with clean styling
+    Fetch infrastructure details for the agent in bounded pages. Without a page_token the
+    whole YAML document is returned when it fits in max_chars, otherwise a summary page
+    with resource counts per section. A page_token returns the next page of one section,
+    cut at resource boundaries. Later pages read the cached inventory so they stay consistent,
+    and use the source, regions and services/fields projection of the request that issued the token.
     """
     try:
-        # Get infrastructure details
-        infra_details = get_infrastructure_details(app_id)
-        
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Infrastructure Documentation - App {app_id}</title>
-            <style>
-                body {{
-                    font-family: Arial, sans-serif;
-                    margin: 40px;
-                    line-height: 1.6;
-                    color: #333;
-                }}
-                h1, h2, h3, h4 {{
-                    color: #2c3e50;
-                    margin-bottom: 10px;
-                }}
-                .label {{
-                    font-weight: bold;
-                    color: #2c3e50;
-                    display: inline-block;
-                    min-width: 150px;
-                }}
-                .value {{
-                    display: inline-block;
-                }}
-                .item {{
-                    margin: 5px 0;
-                }}
-                pre {{
-                    white-space: pre-wrap;
-                    word-wrap: break-word;
-                    font-family: monospace;
-                    font-weight: bold;
-                    padding: 20px;
-                    border: 2px solid #3498db;
-                    border-radius: 5px;
-                    margin: 20px 0;
-                }}
-            </style>
-        </head>
-        <body>
-            <h1>Infrastructure Documentation</h1>
-            <p>Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}</p>
-            <h2>Application ID: {app_id}</h2>
-            <pre>{infra_details}</pre>
-        </body>
-        </html>
-        """
+        position = decode_page_token(page_token) if page_token else None
+        if position:
+            request = dict(PAGE_REQUEST_DEFAULTS, **(position['projection'] or {}))
+            source, regions, services, fields = request['source'], request['regions'], request['services'], request['fields']
+        request = {'source': source, 'regions': regions, 'services': services, 'fields': fields}
+        projection = {key: value for key, value in request.items() if value != PAGE_REQUEST_DEFAULTS[key]} or None
 
-        # Upload to S3
-        bucket_name = 'adc-knowledge-base-bucket'  # Replace with your bucket name
-        file_name = f'infrastructure-doc-{app_id}-{datetime.now().strftime("%Y%m%d-%H%M%S")}.html'
-        
-        s3 = boto3.client('s3')
-        s3.put_object(
-            Bucket=bucket_name,
-            Key=f'documentation/{file_name}',
-            Body=html_content.encode('utf-8'),
-            ContentType='text/html'
+        inventory = collect_app_inventory(app_id, force_refresh=force_refresh and not page_token, regions=regions,
+                                          source=source, services=services, fields=fields)
+        digest = inventory_digest(inventory)
+        sections = inventory_sections(inventory)
+
+        out = io.StringIO()
+        if position is None:
+            document = render_inventory(inventory, 'yaml')
+            if len(document) <= max_chars:
+                return document
+            write_summary_page(inventory, sections, digest, out, projection)
+            return out.getvalue()
+
+        if position['digest'] != digest[:12]:
+            return "Error analyzing infrastructure: the inventory changed since this page_token was issued; request the summary again"
+        if not sections.get(position['section']) or position['offset'] >= len(sections[position['section']]):
+            return "Error analyzing infrastructure: page_token does not match any resources"
+        write_section_page(sections, digest, position['section'], position['offset'], max_chars, out, projection)
+        return out.getvalue()
+
+    except Exception as e:
+        return f"Error analyzing infrastructure: {str(e)}"
+
+def write_documentation_page(inventory: Union[Inventory, MultiTargetInventory], out: TextIO,
+                             section_html: Optional[Dict[str, str]] = None):
+    """
+    Stream the full documentation page for an inventory into out
+    """
+    app_id = inventory.app_id
+    out.write(f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <title>Infrastructure Documentation - App {html.escape(app_id)}</title>
+        <style>
+            body {{
+                font-family: Arial, sans-serif;
+                margin: 40px;
+                line-height: 1.6;
+                color: #333;
+            }}
+            h1, h2, h3, h4 {{
+                color: #2c3e50;
+                margin-bottom: 10px;
+            }}
+            .label {{
+                font-weight: bold;
+                color: #2c3e50;
+                display: inline-block;
+                min-width: 150px;
+            }}
+            .value {{
+                display: inline-block;
+            }}
+            .item {{
+                margin: 5px 0;
+            }}
+            .section {{
+                margin-left: 20px;
+            }}
+            .resource {{
+                padding: 10px 20px;
+                border: 2px solid #3498db;
+                border-radius: 5px;
+                margin: 10px 0;
+            }}
+        </style>
+    </head>
+    <body>
+        <h1>Infrastructure Documentation</h1>
+        <p>Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}</p>
+        <h2>Application ID: {html.escape(app_id)}</h2>
+""")
+    write_html(inventory, out, section_html)
+    out.write("""
+    </body>
+    </html>
+    """)
+
+class MultipartUploadBuffer:
+    """
+    Write-only byte sink that uploads to S3 as a multipart upload, holding at most
+    one part in memory. Bytes are sent in parts of part_size as they accumulate.
+    """
+
+    def __init__(self, s3, bucket: str, key: str, part_size: int, **create_args):
+        self.s3 = s3
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size
+        self.buffer = bytearray()
+        self.parts: List[Dict[str, Any]] = []
+        self.upload_id = s3.create_multipart_upload(Bucket=bucket, Key=key, **create_args)['UploadId']
+
+    def _upload_part(self, body: bytes):
+        part_number = len(self.parts) + 1
+        response = self.s3.upload_part(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+            PartNumber=part_number, Body=body
         )
-        
-        # Generate presigned URL (valid for 7 days)
-        url = s3.generate_presigned_url(
+        self.parts.append({'ETag': response['ETag'], 'PartNumber': part_number})
+
+    def write(self, data: bytes) -> int:
+        self.buffer.extend(data)
+        while len(self.buffer) >= self.part_size:
+            self._upload_part(bytes(self.buffer[:self.part_size]))
+            del self.buffer[:self.part_size]
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def complete(self):
+        # The last part may be smaller than the minimum part size
+        if self.buffer or not self.parts:
+            self._upload_part(bytes(self.buffer))
+            self.buffer.clear()
+        self.s3.complete_multipart_upload(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+            MultipartUpload={'Parts': self.parts}
+        )
+
+    def abort(self):
+        try:
+            self.s3.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+        except Exception as e:
+            print(f"Error aborting upload of {self.key}: {str(e)}")
+
+@contextmanager
+def gzip_multipart_upload(s3, bucket: str, key: str, content_type: str,
+                          part_size: int = DOCUMENTATION_PART_SIZE) -> Iterator[TextIO]:
+    """
+    Yield a text stream that is gzip-compressed on the fly into a multipart upload
+    stored with Content-Encoding: gzip. The upload is aborted if the writer fails.
+    """
+    sink = MultipartUploadBuffer(s3, bucket, key, part_size, ContentType=content_type, ContentEncoding='gzip')
+    try:
+        with io.TextIOWrapper(gzip.GzipFile(fileobj=sink, mode='wb'), encoding='utf-8') as out:
+            yield out
+        sink.complete()
+    except BaseException:
+        sink.abort()
+        raise
+
+def inventory_digest(inventory: Union[Inventory, MultiTargetInventory]) -> str:
+    """
+    Hash the canonical inventory, leaving out per-run fields (timestamps and
+    discovery statistics) so unchanged infrastructure always hashes the same
+    """
+    document = model_to_dict(inventory)
+    document.pop('timestamp', None)
+    document.pop('discovery', None)
+    for target in document.get('targets', []):
+        target.pop('discovery', None)
+    canonical = json.dumps(document, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def read_json_object(s3, bucket: str, key: str) -> Optional[Dict[str, Any]]:
+    try:
+        response = s3.get_object(Bucket=bucket, Key=key)
+    except s3.exceptions.NoSuchKey:
+        return None
+    return json.loads(response['Body'].read())
+
+def write_json_object(s3, bucket: str, key: str, value: Dict[str, Any]):
+    s3.put_object(
+        Bucket=bucket,
+        Key=key,
+        Body=json.dumps(value, separators=(',', ':')).encode('utf-8'),
+        ContentType='application/json'
+    )
+
+def publish_documentation(app_id: str, inventory: Union[Inventory, MultiTargetInventory],
+                          section_html: Optional[Dict[str, str]] = None) -> str:
+    """
+    Stream the documentation page for an inventory to S3 and return a presigned URL for it.
+    Pages are stored under the digest of their inventory. If the app's latest pointer
+    already has this digest the upload is skipped and the existing page is returned;
+    otherwise the new version is appended to the app's manifest and becomes latest.
+    section_html carries pre-rendered section fragments to reuse in the page.
+    """
+    s3 = get_client('s3')
+    digest = inventory_digest(inventory)
+    latest_key = f'{DOCUMENTATION_METADATA_PREFIX}/latest/{app_id}.json'
+
+    latest = read_json_object(s3, DOCUMENTATION_BUCKET, latest_key)
+    if latest is not None and latest['digest'] == digest:
+        print(f"Documentation for app {app_id} is unchanged, reusing {latest['key']}")
+        record_metric('documentation_uploads_skipped')
+        key = latest['key']
+    else:
+        key = f'documentation/infrastructure-doc-{app_id}-{digest[:16]}.html'
+        with gzip_multipart_upload(s3, DOCUMENTATION_BUCKET, key, 'text/html') as out:
+            write_documentation_page(inventory, out, section_html)
+
+        version = {'digest': digest, 'key': key, 'published_at': datetime.now().isoformat()}
+        manifest_key = f'{DOCUMENTATION_METADATA_PREFIX}/manifests/{app_id}.json'
+        manifest = read_json_object(s3, DOCUMENTATION_BUCKET, manifest_key) or {
+            'app_id': app_id, 'fields': ['digest', 'key', 'published_at'], 'versions': []
+        }
+        manifest['versions'].append([version[field] for field in manifest['fields']])
+        write_json_object(s3, DOCUMENTATION_BUCKET, manifest_key, manifest)
+        # The pointer is written last so it never names a page that isn't there yet
+        write_json_object(s3, DOCUMENTATION_BUCKET, latest_key, version)
+
+    # Generate presigned URL (valid for 7 days)
+    return s3.generate_presigned_url(
+        'get_object',
+        Params={'Bucket': DOCUMENTATION_BUCKET, 'Key': key},
+        ExpiresIn=604800  # 7 days
+    )
+
+class SnapshotStore:
+    """Blob store for inventory snapshots: a local directory or an S3 prefix"""
+
+    def __init__(self, spec: str):
+        parsed = urlparse(spec)
+        if parsed.scheme not in ('file', 's3'):
+            raise ValueError(f"Unsupported snapshot store: {spec}")
+        self.scheme = parsed.scheme
+        self.location = parsed.path if parsed.scheme == 'file' else parsed.netloc
+        self.prefix = parsed.path.strip('/') if parsed.scheme == 's3' else ''
+
+    def read(self, name: str) -> Optional[bytes]:
+        if self.scheme == 'file':
+            try:
+                with open(os.path.join(self.location, name), 'rb') as f:
+                    return f.read()
+            except FileNotFoundError:
+                return None
+        s3 = get_client('s3')
+        try:
+            return s3.get_object(Bucket=self.location, Key=f"{self.prefix}/{name}".lstrip('/'))['Body'].read()
+        except s3.exceptions.NoSuchKey:
+            return None
+
+    def write(self, name: str, data: bytes):
+        if self.scheme == 'file':
+            os.makedirs(self.location, exist_ok=True)
+            path = os.path.join(self.location, name)
+            with open(f"{path}.tmp", 'wb') as f:
+                f.write(data)
+            os.replace(f"{path}.tmp", path)
+            return
+        get_client('s3').put_object(Bucket=self.location, Key=f"{self.prefix}/{name}".lstrip('/'), Body=data)
+
+def read_snapshot(store: SnapshotStore, name: str) -> Optional[Dict[str, Any]]:
+    data = store.read(name)
+    return json.loads(gzip.decompress(data)) if data is not None else None
+
+def write_snapshot(store: SnapshotStore, name: str, value: Dict[str, Any]):
+    store.write(name, gzip.compress(json.dumps(value, separators=(',', ':')).encode('utf-8')))
+
+def fingerprint(value: Any) -> str:
+    """Short stable hash of a model value"""
+    canonical = json.dumps(model_to_dict(value), sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+def inventory_sections(inventory: Union[Inventory, MultiTargetInventory]) -> Dict[str, list]:
+    """Records per section; multi-target sections are keyed '<account>/<region>:<service>'"""
+    if isinstance(inventory, Inventory):
+        return inventory.sections
+    sections = {}
+    for target in inventory.targets:
+        for service, _, _, _, path in SECTION_COLLECTORS:
+            node = target.resources
+            for key in path:
+                node = node.get(key, {}) if isinstance(node, dict) else {}
+            sections[f"{target.account_id or 'default'}/{target.region}:{service}"] = node or []
+    return sections
+
+def section_fingerprints(inventory: Union[Inventory, MultiTargetInventory]) -> Dict[str, Dict[str, Any]]:
+    """
+    Fingerprint every resource, keyed by section and resource ID, plus one digest per section
+    """
+    snapshot = {}
+    for section, records in inventory_sections(inventory).items():
+        id_field = RESOURCE_ID_FIELDS[section.rsplit(':', 1)[-1]]
+        resources = {str(getattr(record, id_field)): fingerprint(record) for record in records}
+        digest = hashlib.sha256(json.dumps(sorted(resources.items())).encode('utf-8')).hexdigest()[:16]
+        snapshot[section] = {'digest': digest, 'resources': resources}
+    return snapshot
+
+def diff_sections(previous: Dict[str, Dict[str, Any]], current: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, List[str]]]:
+    """Added, removed and modified resource IDs for every section whose digest changed"""
+    changes = {}
+    for section in list(current) + [section for section in previous if section not in current]:
+        before = previous.get(section, {'digest': None, 'resources': {}})
+        after = current.get(section, {'digest': None, 'resources': {}})
+        if before['digest'] == after['digest']:
+            continue
+        change = {
+            'added': sorted(set(after['resources']) - set(before['resources'])),
+            'removed': sorted(set(before['resources']) - set(after['resources'])),
+            'modified': sorted(key for key, value in after['resources'].items()
+                               if key in before['resources'] and before['resources'][key] != value),
+        }
+        # A section that is empty on both sides only differs in its missing digest
+        if any(change.values()):
+            changes[section] = change
+    return changes
+
+def write_change_report(inventory: Union[Inventory, MultiTargetInventory], changes: Dict[str, Dict[str, List[str]]],
+                        previous_timestamp: Optional[str], out: TextIO):
+    """Write an HTML page listing what changed since the previous snapshot"""
+    sections = inventory_sections(inventory)
+    out.write(f"""<!DOCTYPE html>
+<html>
+<head><title>Infrastructure Changes - App {html.escape(inventory.app_id)}</title></head>
+<body>
+<h1>Infrastructure Changes</h1>
+<p>App {html.escape(inventory.app_id)}: {html.escape(previous_timestamp or 'first snapshot')} to {html.escape(inventory.timestamp)}</p>
+""")
+    if not changes:
+        out.write("<p>No changes.</p>\n")
+    for section, change in changes.items():
+        id_field = RESOURCE_ID_FIELDS[section.rsplit(':', 1)[-1]]
+        by_id = {str(getattr(record, id_field)): record for record in sections.get(section, [])}
+        out.write(f'<div class="section"><h2>{html.escape(section)}</h2>\n')
+        for kind in ('added', 'modified'):
+            if change[kind]:
+                write_html_value(out, kind, [by_id[key] for key in change[kind]])
+        if change['removed']:
+            write_html_value(out, 'removed', change['removed'])
+        out.write('</div>\n')
+    out.write("</body>\n</html>\n")
+
+def publish_incremental_documentation(app_id: str, inventory: Union[Inventory, MultiTargetInventory]) -> Dict[str, Any]:
+    """
+    Diff the inventory against the app's previous snapshot, publish the full page
+    re-rendering only the sections that changed, and publish a change report next to it.
+    Snapshots hold gzip-compressed fingerprints per resource; rendered section fragments
+    are kept in a separate blob that is only read when there are sections to reuse.
+    """
+    store = SnapshotStore(INVENTORY_SNAPSHOT_STORE)
+    previous = read_snapshot(store, f"{app_id}.fingerprints.json.gz") or {'timestamp': None, 'sections': {}}
+    current = section_fingerprints(inventory)
+    changes = diff_sections(previous['sections'], current)
+
+    # Multi-target pages are rendered whole; single-target pages reuse unchanged section fragments
+    section_html = None
+    if isinstance(inventory, Inventory):
+        reusable = [service for service in current if service not in changes and inventory.sections[service]]
+        cached = (read_snapshot(store, f"{app_id}.sections.json.gz") or {}) if reusable else {}
+        section_html = {service: cached[service] for service in reusable if service in cached}
+        paths = {service: path for service, _, _, _, path in SECTION_COLLECTORS}
+        for service, records in inventory.sections.items():
+            if records and service not in section_html:
+                out = io.StringIO()
+                write_section_html(out, paths[service], records)
+                section_html[service] = out.getvalue()
+
+    url = publish_documentation(app_id, inventory, section_html)
+
+    s3 = get_client('s3')
+    digest = inventory_digest(inventory)
+    # Change reports are served by URL only; indexing them would mix stale diffs into answers
+    report_key = f"{DOCUMENTATION_METADATA_PREFIX}/changes/infrastructure-doc-{app_id}-{digest[:16]}-changes.html"
+    # A rerun on unchanged infrastructure keeps the report that introduced this version
+    if changes or previous.get('digest') != digest:
+        report = io.StringIO()
+        write_change_report(inventory, changes, previous['timestamp'], report)
+        s3.put_object(Bucket=DOCUMENTATION_BUCKET, Key=report_key, Body=report.getvalue().encode('utf-8'), ContentType='text/html')
+
+    write_snapshot(store, f"{app_id}.fingerprints.json.gz",
+                   {'timestamp': inventory.timestamp, 'digest': digest, 'sections': current})
+    if section_html is not None and changes:
+        write_snapshot(store, f"{app_id}.sections.json.gz", section_html)
+
+    return {
+        'documentation_url': url,
+        'change_report_url': s3.generate_presigned_url(
             'get_object',
-            Params={'Bucket': bucket_name, 'Key': f'documentation/{file_name}'},
+            Params={'Bucket': DOCUMENTATION_BUCKET, 'Key': report_key},
             ExpiresIn=604800  # 7 days
-        )
+        ),
+        'changes': {
+            section: {kind: len(ids) for kind, ids in change.items()} for section, change in changes.items()
+        }
+    }
+
+def generate_and_publish_documentation(app_id: str, force_refresh: bool = False,
+                                       regions: Optional[List[str]] = None,
+                                       incremental: bool = False) -> Dict[str, Any]:
+    """
+    Generate and publish infrastructure documentation with clean styling.
+    In incremental mode only changed sections are re-rendered and a change report is published too.
+    """
+    try:
+        # Get infrastructure details
+        inventory = collect_app_inventory(app_id, force_refresh=force_refresh, regions=regions)
+        if incremental:
+            return dict(statusCode=200, **publish_incremental_documentation(app_id, inventory))
+        url = publish_documentation(app_id, inventory)
         
         return {
             'statusCode': 200,
@@ -448,6 +3338,230 @@ def generate_and_publish_documentation(app_id: str) -> Dict[str, Any]:
             'error': f"Failed to generate documentation: {str(e)}"
         }
 
+def generate_documentation_batch(app_ids: Union[List[str], str] = 'all', force_refresh: bool = False) -> Dict[str, Any]:
+    """
+    Generate and publish documentation for many apps from one discovery sweep.
+    app_ids is a list of app IDs or 'all' for every app_id tag value in the account.
+    Account-wide listings and shared describes (security groups, target groups)
+    are fetched once and reused for every app.
+    """
+    try:
+        api_calls_before = METRICS['api_calls']
+        wanted = None if app_ids == 'all' else list(app_ids)
+
+        sweep = discover_resources_by_app(get_client('resourcegroupstaggingapi'), wanted)
+        apps = sweep['apps']
+        for app_id in wanted or []:
+            apps.setdefault(app_id, {})
+
+        shared = new_shared_describes()
+
+        def document_app(app_id):
+            try:
+                discovery = {'resources': apps[app_id], 'api_calls': sweep['api_calls']}
+                INVENTORY_CACHE.set(app_id, 'discovery', discovery)
+                inventory = collect_inventory(
+                    app_id, force_refresh=force_refresh, discovery=discovery, shared=shared
+                )
+                url = publish_documentation(app_id, inventory)
+                return {
+                    'statusCode': 200,
+                    'documentation_url': url,
+                    'resources': {service: len(records) for service, records in inventory.sections.items()}
+                }
+            except Exception as e:
+                print(f"Error generating documentation for app {app_id}: {str(e)}")
+                return {
+                    'statusCode': 500,
+                    'error': f"Failed to generate documentation: {str(e)}"
+                }
+
+        app_list = sorted(apps)
+        results = dict(zip(app_list, run_concurrently(document_app, app_list, BATCH_WORKERS)))
+
+        return {
+            'statusCode': 200 if all(r['statusCode'] == 200 for r in results.values()) else 207,
+            'apps': results,
+            'discovery_api_calls': sweep['api_calls'],
+            'api_calls': METRICS['api_calls'] - api_calls_before
+        }
+
+    except Exception as e:
+        print(f"Error generating batch documentation: {str(e)}")
+        return {
+            'statusCode': 500,
+            'error': f"Failed to generate batch documentation: {str(e)}"
+        }
+
+JOB_STORE = create_cache_backend(JOB_STORE_BACKEND) or MemoryCacheBackend()
+
+def save_job(job: Dict[str, Any]):
+    job['updated_at'] = datetime.now().isoformat()
+    JOB_STORE.set(f"documentation-jobs/{job['job_id']}", job)
+
+def load_job(job_id: str) -> Optional[Dict[str, Any]]:
+    return JOB_STORE.get(f"documentation-jobs/{job_id}")
+
+def enqueue_documentation_job(job_id: str):
+    """Queue a job on DOCUMENTATION_QUEUE_URL for this function's SQS trigger"""
+    get_client('sqs').send_message(QueueUrl=DOCUMENTATION_QUEUE_URL, MessageBody=json.dumps({'job_id': job_id}))
+
+def start_documentation_job(app_id: str, force_refresh: bool = False,
+                            regions: Optional[List[str]] = None,
+                            incremental: bool = False) -> Dict[str, Any]:
+    """
+    Record a documentation job and queue it, returning its job ID without waiting for the scan.
+    Without a queue the job runs inline and the finished job is returned with statusCode 200.
+    """
+    try:
+        # The SQS consumer runs in another container, which can't see this one's memory
+        if DOCUMENTATION_QUEUE_URL and not JOB_STORE_BACKEND:
+            raise ValueError("DOCUMENTATION_QUEUE_URL requires a shared JOB_STORE_BACKEND")
+        targets = inventory_targets(regions)
+        services = [service for service, _, _, _, _ in SECTION_COLLECTORS]
+        if len(targets) == 1:
+            sections = {service: 'pending' for service in services}
+        else:
+            sections = {f"{target_label(target)}:{service}": 'pending' for target in targets for service in services}
+
+        job = {
+            'job_id': uuid.uuid4().hex,
+            'app_id': app_id,
+            'force_refresh': force_refresh,
+            'regions': regions,
+            'incremental': incremental,
+            'status': 'queued',
+            'stage': 'queued',
+            'sections': sections,
+            'documentation_url': None,
+            'change_report_url': None,
+            'changes': None,
+            'error': None,
+            'created_at': datetime.now().isoformat()
+        }
+        save_job(job)
+        if DOCUMENTATION_QUEUE_URL:
+            enqueue_documentation_job(job['job_id'])
+            return {
+                'statusCode': 202,
+                'job_id': job['job_id']
+            }
+
+        run_documentation_job(job['job_id'])
+        return {
+            'statusCode': 200,
+            'job_id': job['job_id'],
+            'job': load_job(job['job_id'])
+        }
+
+    except Exception as e:
+        print(f"Error starting documentation job: {str(e)}")
+        return {
+            'statusCode': 500,
+            'error': f"Failed to start documentation job: {str(e)}"
+        }
+
+def run_documentation_job(job_id: str):
+    """
+    Collect, render and publish the documentation for a queued job,
+    recording progress per section in the job store as it goes.
+    Raises when the job can't be found, so the queue redelivers it.
+    """
+    job = load_job(job_id)
+    if job is None:
+        raise ValueError(f"Unknown documentation job: {job_id}")
+    if job['status'] in ('succeeded', 'failed'):
+        # Queue redelivery of a job that already finished
+        return
+
+    lock = threading.Lock()
+
+    def update(**changes):
+        with lock:
+            job.update(changes)
+            save_job(job)
+
+    def progress(section, state):
+        with lock:
+            job['sections'][section] = state
+            save_job(job)
+
+    update(status='running', stage='collecting')
+    try:
+        inventory = collect_app_inventory(job['app_id'], force_refresh=job['force_refresh'],
+                                          regions=job['regions'], progress=progress)
+        update(stage='publishing')
+        if job.get('incremental'):
+            published = publish_incremental_documentation(job['app_id'], inventory)
+            update(status='succeeded', stage='done', documentation_url=published['documentation_url'],
+                   change_report_url=published['change_report_url'], changes=published['changes'])
+        else:
+            url = publish_documentation(job['app_id'], inventory)
+            update(status='succeeded', stage='done', documentation_url=url)
+
+    except Exception as e:
+        print(f"Error generating documentation for job {job_id}: {str(e)}")
+        update(status='failed', error=f"Failed to generate documentation: {str(e)}")
+
+def get_documentation_status(job_id: str) -> Dict[str, Any]:
+    """
+    Look up a documentation job: overall status, progress per section and the URL once done
+    """
+    try:
+        job = load_job(job_id)
+        if job is None:
+            return {
+                'statusCode': 404,
+                'error': f"Unknown documentation job: {job_id}"
+            }
+        return {
+            'statusCode': 200,
+            'job': job
+        }
+
+    except Exception as e:
+        print(f"Error reading documentation job {job_id}: {str(e)}")
+        return {
+            'statusCode': 500,
+            'error': f"Failed to read documentation job: {str(e)}"
+        }
+
+def render_job_status(job: Dict[str, Any]) -> str:
+    """Agent-facing text for a job: status, progress per section and the URLs once done"""
+    lines = [f"Documentation job {job['job_id']} for app_id {job['app_id']}: {job['status']} ({job['stage']})"]
+    lines.extend(f"- {section}: {state}" for section, state in job['sections'].items())
+    if job['documentation_url']:
+        lines.append(f"✅ Access it here: {job['documentation_url']}")
+    if job.get('changes') is not None:
+        changes = ', '.join(
+            f"{section} (+{counts['added']} -{counts['removed']} ~{counts['modified']})"
+            for section, counts in job['changes'].items()
+        )
+        lines.append(f"Changes: {changes or 'none'}\nChange report: {job['change_report_url']}")
+    if job['error']:
+        lines.append(f"❌ {job['error']}")
+    return "\n".join(lines)
+
+# Whether the current invocation returns its telemetry in the response's debug field
+DEBUG_RESPONSE = INSTRUMENTATION_DEBUG
+
+# Services behind PREWARM=all: tag discovery plus every section collector
+PREWARM_SERVICES = ['resourcegroupstaggingapi', 'lambda', 'apigateway', 'ec2', 'dynamodb', 's3', 'elbv2']
+
+def prewarm(items: List[str]):
+    """Build clients and parse Terraform sources during the init phase"""
+    for item in items:
+        try:
+            if item == 'infrastructure_code':
+                infrastructure_code_index()
+            else:
+                for service in (PREWARM_SERVICES if item == 'all' else [item]):
+                    get_client(service)
+        except Exception as e:
+            print(f"Error prewarming {item}: {str(e)}")
+
+prewarm(PREWARM)
+
 def create_response(message_version: str, action_group: str, function_name: str, response_body: Dict) -> Dict:
     """
     Helper function to create properly formatted response
@@ -465,6 +3579,10 @@ def create_response(message_version: str, action_group: str, function_name: str,
         "response": action_response
     }
     
+    telemetry = emit_metrics(function_name)
+    if DEBUG_RESPONSE:
+        api_response["debug"] = telemetry
+
     print("Response:")
     print(json.dumps(api_response))
     
@@ -474,22 +3592,69 @@ def lambda_handler(event: Dict[str, Any], context) -> Dict[str, Any]:
     """
     Main handler function for infrastructure details and documentation generation
     """
+    global DEBUG_RESPONSE
     try:
         print(f"Received event: {json.dumps(event)}")
+        reset_metrics()
+
+        # Documentation jobs queued on SQS arrive as a batch of records; records that fail
+        # are reported back (the trigger needs ReportBatchItemFailures) so SQS retries them
+        if 'Records' in event:
+            failures = []
+            for record in event['Records']:
+                try:
+                    run_documentation_job(json.loads(record['body'])['job_id'])
+                except Exception as e:
+                    print(f"Error running documentation job from message {record.get('messageId')}: {str(e)}")
+                    failures.append({'itemIdentifier': record.get('messageId')})
+            emit_metrics('run_documentation_job')
+            return {'batchItemFailures': failures}
         
         # Extract function name and parameters
         function_name = event.get('function', '')
         actionGroup = event.get('actionGroup', '')
         message_version = event.get('messageVersion', '1.0')
         
-        # Extract app_id from parameters array
-        parameters = event.get('parameters', [])
-        app_id = None
-        for param in parameters:
-            if param.get('name') == 'app_id':
-                app_id = param.get('value')
-                break
+        # Extract app_id and options from parameters array
+        parameters = {param.get('name'): param.get('value') for param in event.get('parameters', [])}
+        app_id = parameters.get('app_id')
+        DEBUG_RESPONSE = INSTRUMENTATION_DEBUG or str(parameters.get('debug', 'false')).lower() == 'true'
+        force_refresh = str(parameters.get('force_refresh', 'false')).lower() == 'true'
+        # Regions can be narrowed per request; cross-account roles only come from configuration
+        regions = [region.strip() for region in (parameters.get('regions') or '').split(',') if region.strip()] or None
+
+        # Job status lookups take the job_id returned when the job was started
+        if function_name == 'get_documentation_status':
+            job_id = parameters.get('job_id')
+            if not job_id:
+                body = "❌ Error: job_id is required"
+            else:
+                status_response = get_documentation_status(job_id)
+                if status_response.get('statusCode') == 200:
+                    body = render_job_status(status_response['job'])
+                else:
+                    body = f"❌ Error: {status_response.get('error', 'Unknown error occurred')}"
+            return create_response(message_version, actionGroup, function_name, {"TEXT": {"body": body}})
         
+        # Batch mode documents many apps and takes app_ids instead of app_id
+        if function_name == 'generate_documentation_batch':
+            requested = parameters.get('app_ids') or 'all'
+            if requested != 'all':
+                requested = [value.strip() for value in requested.split(',') if value.strip()]
+            batch_response = generate_documentation_batch(requested, force_refresh=force_refresh)
+            if batch_response.get('statusCode') in (200, 207):
+                lines = [f"✅ Documented {len(batch_response['apps'])} apps with {batch_response['api_calls']} API calls:"]
+                for batch_app_id, result in batch_response['apps'].items():
+                    if result['statusCode'] == 200:
+                        counts = ', '.join(f"{service}={count}" for service, count in result['resources'].items() if count)
+                        lines.append(f"- {batch_app_id} ({counts or 'no resources'}): {result['documentation_url']}")
+                    else:
+                        lines.append(f"- {batch_app_id}: ❌ {result['error']}")
+                body = "\n".join(lines)
+            else:
+                body = f"❌ Error generating documentation: {batch_response.get('error', 'Unknown error occurred')}"
+            return create_response(message_version, actionGroup, function_name, {"TEXT": {"body": body}})
+
         # Validate app_id
         if not app_id:
             response_body = {
@@ -500,8 +3665,35 @@ def lambda_handler(event: Dict[str, Any], context) -> Dict[str, Any]:
             return create_response(message_version, actionGroup, function_name, response_body)
             
         # Route to appropriate function based on function name
-        if function_name == 'GetInfrastructureDetails':
-            infrastructure_details = get_infrastructure_details(app_id)
+        if function_name == 'GetInfrastructureDetails' and str(parameters.get('reconcile', 'false')).lower() == 'true':
+            try:
+                body = render_reconcile_report(reconcile_inventory(app_id, force_refresh=force_refresh))
+            except Exception as e:
+                body = f"❌ Error reconciling infrastructure: {str(e)}"
+            return create_response(message_version, actionGroup, function_name, {"TEXT": {"body": body}})
+
+        elif function_name == 'invalidate_inventory_cache':
+            # Called after a deployment so the next request collects fresh inventory;
+            # services (e.g. 'lambda,s3') limits it to those sections
+            try:
+                dropped = invalidate_inventory_cache(app_id, parse_services(parameters.get('services')))
+                body = f"✅ Cleared {dropped} cached inventory entries for app_id {app_id}"
+            except ValueError as e:
+                body = f"❌ Error: {str(e)}"
+            return create_response(message_version, actionGroup, function_name, {"TEXT": {"body": body}})
+
+        elif function_name == 'GetInfrastructureDetails':
+            # source=terraform reads the app's Terraform code or state instead of calling AWS;
+            # services (e.g. 'lambda,s3') and fields=summary narrow what is collected
+            try:
+                services = parse_services(parameters.get('services'))
+            except ValueError as e:
+                return create_response(message_version, actionGroup, function_name, {"TEXT": {"body": f"❌ Error: {str(e)}"}})
+            infrastructure_details = get_infrastructure_page(app_id, parameters.get('page_token') or None,
+                                                             force_refresh=force_refresh, regions=regions,
+                                                             source=parameters.get('source') or 'aws',
+                                                             services=services,
+                                                             fields=parameters.get('fields') or 'full')
             response_body = {
                 "TEXT": {
                     "body": f"Infrastructure details for app_id {app_id}:\n{infrastructure_details}"
@@ -509,9 +3701,35 @@ def lambda_handler(event: Dict[str, Any], context) -> Dict[str, Any]:
             }
             return create_response(message_version, actionGroup, function_name, response_body)
             
+        elif function_name == 'generate_and_publish_documentation' and str(parameters.get('async', 'false')).lower() == 'true':
+            incremental = str(parameters.get('incremental', 'false')).lower() == 'true'
+            job_response = start_documentation_job(app_id, force_refresh=force_refresh, regions=regions,
+                                                   incremental=incremental)
+            if job_response.get('statusCode') == 202:
+                body = (f"⏳ Documentation job {job_response['job_id']} started for app_id {app_id}.\n"
+                        f"Check on it with get_documentation_status and job_id {job_response['job_id']}.")
+            elif job_response.get('statusCode') == 200:
+                body = render_job_status(job_response['job'])
+            else:
+                body = f"❌ Error generating documentation: {job_response.get('error', 'Unknown error occurred')}"
+            return create_response(message_version, actionGroup, function_name, {"TEXT": {"body": body}})
+
         elif function_name == 'generate_and_publish_documentation':
-            doc_response = generate_and_publish_documentation(app_id)
-            if doc_response.get('statusCode') == 200:
+            incremental = str(parameters.get('incremental', 'false')).lower() == 'true'
+            doc_response = generate_and_publish_documentation(app_id, force_refresh=force_refresh, regions=regions,
+                                                              incremental=incremental)
+            if doc_response.get('statusCode') == 200 and incremental:
+                changes = ', '.join(
+                    f"{section} (+{counts['added']} -{counts['removed']} ~{counts['modified']})"
+                    for section, counts in doc_response['changes'].items()
+                )
+                response_body = {
+                    "TEXT": {
+                        "body": f"✅ Documentation generated successfully!\nAccess it here: {doc_response.get('documentation_url')}\n"
+                                f"Changes: {changes or 'none'}\nChange report: {doc_response.get('change_report_url')}"
+                    }
+                }
+            elif doc_response.get('statusCode') == 200:
                 response_body = {
                     "TEXT": {
                         "body": f"✅ Documentation generated successfully!\nAccess it here: {doc_response.get('documentation_url')}"
@@ -528,7 +3746,7 @@ def lambda_handler(event: Dict[str, Any], context) -> Dict[str, Any]:
         else:
             response_body = {
                 "TEXT": {
-                    "body": f"❌ Invalid function: {function_name}. Supported functions are: GetInfrastructureDetails, generate_and_publish_documentation"
+                    "body": f"❌ Invalid function: {function_name}. Supported functions are: GetInfrastructureDetails, generate_and_publish_documentation, generate_documentation_batch, get_documentation_status, invalidate_inventory_cache"
                 }
             }
             return create_response(message_version, actionGroup, function_name, response_body)
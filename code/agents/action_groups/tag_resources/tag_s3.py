@@ -1,6 +1,143 @@
+import os
 import json
+import time
 import boto3
-from typing import Dict, Any
+import fnmatch
+import threading
+from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+
+# Per-invocation API call telemetry is printed as one CloudWatch Embedded Metric Format line
+METRICS_NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'InfrastructureDocumentation')
+
+# Error codes services return when a request was throttled. Keep in sync with the inventory
+# Lambda's THROTTLE_ERROR_CODES: both count ApiThrottles under the same metric and namespace.
+THROTTLE_ERROR_CODES = {
+    'Throttling', 'ThrottlingException', 'ThrottledException', 'RequestThrottledException',
+    'TooManyRequestsException', 'ProvisionedThroughputExceededException', 'RequestLimitExceeded',
+    'RequestThrottled', 'SlowDown', 'EC2ThrottledException', 'BandwidthLimitExceeded',
+    'PriorRequestNotComplete', 'LimitExceededException',
+}
+
+# tag:TagResources accepts at most 20 ARNs per call; tag:GetResources looks up at most 100
+TAG_RESOURCES_BATCH_SIZE = 20
+GET_RESOURCES_BATCH_SIZE = 100
+# Tagging batches and per-service fallbacks run side by side
+TAGGING_WORKERS = int(os.environ.get('TAGGING_WORKERS', '8'))
+
+# (service, operation) -> call stats for the current invocation
+CALL_STATS: Dict[tuple, Dict[str, float]] = {}
+STATS_LOCK = threading.Lock()
+
+# Clients are created once per container and reused across warm invocations
+CLIENTS: Dict[str, Any] = {}
+CLIENT_LOCK = threading.Lock()
+
+# Services whose clients are built during the init phase instead of the first request, e.g. PREWARM=s3
+PREWARM = [service.strip() for service in os.environ.get('PREWARM', '').split(',') if service.strip()]
+
+def start_api_call(model=None, context=None, **kwargs):
+    """botocore before-call hook noting when a request started"""
+    if context is not None and model is not None:
+        context['instrumentation'] = (model.service_model.service_name, model.name, time.perf_counter())
+
+def count_throttle(response=None, request_dict=None, **kwargs):
+    """botocore needs-retry hook counting every throttled attempt of a call, retried or not"""
+    if response is not None and response[1].get('Error', {}).get('Code') in THROTTLE_ERROR_CODES:
+        context = (request_dict or {}).get('context')
+        if context is not None:
+            context['throttles'] = context.get('throttles', 0) + 1
+    return None
+
+def finish_api_call(context=None, http_response=None, parsed=None, exception=None, **kwargs):
+    """
+    botocore after-call / after-call-error hook recording latency, errors and throttled
+    attempts per operation. ApiThrottles counts attempts, as in the inventory Lambda.
+    """
+    call = (context or {}).get('instrumentation')
+    if call is None:
+        return
+    service, operation, started = call
+    latency_ms = (time.perf_counter() - started) * 1000
+    failed = exception is not None or bool(parsed and 'Error' in parsed) or (
+        http_response is not None and http_response.status_code >= 400)
+    with STATS_LOCK:
+        stats = CALL_STATS.setdefault((service, operation), {'calls': 0, 'errors': 0, 'throttles': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+        stats['calls'] += 1
+        stats['errors'] += int(failed)
+        stats['throttles'] += context.get('throttles', 0)
+        stats['total_ms'] += latency_ms
+        stats['max_ms'] = max(stats['max_ms'], latency_ms)
+
+def instrumented_client(service: str):
+    """Return the container's client for service, creating it with the call hooks on first use"""
+    client = CLIENTS.get(service)
+    if client is None:
+        # Creating clients isn't thread-safe, so creation is serialized
+        with CLIENT_LOCK:
+            client = CLIENTS.get(service)
+            if client is None:
+                client = boto3.client(service)
+                client.meta.events.register('before-call', start_api_call)
+                client.meta.events.register('after-call', finish_api_call)
+                client.meta.events.register('after-call-error', finish_api_call)
+                client.meta.events.register('needs-retry', count_throttle)
+                CLIENTS[service] = client
+    return client
+
+class LazyClients(dict):
+    """Clients by service, built on first lookup so a request only pays for the services it calls"""
+
+    def __missing__(self, service: str):
+        client = self[service] = instrumented_client(service)
+        return client
+
+for service in PREWARM:
+    try:
+        instrumented_client(service)
+    except Exception as e:
+        print(f"Error prewarming {service} client: {str(e)}")
+
+def emit_metrics(function_name: str):
+    """Print the invocation's API call stats as one EMF line and reset them"""
+    with STATS_LOCK:
+        calls = {f"{service}.{operation}": {key: round(value, 2) for key, value in stats.items()}
+                 for (service, operation), stats in sorted(CALL_STATS.items())}
+        CALL_STATS.clear()
+    print(json.dumps({
+        'FunctionName': function_name or 'unknown',
+        'ApiCalls': sum(stats['calls'] for stats in calls.values()),
+        'ApiErrors': sum(stats['errors'] for stats in calls.values()),
+        'ApiThrottles': sum(stats['throttles'] for stats in calls.values()),
+        'ApiLatencyTotal': round(sum(stats['total_ms'] for stats in calls.values()), 2),
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': METRICS_NAMESPACE,
+                'Dimensions': [['FunctionName']],
+                'Metrics': [
+                    {'Name': 'ApiCalls', 'Unit': 'Count'},
+                    {'Name': 'ApiErrors', 'Unit': 'Count'},
+                    {'Name': 'ApiThrottles', 'Unit': 'Count'},
+                    {'Name': 'ApiLatencyTotal', 'Unit': 'Milliseconds'},
+                ],
+            }]
+        },
+        'api_calls_by_operation': calls,
+    }))
+
+def bucket_tag_set(s3, bucket_name: str) -> List[Dict[str, str]]:
+    """
+    Current tags of a bucket. Only NoSuchTagSet means the bucket has none; any other error
+    is raised, since PutBucketTagging with a guessed empty set would wipe the real tags.
+    """
+    try:
+        return s3.get_bucket_tagging(Bucket=bucket_name)['TagSet']
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') == 'NoSuchTagSet':
+            return []
+        raise
 
 def add_tag_to_s3(bucket_name: str, tag_name: str, tag_value: str) -> Dict:
     """
@@ -15,15 +152,10 @@ def add_tag_to_s3(bucket_name: str, tag_name: str, tag_value: str) -> Dict:
         Dict: Result of the tagging operation with success status and message
     """
     try:
-        s3 = boto3.client('s3')
+        s3 = instrumented_client('s3')
         
-        # Try to get existing tags, if any
-        try:
-            current_tags = s3.get_bucket_tagging(Bucket=bucket_name)
-            tag_set = current_tags['TagSet']
-        except s3.exceptions.ClientError:
-            # Bucket has no tags yet
-            tag_set = []
+        # Get existing tags, if any
+        tag_set = bucket_tag_set(s3, bucket_name)
 
         # Remove existing tag if present and add new one
         new_tags = [tag for tag in tag_set if tag['Key'] != tag_name]
@@ -44,6 +176,232 @@ def add_tag_to_s3(bucket_name: str, tag_name: str, tag_value: str) -> Dict:
             'message': f'Error tagging S3 bucket: {str(e)}'
         }
 
+def chunked(items: list, size: int) -> List[list]:
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+def arn_service(arn: str) -> str:
+    return arn.split(':')[2]
+
+# Pattern prefixes accepted besides the ARN service names, e.g. the boto3 client name 'elbv2'
+PATTERN_SERVICE_ALIASES = {'elbv2': 'elasticloadbalancing'}
+
+def resolve_patterns(patterns: List[str], clients: Dict[str, Any], region: str, account_id: str) -> List[str]:
+    """
+    Expand 'service:glob' name patterns (e.g. 's3:app-100-*', 'lambda:orders-*') into ARNs.
+    EC2 instances match on instance ID or Name tag; API Gateway REST APIs on their name.
+    Load balancers take either 'elasticloadbalancing:' or 'elbv2:'.
+    """
+    by_service: Dict[str, List[str]] = {}
+    for pattern in patterns:
+        service, _, glob = pattern.partition(':')
+        if not glob:
+            raise ValueError(f"Name pattern must look like service:glob, got {pattern}")
+        service = service.strip()
+        by_service.setdefault(PATTERN_SERVICE_ALIASES.get(service, service), []).append(glob.strip())
+
+    def matches(service, *names):
+        return any(fnmatch.fnmatchcase(name, glob) for glob in by_service[service] for name in names if name)
+
+    arns = []
+    for service in by_service:
+        if service == 's3':
+            arns += [f"arn:aws:s3:::{bucket['Name']}" for bucket in clients['s3'].list_buckets()['Buckets']
+                     if matches('s3', bucket['Name'])]
+        elif service == 'lambda':
+            for page in clients['lambda'].get_paginator('list_functions').paginate():
+                arns += [function['FunctionArn'] for function in page['Functions'] if matches('lambda', function['FunctionName'])]
+        elif service == 'dynamodb':
+            for page in clients['dynamodb'].get_paginator('list_tables').paginate():
+                arns += [f"arn:aws:dynamodb:{region}:{account_id}:table/{name}" for name in page['TableNames']
+                         if matches('dynamodb', name)]
+        elif service == 'ec2':
+            for page in clients['ec2'].get_paginator('describe_instances').paginate():
+                for reservation in page['Reservations']:
+                    for instance in reservation['Instances']:
+                        name = next((tag['Value'] for tag in instance.get('Tags', []) if tag['Key'] == 'Name'), None)
+                        if matches('ec2', instance['InstanceId'], name):
+                            arns.append(f"arn:aws:ec2:{region}:{account_id}:instance/{instance['InstanceId']}")
+        elif service == 'elasticloadbalancing':
+            for page in clients['elbv2'].get_paginator('describe_load_balancers').paginate():
+                arns += [lb['LoadBalancerArn'] for lb in page['LoadBalancers'] if matches('elasticloadbalancing', lb['LoadBalancerName'])]
+        elif service == 'apigateway':
+            for page in clients['apigateway'].get_paginator('get_rest_apis').paginate():
+                arns += [f"arn:aws:apigateway:{region}::/restapis/{api['id']}" for api in page['items']
+                         if matches('apigateway', api['name'])]
+        else:
+            raise ValueError(f"Unsupported service in name pattern: {service}")
+    return arns
+
+def current_tags(tagging, arns: List[str]) -> Dict[str, Dict[str, str]]:
+    """Existing tags per ARN, looked up 100 ARNs at a time; resources without tags are absent"""
+    tags = {}
+    for batch in chunked(arns, GET_RESOURCES_BATCH_SIZE):
+        for page in tagging.get_paginator('get_resources').paginate(ResourceARNList=batch):
+            for mapping in page['ResourceTagMappingList']:
+                tags[mapping['ResourceARN']] = {tag['Key']: tag['Value'] for tag in mapping.get('Tags', [])}
+    return tags
+
+def tag_with_service_api(clients: Dict[str, Any], arn: str, tags: Dict[str, str]):
+    """Tag one resource through its own service's API, for ARNs tag:TagResources can't handle"""
+    service = arn_service(arn)
+    resource = arn.split(':', 5)[5]
+    if service == 's3':
+        # PutBucketTagging replaces the whole set, so merge with what is there
+        s3 = clients['s3']
+        merged = {tag['Key']: tag['Value'] for tag in bucket_tag_set(s3, resource)}
+        merged.update(tags)
+        s3.put_bucket_tagging(Bucket=resource, Tagging={'TagSet': [{'Key': k, 'Value': v} for k, v in merged.items()]})
+    elif service == 'lambda':
+        clients['lambda'].tag_resource(Resource=arn, Tags=tags)
+    elif service == 'dynamodb':
+        clients['dynamodb'].tag_resource(ResourceArn=arn, Tags=[{'Key': k, 'Value': v} for k, v in tags.items()])
+    elif service == 'ec2':
+        clients['ec2'].create_tags(Resources=[resource.split('/')[-1]], Tags=[{'Key': k, 'Value': v} for k, v in tags.items()])
+    elif service == 'elasticloadbalancing':
+        clients['elbv2'].add_tags(ResourceArns=[arn], Tags=[{'Key': k, 'Value': v} for k, v in tags.items()])
+    elif service == 'apigateway':
+        clients['apigateway'].tag_resource(resourceArn=arn, tags=tags)
+    else:
+        raise ValueError(f"No tagging API for service {service}")
+
+def bulk_tag_resources(tags: Dict[str, str], arns: Optional[List[str]] = None,
+                       patterns: Optional[List[str]] = None, dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Apply tags to many resources across services in one call
+
+    Resources are given as ARNs and/or 'service:glob' name patterns. Resources that already
+    carry every tag are left alone, so re-running is cheap and safe. The rest are tagged with
+    tag:TagResources in batches of 20; resources it rejects are retried concurrently through
+    their own service's tagging API.
+
+    Args:
+        tags (Dict[str, str]): Tags to apply
+        arns (List[str]): Resource ARNs to tag
+        patterns (List[str]): Name patterns such as 's3:app-100-*'
+        dry_run (bool): Report what would change without tagging anything
+
+    Returns:
+        Dict: success flag, counts per status and a result per resource
+    """
+    try:
+        clients = LazyClients()
+        tagging = clients['resourcegroupstaggingapi']
+        region = tagging.meta.region_name
+
+        targets = list(dict.fromkeys(arns or []))
+        if patterns:
+            account_id = clients['sts'].get_caller_identity()['Account']
+            seen = set(targets)
+            for arn in resolve_patterns(patterns, clients, region, account_id):
+                if arn not in seen:
+                    seen.add(arn)
+                    targets.append(arn)
+
+        existing = current_tags(tagging, targets)
+        results = {}
+        pending = []
+        for arn in targets:
+            if all(existing.get(arn, {}).get(key) == value for key, value in tags.items()):
+                results[arn] = {'arn': arn, 'status': 'unchanged'}
+            elif dry_run:
+                results[arn] = {'arn': arn, 'status': 'would_tag'}
+            else:
+                pending.append(arn)
+
+        def tag_batch(batch):
+            # A batch that fails outright falls back to per-service tagging like individual failures
+            try:
+                return tagging.tag_resources(ResourceARNList=batch, Tags=tags).get('FailedResourcesMap', {})
+            except Exception as e:
+                return {arn: {'ErrorMessage': str(e)} for arn in batch}
+
+        def tag_single(arn):
+            try:
+                tag_with_service_api(clients, arn, tags)
+                return {'arn': arn, 'status': 'tagged', 'method': arn_service(arn)}
+            except Exception as e:
+                return {'arn': arn, 'status': 'failed', 'error': str(e)}
+
+        with ThreadPoolExecutor(max_workers=TAGGING_WORKERS) as executor:
+            fallback = []
+            batches = chunked(pending, TAG_RESOURCES_BATCH_SIZE)
+            for batch, failed in zip(batches, executor.map(tag_batch, batches)):
+                for arn in batch:
+                    if arn in failed:
+                        fallback.append(arn)
+                    else:
+                        results[arn] = {'arn': arn, 'status': 'tagged', 'method': 'tag:TagResources'}
+            for result in executor.map(tag_single, fallback):
+                results[result['arn']] = result
+
+        ordered = [results[arn] for arn in targets]
+        counts = {}
+        for result in ordered:
+            counts[result['status']] = counts.get(result['status'], 0) + 1
+        return {
+            'success': counts.get('failed', 0) == 0,
+            'dry_run': dry_run,
+            'counts': counts,
+            'results': ordered
+        }
+    except Exception as e:
+        return {
+            'success': False,
+            'message': f'Error tagging resources: {str(e)}'
+        }
+
+def parse_tags(spec: str) -> Dict[str, str]:
+    """Parse 'key=value,key2=value2' into a tag dict"""
+    tags = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        key, _, value = item.partition('=')
+        tags[key.strip()] = value.strip()
+    return tags
+
+def create_response(event: Dict[str, Any], body: str) -> Dict[str, Any]:
+    return {
+        "messageVersion": event.get('messageVersion', '1.0'),
+        "response": {
+            "actionGroup": event.get('actionGroup', ''),
+            "function": event.get('function', ''),
+            "functionResponse": {
+                "responseBody": {
+                    "TEXT": {
+                        "body": body
+                    }
+                }
+            }
+        }
+    }
+
+def handle_bulk_tagging(event: Dict[str, Any], parameters: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Handle bulk_tag_resources. Parameters: tags ('key=value,...') or tag_name/tag_value,
+    arns and/or patterns (comma-separated), and dry_run.
+    """
+    tags = parse_tags(parameters.get('tags') or '')
+    if parameters.get('tag_name') and parameters.get('tag_value'):
+        tags[parameters['tag_name']] = parameters['tag_value']
+    arns = [arn.strip() for arn in (parameters.get('arns') or '').split(',') if arn.strip()]
+    patterns = [pattern.strip() for pattern in (parameters.get('patterns') or '').split(',') if pattern.strip()]
+    dry_run = str(parameters.get('dry_run', 'false')).lower() == 'true'
+
+    if not tags or not (arns or patterns):
+        emit_metrics(event.get('function', ''))
+        return create_response(event, "❌ Error: bulk tagging needs tags (or tag_name and tag_value) and arns or patterns")
+
+    result = bulk_tag_resources(tags, arns, patterns, dry_run)
+    emit_metrics(event.get('function', ''))
+    if 'results' not in result:
+        return create_response(event, f"❌ {result['message']}")
+
+    summary = ', '.join(f"{status}={count}" for status, count in sorted(result['counts'].items())) or 'no resources matched'
+    lines = [f"{'✅' if result['success'] else '❌'} {'Dry run: ' if dry_run else ''}{summary}"]
+    for item in result['results']:
+        detail = f" ({item['error']})" if item.get('error') else ''
+        lines.append(f"- {item['arn']}: {item['status']}{detail}")
+    return create_response(event, "\n".join(lines))
+
 def lambda_handler(event: Dict[str, Any], context) -> Dict[str, Any]:
     """
     Main handler function for adding tags to S3 buckets
@@ -62,6 +420,10 @@ def lambda_handler(event: Dict[str, Any], context) -> Dict[str, Any]:
         
         # Extract basic event information
         message_version = event.get('messageVersion', '1.0')
+
+        # Bulk tagging across services takes its own parameters
+        if event.get('function') == 'bulk_tag_resources':
+            return handle_bulk_tagging(event, {param.get('name'): param.get('value') for param in event.get('parameters', [])})
         
         # Extract parameters from the event
         parameters = event.get('parameters', [])
@@ -89,6 +451,7 @@ def lambda_handler(event: Dict[str, Any], context) -> Dict[str, Any]:
                 missing_params.append("bucket_name")
                 
             # Return error response if parameters are missing
+            emit_metrics(event.get('function', ''))
             return {
                 "messageVersion": message_version,
                 "response": {
@@ -106,6 +469,7 @@ def lambda_handler(event: Dict[str, Any], context) -> Dict[str, Any]:
 
         # Add tag to the S3 bucket
         result = add_tag_to_s3(bucket_name, tag_name, tag_value)
+        emit_metrics(event.get('function', ''))
 
         # Create response based on the result
         return {
@@ -0,0 +1,324 @@
+"""
+Offline benchmark for the action group Lambdas.
+
+Builds a synthetic account in moto with the requested number of Lambdas, REST APIs,
+EC2 instances, DynamoDB tables, S3 buckets and load balancers tagged for the benchmarked
+app (plus resources of other apps as noise), then measures get_infrastructure_details,
+generate_and_publish_documentation and add_tag_to_s3.
+
+For every benchmark it reports wall time, API calls per service, peak Python memory
+(tracemalloc, measured in a second pass so it doesn't skew the timing) and output size.
+Results are written as JSON; pass --compare with an earlier results file to see the deltas.
+
+    python code/benchmarks/benchmark_lambdas.py --sizes 10,100,1000 --output results.json
+"""
+
+import os
+import sys
+import json
+import time
+import boto3
+import argparse
+import importlib.util
+import io
+import platform
+import subprocess
+import tracemalloc
+import zipfile
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlparse
+
+try:
+    from moto import mock_aws
+except ImportError:
+    sys.exit("The benchmark needs moto: pip install 'moto[all]'")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INVENTORY_LAMBDA = os.path.join(ROOT, 'agents', 'action_groups', 'GetInfrastructureDetails', 'lambda_GetInfrastructureDetails.py')
+TAGGING_LAMBDA = os.path.join(ROOT, 'agents', 'action_groups', 'tag_resources', 'tag_s3.py')
+
+APP_ID = 'bench'
+OTHER_APP_ID = 'other'
+DOCUMENTATION_BUCKET = 'adc-knowledge-base-bucket'
+RESOURCE_KINDS = ['lambda', 'apigateway', 'ec2', 'dynamodb', 's3', 'elasticloadbalancing']
+
+# moto's region and fake credentials; never touch a real account
+os.environ['AWS_DEFAULT_REGION'] = 'us-east-1'
+os.environ['AWS_ACCESS_KEY_ID'] = 'testing'
+os.environ['AWS_SECRET_ACCESS_KEY'] = 'testing'
+os.environ.pop('AWS_PROFILE', None)
+
+def parse_counts(spec: str) -> Dict[str, int]:
+    """Parse per-kind overrides such as 'ec2=500,lambda=0'"""
+    counts = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        kind, count = item.split('=', 1)
+        if kind not in RESOURCE_KINDS:
+            raise ValueError(f"Unknown resource kind {kind}; expected one of {', '.join(RESOURCE_KINDS)}")
+        counts[kind] = int(count)
+    return counts
+
+def lambda_zip() -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('index.py', 'def handler(event, context):\n    return event\n')
+    return buffer.getvalue()
+
+def populate_account(counts: Dict[str, int], noise: float):
+    """
+    Create counts[kind] resources of each kind tagged app_id=bench, plus noise times as
+    many tagged for another app so discovery and filtering have work to do
+    """
+    iam = boto3.client('iam')
+    lambda_client = boto3.client('lambda')
+    apigateway = boto3.client('apigateway')
+    ec2 = boto3.client('ec2')
+    dynamodb = boto3.client('dynamodb')
+    s3 = boto3.client('s3')
+    elbv2 = boto3.client('elbv2')
+
+    s3.create_bucket(Bucket=DOCUMENTATION_BUCKET)
+    role_arn = iam.create_role(RoleName='benchmark-role', AssumeRolePolicyDocument='{}')['Role']['Arn']
+    vpc_id = ec2.create_vpc(CidrBlock='10.0.0.0/16')['Vpc']['VpcId']
+    subnets = [
+        ec2.create_subnet(VpcId=vpc_id, CidrBlock=f'10.0.{index}.0/24', AvailabilityZone=f'us-east-1{zone}')['Subnet']['SubnetId']
+        for index, zone in enumerate('ab')
+    ]
+    group_id = ec2.create_security_group(GroupName='benchmark', Description='benchmark', VpcId=vpc_id)['GroupId']
+    ec2.authorize_security_group_ingress(GroupId=group_id, IpPermissions=[
+        {'IpProtocol': 'tcp', 'FromPort': 443, 'ToPort': 443, 'IpRanges': [{'CidrIp': '0.0.0.0/0'}]}
+    ])
+    code = lambda_zip()
+
+    for app_id, scale in ((APP_ID, 1.0), (OTHER_APP_ID, noise)):
+        tags = {'app_id': app_id}
+        for index in range(int(counts['lambda'] * scale)):
+            lambda_client.create_function(
+                FunctionName=f'{app_id}-fn-{index}', Runtime='python3.11', Role=role_arn,
+                Handler='index.handler', Code={'ZipFile': code}, Tags=tags
+            )
+        for index in range(int(counts['apigateway'] * scale)):
+            api_id = apigateway.create_rest_api(name=f'{app_id}-api-{index}', tags=tags)['id']
+            root_id = apigateway.get_resources(restApiId=api_id)['items'][0]['id']
+            resource_id = apigateway.create_resource(restApiId=api_id, parentId=root_id, pathPart='items')['id']
+            apigateway.put_method(restApiId=api_id, resourceId=resource_id, httpMethod='GET', authorizationType='NONE')
+            apigateway.put_integration(restApiId=api_id, resourceId=resource_id, httpMethod='GET', type='MOCK')
+            apigateway.create_deployment(restApiId=api_id, stageName='prod')
+        remaining = int(counts['ec2'] * scale)
+        while remaining > 0:
+            batch = min(remaining, 500)
+            ec2.run_instances(
+                ImageId='ami-12c6146b', MinCount=batch, MaxCount=batch, InstanceType='t3.micro',
+                SubnetId=subnets[0], SecurityGroupIds=[group_id],
+                TagSpecifications=[{'ResourceType': 'instance', 'Tags': [{'Key': 'app_id', 'Value': app_id}]}]
+            )
+            remaining -= batch
+        for index in range(int(counts['dynamodb'] * scale)):
+            dynamodb.create_table(
+                TableName=f'{app_id}-table-{index}',
+                KeySchema=[{'AttributeName': 'id', 'KeyType': 'HASH'}],
+                AttributeDefinitions=[{'AttributeName': 'id', 'AttributeType': 'S'}],
+                BillingMode='PAY_PER_REQUEST', Tags=[{'Key': 'app_id', 'Value': app_id}]
+            )
+        for index in range(int(counts['s3'] * scale)):
+            s3.create_bucket(Bucket=f'{app_id}-bucket-{index}')
+            s3.put_bucket_tagging(Bucket=f'{app_id}-bucket-{index}', Tagging={'TagSet': [{'Key': 'app_id', 'Value': app_id}]})
+        for index in range(int(counts['elasticloadbalancing'] * scale)):
+            lb_arn = elbv2.create_load_balancer(
+                Name=f'{app_id}-lb-{index}', Subnets=subnets, Scheme='internet-facing',
+                Tags=[{'Key': 'app_id', 'Value': app_id}]
+            )['LoadBalancers'][0]['LoadBalancerArn']
+            tg_arn = elbv2.create_target_group(
+                Name=f'{app_id}-tg-{index}', Protocol='HTTP', Port=80, VpcId=vpc_id, HealthCheckPath='/health'
+            )['TargetGroups'][0]['TargetGroupArn']
+            elbv2.create_listener(LoadBalancerArn=lb_arn, Protocol='HTTP', Port=80,
+                                  DefaultActions=[{'Type': 'forward', 'TargetGroupArn': tg_arn}])
+
+def load_module(path: str, name: str):
+    """Import a Lambda source file as a fresh module so no warm state carries over between runs"""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+class CallCounter:
+    """Count API calls per service through botocore's before-call event"""
+
+    def __init__(self):
+        self.calls: Counter = Counter()
+        self.active = False
+        self.sessions: List[Any] = []
+
+    def watch(self, session):
+        if any(session is watched for watched in self.sessions):
+            return
+        self.sessions.append(session)
+        session.events.register('before-call', self.count)
+
+    def count(self, model=None, **kwargs):
+        if self.active and model is not None:
+            self.calls[model.service_model.service_name] += 1
+
+def unmetered_client(service: str):
+    """Client on its own session, for the harness's bookkeeping calls that shouldn't be counted"""
+    return boto3.session.Session().client(service)
+
+def benchmark_inventory(module) -> int:
+    output = module.get_infrastructure_details(APP_ID, force_refresh=True)
+    if output.startswith('Error'):
+        raise RuntimeError(output)
+    return len(output.encode('utf-8'))
+
+def benchmark_documentation(module) -> int:
+    result = module.generate_and_publish_documentation(APP_ID, force_refresh=True)
+    if result['statusCode'] != 200:
+        raise RuntimeError(result['error'])
+    key = urlparse(result['documentation_url']).path.lstrip('/')
+    return unmetered_client('s3').head_object(Bucket=DOCUMENTATION_BUCKET, Key=key)['ContentLength']
+
+def benchmark_tagging(module) -> int:
+    output_bytes = 0
+    buckets = [bucket['Name'] for bucket in unmetered_client('s3').list_buckets()['Buckets']
+               if bucket['Name'].startswith(f'{APP_ID}-bucket-')]
+    for bucket_name in buckets:
+        result = module.add_tag_to_s3(bucket_name, 'cost_center', 'benchmark')
+        if not result['success']:
+            raise RuntimeError(result['message'])
+        output_bytes += len(json.dumps(result).encode('utf-8'))
+    return output_bytes
+
+def reset_published_documentation():
+    """Drop the latest pointer so the next documentation run uploads instead of reusing the page"""
+    unmetered_client('s3').delete_object(Bucket=DOCUMENTATION_BUCKET, Key=f'documentation-metadata/latest/{APP_ID}.json')
+
+# name -> (Lambda source, benchmark function, state reset run before each pass)
+BENCHMARKS = {
+    'get_infrastructure_details': (INVENTORY_LAMBDA, benchmark_inventory, None),
+    'generate_and_publish_documentation': (INVENTORY_LAMBDA, benchmark_documentation, reset_published_documentation),
+    'add_tag_to_s3': (TAGGING_LAMBDA, benchmark_tagging, None),
+}
+
+def run_benchmark(name: str, measure_memory: bool) -> Dict[str, Any]:
+    """
+    Time one benchmark with call counting, then repeat it under tracemalloc for peak memory.
+    Each pass loads the Lambda fresh, as a cold container would.
+    """
+    path, func, reset = BENCHMARKS[name]
+    counter = CallCounter()
+    boto3.setup_default_session()
+    counter.watch(boto3.DEFAULT_SESSION)
+
+    if reset is not None:
+        reset()
+    module = load_module(path, f'benchmark_{name}')
+    if hasattr(module, 'get_session'):
+        counter.watch(module.get_session())
+    counter.active = True
+    started = time.perf_counter()
+    output_bytes = func(module)
+    wall_seconds = time.perf_counter() - started
+    counter.active = False
+
+    result = {
+        'wall_seconds': round(wall_seconds, 4),
+        'api_calls': dict(sorted(counter.calls.items())),
+        'api_calls_total': sum(counter.calls.values()),
+        'output_bytes': output_bytes,
+        'peak_memory_bytes': None,
+    }
+
+    if measure_memory:
+        if reset is not None:
+            reset()
+        module = load_module(path, f'benchmark_{name}')
+        tracemalloc.start()
+        try:
+            func(module)
+            result['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def compare_results(baseline: Dict[str, Any], results: Dict[str, Any]):
+    """Print the change of every metric against a baseline results file"""
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'}:")
+    previous_runs = {run['size']: run for run in baseline['runs']}
+    for run in results['runs']:
+        previous = previous_runs.get(run['size'])
+        if previous is None:
+            continue
+        for name, current in run['benchmarks'].items():
+            before = previous['benchmarks'].get(name)
+            if before is None or 'error' in current or 'error' in before:
+                continue
+            deltas = []
+            for metric in ('wall_seconds', 'api_calls_total', 'peak_memory_bytes', 'output_bytes'):
+                if current.get(metric) is not None and before.get(metric):
+                    deltas.append(f"{metric} {(current[metric] - before[metric]) / before[metric]:+.1%}")
+            print(f"  size {run['size']:>6} {name}: {', '.join(deltas)}")
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Benchmark the action group Lambdas against a synthetic moto account')
+    parser.add_argument('--sizes', default='10,100', help='resources of each kind per run, e.g. 10,100,1000,10000')
+    parser.add_argument('--counts', default='', help="per-kind overrides for every size, e.g. 'ec2=500,lambda=0'")
+    parser.add_argument('--noise', type=float, default=1.0, help="resources of another app per benchmarked resource")
+    parser.add_argument('--benchmarks', default=','.join(BENCHMARKS), help='comma-separated benchmarks to run')
+    parser.add_argument('--skip-memory', action='store_true', help='skip the tracemalloc pass')
+    parser.add_argument('--output', default=f"benchmark-results-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    parser.add_argument('--compare', help='earlier results file to compare against')
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    overrides = parse_counts(args.counts)
+    names = [name.strip() for name in args.benchmarks.split(',') if name.strip()]
+    for name in names:
+        if name not in BENCHMARKS:
+            parser.error(f"Unknown benchmark {name}; expected one of {', '.join(BENCHMARKS)}")
+
+    results = {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'noise': args.noise,
+        'runs': [],
+    }
+
+    for size in sizes:
+        counts = {kind: overrides.get(kind, size) for kind in RESOURCE_KINDS}
+        with mock_aws():
+            started = time.perf_counter()
+            populate_account(counts, args.noise)
+            run = {'size': size, 'counts': counts, 'setup_seconds': round(time.perf_counter() - started, 2), 'benchmarks': {}}
+            print(f"Size {size}: account ready in {run['setup_seconds']}s")
+
+            for name in names:
+                try:
+                    run['benchmarks'][name] = run_benchmark(name, not args.skip_memory)
+                except Exception as e:
+                    print(f"Error running {name} at size {size}: {str(e)}")
+                    run['benchmarks'][name] = {'error': str(e)}
+                    continue
+                metrics = run['benchmarks'][name]
+                memory = f"{metrics['peak_memory_bytes'] / 1048576:.1f} MiB" if metrics['peak_memory_bytes'] is not None else 'n/a'
+                print(f"  {name}: {metrics['wall_seconds']:.3f}s, {metrics['api_calls_total']} calls, "
+                      f"peak {memory}, output {metrics['output_bytes']} bytes")
+        results['runs'].append(run)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare_results(json.load(f), results)
+
+if __name__ == '__main__':
+    main()
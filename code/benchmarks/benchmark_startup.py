@@ -0,0 +1,206 @@
+"""
+Cold-start benchmark for the action group Lambdas.
+
+Every handler function is started in fresh interpreters, as a new Lambda container would be:
+
+- init: import the Lambda source in a clean interpreter (the Lambda init phase, including any
+  PREWARM work) and record the time and resident memory afterwards
+- invoke: in a second interpreter with a small moto account, import the source again and
+  time the first (cold) and second (warm) invocation of the handler, then record peak RSS.
+  moto loads boto3 before the Lambda does, so this pass times the handler, not the import.
+
+Each measurement is repeated and the median is reported. Results are written as JSON; pass
+--compare with an earlier results file to see the deltas, and --budget-ms to fail the run
+when any handler's cold start (init + first invocation) goes over budget.
+
+    python code/benchmarks/benchmark_startup.py --repeat 5 --prewarm all --budget-ms 1500
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import contextlib
+import importlib.util
+import io
+import platform
+import resource
+import statistics
+import subprocess
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INVENTORY_LAMBDA = os.path.join(ROOT, 'agents', 'action_groups', 'GetInfrastructureDetails', 'lambda_GetInfrastructureDetails.py')
+TAGGING_LAMBDA = os.path.join(ROOT, 'agents', 'action_groups', 'tag_resources', 'tag_s3.py')
+INFRASTRUCTURE_CODE = os.path.join(os.path.dirname(ROOT), 'infrastructure_code')
+
+APP_ID = 'bench'
+
+def agent_event(function_name: str, **parameters) -> Dict[str, Any]:
+    return {
+        'messageVersion': '1.0',
+        'actionGroup': 'benchmark',
+        'function': function_name,
+        'parameters': [{'name': name, 'value': value} for name, value in parameters.items()],
+    }
+
+# name -> (Lambda source, event for the first and second invocation, extra environment)
+HANDLERS = {
+    'GetInfrastructureDetails': (
+        INVENTORY_LAMBDA, agent_event('GetInfrastructureDetails', app_id=APP_ID), {}),
+    'GetInfrastructureDetails[source=terraform]': (
+        INVENTORY_LAMBDA, agent_event('GetInfrastructureDetails', app_id='100', source='terraform'),
+        {'INFRASTRUCTURE_CODE_SOURCE': INFRASTRUCTURE_CODE}),
+    'generate_and_publish_documentation': (
+        INVENTORY_LAMBDA, agent_event('generate_and_publish_documentation', app_id=APP_ID), {}),
+    'get_documentation_status': (
+        INVENTORY_LAMBDA, agent_event('get_documentation_status', job_id='missing'), {}),
+    'tag_s3': (
+        TAGGING_LAMBDA, agent_event('tag_s3', bucket_name=f'{APP_ID}-bucket-0', tag_name='cost_center', tag_value='benchmark'), {}),
+    'bulk_tag_resources': (
+        TAGGING_LAMBDA, agent_event('bulk_tag_resources', tags='cost_center=benchmark', patterns=f's3:{APP_ID}-bucket-*'), {}),
+}
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (ru_maxrss is KiB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1048576 if sys.platform == 'darwin' else 1024), 1)
+
+def load_module(path: str):
+    spec = importlib.util.spec_from_file_location('lambda_under_test', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def measure_init(path: str) -> Dict[str, Any]:
+    """Child process: time the import of the Lambda source in this clean interpreter"""
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        load_module(path)
+    return {'init_ms': round((time.perf_counter() - started) * 1000, 1), 'init_rss_mb': peak_rss_mb()}
+
+def measure_invoke(path: str, event: Dict[str, Any]) -> Dict[str, Any]:
+    """Child process: populate a small moto account, then time a cold and a warm invocation"""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import boto3
+    from moto import mock_aws
+    from benchmark_lambdas import populate_account, RESOURCE_KINDS
+
+    with mock_aws():
+        populate_account({kind: 2 for kind in RESOURCE_KINDS}, 1.0)
+        # The Lambda must not reuse the setup session's loaded service models
+        boto3.DEFAULT_SESSION = None
+        with contextlib.redirect_stdout(io.StringIO()):
+            module = load_module(path)
+            timings = []
+            for _ in range(2):
+                started = time.perf_counter()
+                module.lambda_handler(event, None)
+                timings.append(round((time.perf_counter() - started) * 1000, 1))
+    return {'first_invoke_ms': timings[0], 'warm_invoke_ms': timings[1], 'peak_rss_mb': peak_rss_mb()}
+
+def run_child(mode: str, name: str, prewarm: str) -> Dict[str, Any]:
+    """Run one measurement in a fresh interpreter and read its JSON result"""
+    path, _, extra_env = HANDLERS[name]
+    env = dict(os.environ, **extra_env)
+    # moto's region and fake credentials; never touch a real account
+    env.update(AWS_DEFAULT_REGION='us-east-1', AWS_ACCESS_KEY_ID='testing', AWS_SECRET_ACCESS_KEY='testing', PREWARM=prewarm)
+    env.pop('AWS_PROFILE', None)
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', mode, '--handler', name],
+        capture_output=True, text=True, env=env
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else f"exit {completed.returncode}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def benchmark_handler(name: str, repeat: int, prewarm: str) -> Dict[str, Any]:
+    """Median of repeat init and invoke measurements for one handler function"""
+    samples: Dict[str, List[float]] = {}
+    for _ in range(repeat):
+        for mode in ('init', 'invoke'):
+            for metric, value in run_child(mode, name, prewarm).items():
+                samples.setdefault(metric, []).append(value)
+    result = {metric: round(statistics.median(values), 1) for metric, values in samples.items()}
+    result['cold_start_ms'] = round(result['init_ms'] + result['first_invoke_ms'], 1)
+    return result
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def compare_results(baseline: Dict[str, Any], results: Dict[str, Any]):
+    """Print the change of every metric against a baseline results file"""
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'}:")
+    for name, current in results['handlers'].items():
+        before = baseline['handlers'].get(name)
+        if before is None or 'error' in current or 'error' in before:
+            continue
+        deltas = [
+            f"{metric} {current[metric] - before[metric]:+.1f}"
+            for metric in ('init_ms', 'first_invoke_ms', 'cold_start_ms', 'init_rss_mb', 'peak_rss_mb')
+            if current.get(metric) is not None and before.get(metric) is not None
+        ]
+        print(f"  {name}: {', '.join(deltas)}")
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Measure cold-start init time and memory of the action group Lambdas')
+    parser.add_argument('--handlers', default=','.join(HANDLERS), help='comma-separated handler functions to measure')
+    parser.add_argument('--repeat', type=int, default=3, help='fresh interpreters per measurement; the median is reported')
+    parser.add_argument('--prewarm', default='', help="PREWARM setting for the Lambdas, e.g. 'all' or 's3,lambda'")
+    parser.add_argument('--budget-ms', type=float, help='fail when a cold start (init + first invocation) takes longer')
+    parser.add_argument('--output', default=f"benchmark-results-startup-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    parser.add_argument('--compare', help='earlier results file to compare against')
+    parser.add_argument('--child', choices=['init', 'invoke'], help=argparse.SUPPRESS)
+    parser.add_argument('--handler', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        path, event, _ = HANDLERS[args.handler]
+        result = measure_init(path) if args.child == 'init' else measure_invoke(path, event)
+        print(json.dumps(result))
+        return
+
+    names = [name.strip() for name in args.handlers.split(',') if name.strip()]
+    for name in names:
+        if name not in HANDLERS:
+            parser.error(f"Unknown handler {name}; expected one of {', '.join(HANDLERS)}")
+
+    results = {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'prewarm': args.prewarm,
+        'repeat': args.repeat,
+        'handlers': {},
+    }
+    over_budget = []
+    for name in names:
+        try:
+            metrics = results['handlers'][name] = benchmark_handler(name, args.repeat, args.prewarm)
+        except Exception as e:
+            print(f"Error measuring {name}: {str(e)}")
+            results['handlers'][name] = {'error': str(e)}
+            continue
+        print(f"  {name}: init {metrics['init_ms']}ms ({metrics['init_rss_mb']} MiB RSS), "
+              f"first invoke {metrics['first_invoke_ms']}ms, warm invoke {metrics['warm_invoke_ms']}ms, "
+              f"cold start {metrics['cold_start_ms']}ms, peak {metrics['peak_rss_mb']} MiB RSS")
+        if args.budget_ms is not None and metrics['cold_start_ms'] > args.budget_ms:
+            over_budget.append(name)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare_results(json.load(f), results)
+    if over_budget:
+        sys.exit(f"Cold start over the {args.budget_ms}ms budget: {', '.join(over_budget)}")
+
+if __name__ == '__main__':
+    main()
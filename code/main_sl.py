@@ -1,7 +1,26 @@
 import os 
+import re
+import json
+import time
 import boto3
+import threading
 import streamlit as st
 import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime
+
+# Per-query agent latency is appended here as JSON lines so it can be tracked over time
+LATENCY_LOG_PATH = os.environ.get("AGENT_LATENCY_LOG", "agent_latency.jsonl")
+
+# Answers to a session's first, self-contained prompt are shared across sessions for this long,
+# keyed by normalized prompt and app_id. Follow-ups depend on the conversation and always go to the agent.
+RESPONSE_CACHE_TTL = int(os.environ.get("AGENT_RESPONSE_CACHE_TTL", "600"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get("AGENT_RESPONSE_CACHE_MAX_ENTRIES", "128"))
+# How long a session waits on another session's identical in-flight query before invoking itself
+COALESCE_WAIT_SECONDS = int(os.environ.get("AGENT_COALESCE_WAIT_SECONDS", "300"))
+
+APP_ID_PATTERN = re.compile(r"app[_\s-]?id\s*[=:]?\s*([\w-]+)", re.IGNORECASE)
 
 # Sample questions to guide users
 SAMPLE_QUESTIONS = [
@@ -45,26 +64,163 @@ if "waiting_for_answer" not in st.session_state:
 if "user_input" not in st.session_state:
     st.session_state.user_input = ""
 
-# Function to invoke the Bedrock agent
-def invoke_agent(agent_id, agent_alias_id, session_id, prompt):
+if "latency_log" not in st.session_state:
+    st.session_state.latency_log = []
+
+# Turns answered from the response cache that the agent session hasn't seen yet
+if "unsent_turns" not in st.session_state:
+    st.session_state.unsent_turns = []
+
+# Bounded TTL cache of agent responses, with in-flight tracking so identical
+# concurrent queries from different sessions share one agent invocation
+class ResponseCache:
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.in_flight = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry[0] > self.ttl:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def claim(self, key):
+        """Return (future, is_leader); the leader must call resolve() once it has a response"""
+        with self.lock:
+            if key in self.in_flight:
+                return self.in_flight[key], False
+            future = Future()
+            self.in_flight[key] = future
+            return future, True
+
+    def resolve(self, key, future, response, cacheable=True):
+        with self.lock:
+            self.in_flight.pop(key, None)
+            if cacheable:
+                self.entries[key] = (time.time(), response)
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+        future.set_result((response, cacheable))
+
+# Shared across reruns and sessions
+@st.cache_resource
+def get_agent_runtime_client():
+    return boto3.client("bedrock-agent-runtime", region_name="us-east-1")
+
+@st.cache_resource
+def get_response_cache():
+    return ResponseCache(RESPONSE_CACHE_TTL, RESPONSE_CACHE_MAX_ENTRIES)
+
+# Cache key for a query: whitespace/case/trailing punctuation normalized prompt plus the app_id it mentions
+def response_cache_key(query):
+    normalized = " ".join(query.lower().split()).rstrip("?!. ")
+    match = APP_ID_PATTERN.search(query)
+    return (normalized, match.group(1) if match else None)
+
+# Only a session's first prompt is answered the same way for everyone; later ones build on its history
+def is_cacheable_query():
+    return not st.session_state.chat_history and not st.session_state.get("bypass_cache")
+
+# Earlier turns the agent session missed, in the invoke_agent conversationHistory format
+def conversation_history(turns):
+    messages = []
+    for query, response in turns:
+        messages.append({"role": "user", "content": [{"text": query}]})
+        messages.append({"role": "assistant", "content": [{"text": response}]})
+    return {"conversationHistory": {"messages": messages}}
+
+st.sidebar.toggle("Bypass response cache", key="bypass_cache",
+                  help="Always invoke the agent instead of reusing a recent answer to the same question")
+
+# Turn an agent trace event into a short progress line, or None if it isn't worth showing
+def describe_trace(trace):
+    orchestration = trace.get("trace", {}).get("orchestrationTrace", {})
+    invocation = orchestration.get("invocationInput", {})
+    if "actionGroupInvocationInput" in invocation:
+        action = invocation["actionGroupInvocationInput"]
+        return f"Calling action group {action.get('actionGroupName', '')}: {action.get('function', action.get('apiPath', ''))}"
+    if "knowledgeBaseLookupInput" in invocation:
+        return "Searching the knowledge base"
+    if "rationale" in orchestration:
+        return f"Reasoning: {orchestration['rationale'].get('text', '')[:200]}"
+    if "observation" in orchestration:
+        observation_type = orchestration["observation"].get("type", "")
+        return f"Received {observation_type.lower().replace('_', ' ')} result" if observation_type else None
+    return None
+
+# Function to invoke the Bedrock agent, yielding completion chunks as they arrive
+# missed_turns are (query, response) pairs answered from the cache, replayed into the agent's memory
+def invoke_agent_stream(agent_id, agent_alias_id, session_id, prompt, timings, on_trace=None, missed_turns=None):
+    timings["started"] = time.perf_counter()
     try:
-        bedrock_agent_runtime = boto3.client(
-            "bedrock-agent-runtime", region_name="us-east-1"
-        )
-        response = bedrock_agent_runtime.invoke_agent(
+        bedrock_agent_runtime = get_agent_runtime_client()
+        request = dict(
             agentId=agent_id,
             agentAliasId=agent_alias_id,
             sessionId=session_id,
             inputText=prompt,
+            enableTrace=on_trace is not None,
+            streamingConfigurations={"streamFinalResponse": True},
         )
-        completion = ""
+        if missed_turns:
+            request["sessionState"] = conversation_history(missed_turns)
+        response = bedrock_agent_runtime.invoke_agent(**request)
         for event in response.get("completion", []):
-            chunk = event["chunk"]
-            completion += chunk["bytes"].decode()
+            if "chunk" in event:
+                text = event["chunk"]["bytes"].decode()
+                if text and "first_chunk" not in timings:
+                    timings["first_chunk"] = time.perf_counter()
+                yield text
+            elif "trace" in event and on_trace is not None:
+                progress = describe_trace(event["trace"])
+                if progress:
+                    on_trace(progress)
     except Exception as e:
         st.error(f"Error invoking agent: {e}")
-        completion = "Sorry, an error occurred while processing your query."
-    return completion
+        timings["error"] = str(e)
+        yield "Sorry, an error occurred while processing your query."
+    finally:
+        timings["finished"] = time.perf_counter()
+
+# Record time-to-first-chunk and total latency for a query
+def record_latency(query, timings, source="agent"):
+    started = timings["started"]
+    entry = {
+        "timestamp": datetime.now().isoformat(),
+        "session_id": st.session_state.session_id,
+        "query": query,
+        "time_to_first_chunk_ms": round((timings["first_chunk"] - started) * 1000) if "first_chunk" in timings else None,
+        "total_latency_ms": round((timings["finished"] - started) * 1000),
+        "error": timings.get("error"),
+        "source": source,
+    }
+    st.session_state.latency_log.append(entry)
+    try:
+        with open(LATENCY_LOG_PATH, "a") as log_file:
+            log_file.write(json.dumps(entry) + "\n")
+    except OSError as e:
+        print(f"Could not write latency log: {e}")
+    return entry
+
+# Format the latency caption shown under a response
+def format_latency(latency):
+    if not latency:
+        return ""
+    first_chunk = latency["time_to_first_chunk_ms"]
+    first_chunk_text = f"{first_chunk / 1000:.1f}s" if first_chunk is not None else "n/a"
+    source = latency.get("source", "agent")
+    if source != "agent":
+        return f"⏱️ {source} response in {latency['total_latency_ms'] / 1000:.1f}s"
+    return f"⏱️ First chunk {first_chunk_text} · total {latency['total_latency_ms'] / 1000:.1f}s"
 
 # Function to process user query and update history
 def process_query(query):
@@ -72,10 +228,60 @@ def process_query(query):
         agent_id = "ABCDEFGHIJ"  # Replace with your Bedrock agent ID
         agent_alias_id = "HIJKLMNOPQR"  # Replace with your Bedrock agent alias ID
         session_id = st.session_state.session_id
-        response = invoke_agent(agent_id, agent_alias_id, session_id, query)
+
+        # Render the response incrementally, with agent trace events as live progress
+        st.markdown("**🔵 Query:**")
+        st.write(query)
+        st.markdown("**🤖 Response:**")
+        status = st.status("Waiting for the agent...", expanded=False)
+
+        def show_progress(progress):
+            status.update(label=progress)
+            status.write(progress)
+
+        timings = {"started": time.perf_counter()}
+        response_cache = get_response_cache()
+        key = response_cache_key(query)
+        response, source = None, "agent"
+        if is_cacheable_query():
+            response = response_cache.get(key)
+            if response is not None:
+                source = "cached"
+            else:
+                future, is_leader = response_cache.claim(key)
+                if not is_leader:
+                    status.update(label="Waiting for an identical query from another session...")
+                    try:
+                        coalesced, cacheable = future.result(timeout=COALESCE_WAIT_SECONDS)
+                        if cacheable:
+                            response, source = coalesced, "coalesced"
+                    except Exception as e:
+                        print(f"Coalesced query did not complete: {e}")
+                else:
+                    # Always resolve so waiting sessions never hang on a failed leader
+                    try:
+                        response = st.write_stream(
+                            invoke_agent_stream(agent_id, agent_alias_id, session_id, query, timings, on_trace=show_progress)
+                        )
+                    finally:
+                        response_cache.resolve(key, future, response, cacheable=response is not None and "error" not in timings)
+
+        if response is None:
+            response = st.write_stream(
+                invoke_agent_stream(agent_id, agent_alias_id, session_id, query, timings, on_trace=show_progress,
+                                    missed_turns=st.session_state.unsent_turns)
+            )
+            if "error" not in timings:
+                st.session_state.unsent_turns = []
+        elif source != "agent":
+            st.write(response)
+            timings["first_chunk"] = timings["finished"] = time.perf_counter()
+            st.session_state.unsent_turns.append((query, response))
+        latency = record_latency(query, timings, source)
+        status.update(label=format_latency(latency), state="error" if latency["error"] else "complete")
         
         # Add to chat history
-        st.session_state.chat_history.append({"query": query, "response": response})
+        st.session_state.chat_history.append({"query": query, "response": response, "latency": latency})
         st.session_state.waiting_for_answer = True
         st.session_state.user_input = ""  # Clear the input after processing
         return response
@@ -89,6 +295,8 @@ def display_chat_history():
             st.write(item["query"])
             st.markdown("**🤖 Response:**")
             st.write(item["response"])
+            if item.get("latency"):
+                st.caption(format_latency(item["latency"]))
             st.markdown("---")
 
 # Sample questions section
@@ -121,9 +329,19 @@ with st.form(key='query_form', clear_on_submit=False):
         process_query(user_input)
         st.rerun()
 
+# Agent latency for this session
+if st.session_state.latency_log:
+    first_chunks = [entry["time_to_first_chunk_ms"] for entry in st.session_state.latency_log if entry["time_to_first_chunk_ms"] is not None]
+    totals = [entry["total_latency_ms"] for entry in st.session_state.latency_log]
+    st.sidebar.markdown("### Agent Latency")
+    if first_chunks:
+        st.sidebar.metric("Avg time to first chunk", f"{sum(first_chunks) / len(first_chunks) / 1000:.1f}s")
+    st.sidebar.metric("Avg total latency", f"{sum(totals) / len(totals) / 1000:.1f}s")
+
 # Add clear history button in sidebar
 if st.sidebar.button("Clear Chat History"):
     st.session_state.chat_history = []
+    st.session_state.unsent_turns = []
     st.session_state.waiting_for_answer = True
     st.session_state.user_input = ""
     st.rerun()
\ No newline at end of file
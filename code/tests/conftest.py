@@ -0,0 +1,30 @@
+import os
+import importlib.util
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INVENTORY_LAMBDA = os.path.join(ROOT, 'agents', 'action_groups', 'GetInfrastructureDetails', 'lambda_GetInfrastructureDetails.py')
+TAGGING_LAMBDA = os.path.join(ROOT, 'agents', 'action_groups', 'tag_resources', 'tag_s3.py')
+
+# The module builds a boto3 session on import; never let it reach a real account
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+
+
+def load_module(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope='session')
+def inventory_lambda():
+    return load_module('lambda_GetInfrastructureDetails', INVENTORY_LAMBDA)
+
+
+@pytest.fixture(scope='session')
+def tagging_lambda():
+    return load_module('tag_s3', TAGGING_LAMBDA)
@@ -0,0 +1,48 @@
+"""
+InventoryCache lookups and invalidation across both tiers, with a file-backed shared tier.
+"""
+
+import pytest
+
+
+@pytest.fixture
+def cache(inventory_lambda, tmp_path):
+    inventory_lambda.reset_metrics()
+    shared = inventory_lambda.FileCacheBackend(str(tmp_path))
+    return inventory_lambda.InventoryCache(16, inventory_lambda.DEFAULT_CACHE_TTLS, shared=shared)
+
+
+def test_summary_lookup_counts_one_miss(inventory_lambda, cache):
+    assert cache.get('100', 'lambda', 'lambda:summary') is None
+    assert inventory_lambda.METRICS['cache_misses'] == 1
+
+    cache.set('100', 'lambda:summary', ['summary'])
+    assert cache.get('100', 'lambda', 'lambda:summary') == ['summary']
+    assert inventory_lambda.METRICS['cache_hits'] == 1
+    assert inventory_lambda.METRICS['cache_misses'] == 1
+
+
+def test_invalidate_clears_every_scope_of_the_app(cache):
+    scopes = ['100', '100@123456789012/us-west-2', '100#buckets=us-east-1', '100@123456789012/us-west-2#buckets=us-west-2']
+    for scope in scopes:
+        cache.set(scope, 's3', ['full'])
+        cache.set(scope, 's3:summary', ['summary'])
+        cache.set(scope, 'discovery', {})
+    cache.set('1000', 's3', ['other app'])
+
+    assert cache.invalidate('100') == 3 * len(scopes)
+    for scope in scopes:
+        assert cache.get(scope, 's3', 's3:summary', 'discovery') is None
+    assert cache.shared.keys('100') == ['1000/s3']
+    assert cache.get('1000', 's3') == ['other app']
+
+
+def test_invalidate_limited_to_services_keeps_other_sections(cache):
+    cache.set('100@123456789012/us-west-2', 's3:summary', ['summary'])
+    cache.set('100@123456789012/us-west-2', 'lambda', ['function'])
+    cache.set('100@123456789012/us-west-2', 'discovery', {})
+
+    assert cache.invalidate('100', ['s3']) == 2
+    cache.entries.clear()
+    assert cache.get('100@123456789012/us-west-2', 'lambda') == ['function']
+    assert cache.get('100@123456789012/us-west-2', 's3', 's3:summary', 'discovery') is None
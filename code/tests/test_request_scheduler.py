@@ -0,0 +1,73 @@
+"""
+Request scheduler pacing: buckets and concurrency limits are kept per credentials and
+region, so throttling in one inventory target leaves the others at full speed.
+"""
+
+import botocore.session
+from botocore.awsrequest import AWSResponse
+
+OPERATION = botocore.session.get_session().get_service_model('ec2').operation_model('DescribeInstances')
+EAST = ('credentials', 'us-east-1')
+WEST = ('credentials', 'eu-west-1')
+
+
+def run_call(lambda_module, scheduler, scope, throttled):
+    context = {}
+    scheduler.before_call(model=OPERATION, context=context, scope=scope)
+    if throttled:
+        # Last allowed attempt, so the hook only records the throttle instead of asking for a retry
+        scheduler.needs_retry(
+            response=(None, {'Error': {'Code': 'Throttling'}}), operation=OPERATION,
+            attempts=lambda_module.CLIENT_MAX_ATTEMPTS + lambda_module.THROTTLE_RETRY_ATTEMPTS,
+            request_dict={'context': context}
+        )
+    scheduler.after_call(context=context)
+
+
+def test_throttling_in_one_region_does_not_slow_another(inventory_lambda):
+    scheduler = inventory_lambda.RequestScheduler({'ec2': 10.0, 'ec2.DescribeInstances': 4.0}, 8)
+    for _ in range(3):
+        run_call(inventory_lambda, scheduler, EAST, throttled=True)
+    run_call(inventory_lambda, scheduler, WEST, throttled=False)
+
+    assert scheduler._limit(EAST, 'ec2').limit < 8
+    assert scheduler._bucket(EAST, 'ec2').rate < 10.0
+    assert scheduler._bucket(EAST, 'ec2.DescribeInstances').rate < 4.0
+
+    assert scheduler._limit(WEST, 'ec2').limit == 8
+    assert scheduler._bucket(WEST, 'ec2').rate == 10.0
+    assert scheduler._bucket(WEST, 'ec2.DescribeInstances').rate == 4.0
+
+
+class FakeResponse:
+    content = b'<GetCallerIdentityResponse><GetCallerIdentityResult><Account>123456789012</Account></GetCallerIdentityResult></GetCallerIdentityResponse>'
+
+    def stream(self, **kwargs):
+        yield self.content
+
+    def read(self):
+        return self.content
+
+
+def test_registry_clients_are_scheduled_per_region(inventory_lambda):
+    scopes = []
+
+    def send(request, **kwargs):
+        scopes.append(request.context['scheduler']['scope'])
+        return AWSResponse(request.url, 200, {}, FakeResponse())
+
+    for region in ('us-east-1', 'eu-west-1'):
+        client = inventory_lambda.get_client('sts', region)
+        client.meta.events.register('before-send', send)
+        try:
+            assert client.get_caller_identity()['Account'] == '123456789012'
+        finally:
+            client.meta.events.unregister('before-send', send)
+
+    assert [scope[1] for scope in scopes] == ['us-east-1', 'eu-west-1']
+    assert scopes[0][0] == scopes[1][0]
+
+
+def test_both_lambdas_count_the_same_throttle_codes(inventory_lambda, tagging_lambda):
+    # Both emit ApiThrottles under one metric name and namespace
+    assert tagging_lambda.THROTTLE_ERROR_CODES == inventory_lambda.THROTTLE_ERROR_CODES
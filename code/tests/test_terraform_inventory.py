@@ -0,0 +1,126 @@
+"""
+Offline inventory built from the Terraform code in infrastructure_code/.
+
+These read app_100 and app_101 through the HCL parser and the iac_* builders only;
+no AWS calls are made.
+"""
+
+import os
+
+import pytest
+
+INFRASTRUCTURE_CODE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'infrastructure_code'
+)
+
+
+@pytest.fixture(scope='module')
+def app_100(inventory_lambda):
+    return inventory_lambda.terraform_inventory('100', INFRASTRUCTURE_CODE)
+
+
+@pytest.fixture(scope='module')
+def app_101(inventory_lambda):
+    return inventory_lambda.terraform_inventory('101', INFRASTRUCTURE_CODE)
+
+
+def test_parser_reads_blocks_heredocs_and_references(inventory_lambda):
+    body = inventory_lambda.HclParser('''
+variable "name" { default = "demo" }
+
+resource "aws_s3_bucket" "bucket" {
+  bucket = "${var.name}-bucket" # trailing comment
+  tags = { app_id = var.name }
+  user_data = <<-EOF
+    #!/bin/bash
+    echo hi
+    EOF
+  ingress {
+    from_port = 80
+    cidr_blocks = ["0.0.0.0/0"]
+  }
+}
+''').parse()
+
+    block_type, labels, block = body['blocks'][1]
+    assert (block_type, labels) == ('resource', ['aws_s3_bucket', 'bucket'])
+    values = inventory_lambda.block_values(block, {'var.name': 'demo'})
+    assert values['bucket'] == 'demo-bucket'
+    assert values['tags'] == {'app_id': 'demo'}
+    assert values['user_data'] == '#!/bin/bash\necho hi\n'
+    assert values['ingress'] == [{'from_port': 80, 'cidr_blocks': ['0.0.0.0/0']}]
+
+
+def test_unresolvable_references_stay_unknown(inventory_lambda):
+    value = inventory_lambda.resolve_expression(
+        inventory_lambda.TfExpression('aws_security_group.app_sg.id'), {'var.app_id': '100'}
+    )
+    assert isinstance(value, inventory_lambda.TfExpression)
+    assert inventory_lambda.known(value) is None
+
+
+def test_app_100_region_and_sections(app_100):
+    assert app_100.region == 'us-east-1'
+    assert {service: len(records) for service, records in app_100.sections.items()} == {
+        'lambda': 0, 'apigateway': 0, 'ec2': 1, 'dynamodb': 1, 's3': 1, 'elasticloadbalancing': 1,
+    }
+    assert app_100.sections['s3'][0].bucket_name == 'demo-app-bucket-100'
+
+
+def test_app_100_security_group_rules(app_100):
+    instance = app_100.sections['ec2'][0]
+    assert instance.instance_type == 't2.micro'
+    assert instance.instance_id is None
+    [group] = instance.security_groups
+    assert group.group_name == 'demo-app-sg'
+    # Egress rules are not part of the inventory
+    assert [(rule.protocol, rule.from_port, rule.to_port, rule.sources) for rule in group.inbound_rules] == [
+        ('tcp', 80, 80, ['0.0.0.0/0']),
+        ('tcp', 443, 443, ['0.0.0.0/0']),
+    ]
+
+
+def test_app_100_load_balancer_links(app_100):
+    [load_balancer] = app_100.sections['elasticloadbalancing']
+    assert (load_balancer.name, load_balancer.type, load_balancer.scheme) == ('demo-app-alb', 'application', 'internet-facing')
+
+    [target_group] = load_balancer.target_groups
+    assert (target_group.name, target_group.protocol, target_group.port) == ('demo-app-tg', 'HTTP', 80)
+    assert target_group.health_check.path == '/'
+    assert target_group.health_check.port == 'traffic-port'
+
+    [listener] = load_balancer.listeners
+    assert (listener.protocol, listener.port, listener.default_action) == ('HTTP', 80, 'forward')
+
+
+def test_app_100_provisioned_table(app_100):
+    [table] = app_100.sections['dynamodb']
+    assert table.table_name == 'demo-app-table'
+    assert table.billing_mode == 'PROVISIONED'
+    assert (table.provisioned_throughput.read_capacity_units, table.provisioned_throughput.write_capacity_units) == (5, 5)
+    assert (table.primary_key.hash_key, table.primary_key.hash_key_type) == ('id', 'S')
+
+
+def test_app_101_api_methods(app_101):
+    [api] = app_101.sections['apigateway']
+    assert api.api_name == 'simple-serverless-api'
+    resources = {resource.path: resource for resource in api.resources}
+    assert set(resources) == {'/', '/items'}
+    assert [(method.http_method, method.authorization, method.api_key_required)
+            for method in resources['/items'].methods] == [('POST', 'NONE', False)]
+    assert [stage.stage_name for stage in api.stages] == ['prod']
+
+
+def test_app_101_on_demand_table(app_101):
+    [table] = app_101.sections['dynamodb']
+    assert table.table_name == 'simple-serverless-table'
+    assert table.billing_mode == 'PAY_PER_REQUEST'
+    assert table.provisioned_throughput is None
+
+
+def test_app_101_lambda_function(app_101):
+    [function] = app_101.sections['lambda']
+    assert (function.function_name, function.runtime, function.handler) == (
+        'simple-serverless-function', 'nodejs18.x', 'index.handler'
+    )
+    assert app_101.sections['ec2'] == []